@@ -209,49 +209,104 @@
 
   /* --------------------------------------------------
      6. TONIGHT ON CARTOFIA FEED
-     Fetches live data from /api/homepage/feed and
-     replaces the hardcoded placeholder items.
+     Renders live items from /api/homepage/feed over the
+     hardcoded placeholder items.
   -------------------------------------------------- */
 
-  (async function loadFeed() {
+  function renderFeed(data) {
     var feedList = document.querySelector('.feed-list');
     if (!feedList) return;
+    var items = data && Array.isArray(data.items) && data.items.length ? data.items : null;
+    if (!items) return;
+    feedList.textContent = '';
+    items.forEach(function (item) {
+      var li = document.createElement('li');
+      if (item.icon) {
+        var icon = document.createElement('span');
+        icon.className = 'feed-icon';
+        icon.setAttribute('aria-hidden', 'true');
+        icon.textContent = item.icon;
+        li.appendChild(icon);
+      }
+      li.appendChild(document.createTextNode(item.text || ''));
+      feedList.appendChild(li);
+    });
+  }
+
+  async function loadFeed() {
+    if (!document.querySelector('.feed-list')) return;
     try {
       var res = await fetch('/api/homepage/feed');
       if (!res.ok) throw new Error('non-200');
-      var data = await res.json();
-      var items = Array.isArray(data.items) && data.items.length ? data.items : null;
-      if (items) {
-        feedList.innerHTML = items.map(function (item) {
-          var icon = item.icon
-            ? '<span class="feed-icon" aria-hidden="true">' + item.icon + '</span>'
-            : '';
-          return '<li>' + icon + (item.text || '') + '</li>';
-        }).join('');
-      }
+      renderFeed(await res.json());
     } catch (_) {
       // Leave the fallback content already in the HTML
     }
-  })();
+  }
 
 
 
   /* --------------------------------------------------
      7. PLAYERS ONLINE COUNTER
-     Polls /api/online every 30 seconds and updates
-     the stat-value element with id="online-count".
+     Updates the stat-value element with id="online-count".
   -------------------------------------------------- */
 
+  function renderOnlineCount(data) {
+    var el = document.getElementById('online-count');
+    if (el && data) el.textContent = data.count;
+  }
+
   function updateOnlineCount() {
     fetch('/api/online')
       .then(function(r) { return r.json(); })
-      .then(function(data) {
-        var el = document.getElementById('online-count');
-        if (el) el.textContent = data.count;
-      })
+      .then(renderOnlineCount)
       .catch(function() {});
   }
-  updateOnlineCount();
-  setInterval(updateOnlineCount, 30000);
+
+
+
+  /* --------------------------------------------------
+     8. LIVE UPDATES
+     Subscribes to /api/events (Server-Sent Events) for
+     feed and online-count changes. Falls back to a
+     one-off feed fetch plus 30s online polling when SSE
+     is unsupported or the server refuses the stream.
+  -------------------------------------------------- */
+
+  var pollingStarted = false;
+  function startPolling() {
+    if (pollingStarted) return;
+    pollingStarted = true;
+    loadFeed();
+    updateOnlineCount();
+    setInterval(updateOnlineCount, 30000);
+  }
+
+  function onLiveEvent(handler) {
+    return function (event) {
+      gotLiveEvent = true;
+      try { handler(JSON.parse(event.data)); } catch (_) {}
+    };
+  }
+
+  var gotLiveEvent = false;
+  if (typeof window.EventSource === 'function') {
+    var live = new EventSource('/api/events?topics=feed,online');
+    live.addEventListener('feed', onLiveEvent(renderFeed));
+    live.addEventListener('online', onLiveEvent(renderOnlineCount));
+    live.onerror = function () {
+      // CLOSED means the server rejected the stream; the browser will not retry.
+      if (live.readyState === EventSource.CLOSED) startPolling();
+    };
+    // A buffering proxy can hold the stream open without delivering events.
+    setTimeout(function () {
+      if (!gotLiveEvent) {
+        live.close();
+        startPolling();
+      }
+    }, 10000);
+  } else {
+    startPolling();
+  }
 
 })();
@@ -0,0 +1,89 @@
+"""Benchmark ProxmoxStats against a fake cluster of 1-20 nodes.
+
+Usage (from the repository root):
+
+    PYTHONPATH=src python scripts/bench_cluster_stats.py --nodes 1 2 5 10 20 --latency 0.05
+
+"before" is what adding nodes to the single-node code would cost: the
+LXC, QEMU and status calls for each node one after another. "after" is
+cluster mode (``PROXMOX_CLUSTER=true``): one ``/cluster/resources`` call for
+every guest plus per-node status calls fanned out in parallel, with node
+discovery cached between rounds.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_proxmox import start_in_thread  # noqa: E402
+
+
+def _new_stats(url: str, cluster: bool):
+    from cartofia_bot.proxmox_stats import ProxmoxStats
+
+    os.environ.update(
+        PROXMOX_URL=url,
+        PROXMOX_TOKEN_ID="bench@pve!bench",
+        PROXMOX_TOKEN_SECRET="bench",
+        PROXMOX_CLUSTER="true" if cluster else "false",
+        PROXMOX_STATS_DEADLINE="30",
+    )
+    return ProxmoxStats()
+
+
+def _sequential_round(stats, nodes: list[str]) -> int:
+    online = 0
+    for node in nodes:
+        stats.proxmox_node = node
+        online += stats.get_container_stats()["online_containers"]
+        stats.get_qemu_stats()
+        stats.get_node_stats()
+    return online
+
+
+def _time(label: str, rounds: int, fn) -> float:
+    fn()  # warm up: authentication and, in cluster mode, discovery
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - started) / rounds * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, nargs="+", default=[1, 2, 5, 10, 20])
+    parser.add_argument("--latency", type=float, default=0.05, help="fake per-request latency (s)")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    print(f"{'nodes':>5}  {'before ms':>10}  {'after ms':>9}  {'speedup':>7}  online containers")
+    for count in args.nodes:
+        server = start_in_thread(count, args.latency)
+        url = f"http://127.0.0.1:{server.server_port}"
+        try:
+            before_stats = _new_stats(url, cluster=False)
+            node_names = [f"pve{index + 1}" for index in range(count)]
+            before = _time("before", args.rounds, lambda: _sequential_round(before_stats, node_names))
+
+            after_stats = _new_stats(url, cluster=True)
+            after = _time("after", args.rounds, after_stats.get_all_stats)
+            online = after_stats.get_all_stats()["online_containers"]
+            expected = _sequential_round(before_stats, node_names)
+        finally:
+            server.shutdown()
+            server.server_close()
+        check = "" if online == expected else f"  MISMATCH (sequential saw {expected})"
+        print(f"{count:>5}  {before:>10.1f}  {after:>9.1f}  {before / after:>6.1f}x  {online}{check}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""Benchmark /api/profile/me with per-request vs pooled SQLite connections.
+
+Usage (from the repository root):
+
+    PYTHONPATH=src python scripts/bench_profile_me.py --requests 2000 --threads 4 --writer
+
+"before" mimics the original behaviour: a fresh ``sqlite3.connect`` per
+request on a rollback-journal database. "after" uses the shared
+``SQLitePool`` (WAL, tuned PRAGMAs, reused statement caches). ``--writer``
+runs a background thread that keeps inserting archive rows, like a steady
+stream of uploads, so lock contention between readers and writers shows up.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+TOKEN = "bench-token"
+
+
+class _PerRequestConnections:
+    """Stand-in for SQLitePool that reproduces the pre-pool behaviour."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA journal_mode=DELETE")
+        conn.close()
+
+    def acquire(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        conn.close()
+
+
+def _writer_loop(
+    path: Path, stop: threading.Event, counter: list[int], interval: float
+) -> None:
+    conn = sqlite3.connect(path, timeout=30)
+    while not stop.wait(interval):
+        conn.execute(
+            """
+            INSERT INTO archive_files (original_name, stored_name, size_bytes, uploaded_by, uploaded_at)
+            VALUES ('bench.bin', ?, 1, 'bench-writer', '2000-01-01T00:00:00+00:00')
+            """,
+            (f"bench-{time.monotonic_ns()}",),
+        )
+        conn.commit()
+        counter[0] += 1
+    conn.close()
+
+
+def _run(api, label: str, total: int, threads: int, writer_interval: float | None) -> float:
+    client = api.app.test_client()
+    headers = {"Authorization": f"Bearer {TOKEN}"}
+    client.get("/api/profile/me", headers=headers)  # warm up
+
+    stop = threading.Event()
+    writes = [0]
+    writer_thread = None
+    if writer_interval is not None:
+        writer_thread = threading.Thread(
+            target=_writer_loop,
+            args=(api.ARCHIVE_DB_PATH, stop, writes, writer_interval),
+            daemon=True,
+        )
+        writer_thread.start()
+
+    failures = [0]
+
+    def one(_index: int) -> None:
+        resp = api.app.test_client().get("/api/profile/me", headers=headers)
+        if resp.status_code != 200:
+            failures[0] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    if writer_thread is not None:
+        writer_thread.join()
+    rate = total / elapsed
+    print(
+        f"{label:>6}: {rate:8.1f} req/s  ({total} requests, {threads} threads, "
+        f"{writes[0]} concurrent writes, {failures[0]} failures)"
+    )
+    return rate
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--writer", action="store_true", help="run a concurrent upload writer")
+    parser.add_argument(
+        "--writer-interval", type=float, default=0.005, help="seconds between writer inserts"
+    )
+    args = parser.parse_args()
+    writer_interval = args.writer_interval if args.writer else None
+
+    data_dir = tempfile.mkdtemp(prefix="cartofia-bench-")
+    os.environ["ARCHIVE_DATA_DIR"] = data_dir
+    os.environ.setdefault("OIDC_USERINFO_URL", "http://127.0.0.1:9/userinfo")
+    os.environ.setdefault("API_SECRET_KEY", "bench")
+
+    from cartofia_bot import api_server as api
+
+    api.app.logger.disabled = True
+    api.oidc_claims_cache.ttl = 3600
+    api.oidc_claims_cache.set(
+        api._token_cache_key(TOKEN),
+        {"preferred_username": "bench", "email": "bench@example.com", "groups": []},
+    )
+
+    pooled = api.db_pool
+    pooled.close_all()
+    api.db_pool = _PerRequestConnections(api.ARCHIVE_DB_PATH)
+    before = _run(api, "before", args.requests, args.threads, writer_interval)
+
+    api.db_pool = pooled
+    with pooled.connection() as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+    after = _run(api, "after", args.requests, args.threads, writer_interval)
+
+    print(f"speedup: {after / before:.2f}x  (data dir: {data_dir})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+"""Minimal fake Proxmox API for exercising ProxmoxStats against N nodes.
+
+Usage (from the repository root):
+
+    python scripts/fake_proxmox.py --nodes 5 --latency 0.05 --port 8006
+
+Then point the API at it with ``PROXMOX_URL=http://127.0.0.1:8006``, any
+``PROXMOX_TOKEN_ID``/``PROXMOX_TOKEN_SECRET`` and ``PROXMOX_CLUSTER=true``.
+Serves ``/version``, ``/nodes``, ``/cluster/resources`` and the per-node
+``lxc``, ``qemu`` and ``status`` endpoints with deterministic data. Every
+request sleeps ``--latency`` seconds to mimic a round-trip to real hardware;
+``--slow-node pve2=3`` adds 3s to that node's own endpoints.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+GIB = 1024**3
+
+
+class FakeCluster:
+    def __init__(self, nodes: int, guests_per_node: int) -> None:
+        self.nodes = [f"pve{index + 1}" for index in range(max(1, nodes))]
+        self.guests: list[dict[str, object]] = []
+        vmid = 100
+        for node_index, node in enumerate(self.nodes):
+            for guest_index in range(guests_per_node):
+                kind = "lxc" if guest_index % 3 else "qemu"
+                name = ("cartofia-game" if guest_index % 5 == 1 else "service") + f"-{vmid}"
+                if guest_index == 2 and node_index == 0:
+                    name = "cartofia-bot"
+                self.guests.append(
+                    {
+                        "id": f"{kind}/{vmid}",
+                        "type": kind,
+                        "vmid": vmid,
+                        "node": node,
+                        "name": name,
+                        "status": "stopped" if guest_index % 4 == 3 else "running",
+                        "mem": GIB // 2,
+                        "maxmem": 2 * GIB,
+                    }
+                )
+                vmid += 1
+
+    def node_status(self, node: str) -> dict[str, object]:
+        index = self.nodes.index(node)
+        return {
+            "uptime": 86400 * (index + 1),
+            "memory": {"used": (8 + index) * GIB, "total": 32 * GIB},
+            "disk": {"used": (100 + index) * GIB, "total": 500 * GIB},
+        }
+
+    def route(self, path: str, query: dict[str, list[str]]) -> object | None:
+        parts = [part for part in path.split("/") if part][2:]  # drop "api2/json"
+        if parts == ["version"]:
+            return {"version": "8.2.0", "release": "8.2"}
+        if parts == ["nodes"]:
+            return [
+                {"node": node, "status": "online", "uptime": self.node_status(node)["uptime"]}
+                for node in self.nodes
+            ]
+        if parts == ["cluster", "resources"]:
+            kind = query.get("type", [""])[0]
+            if kind in ("", "vm"):
+                return self.guests
+            return []
+        if len(parts) == 3 and parts[0] == "nodes" and parts[1] in self.nodes:
+            node, leaf = parts[1], parts[2]
+            if leaf == "status":
+                return self.node_status(node)
+            if leaf in ("lxc", "qemu"):
+                return [
+                    {key: value for key, value in guest.items() if key not in ("id", "type", "node")}
+                    | ({"hostname": guest["name"]} if leaf == "lxc" else {})
+                    for guest in self.guests
+                    if guest["node"] == node and guest["type"] == leaf
+                ]
+        return None
+
+
+def make_server(
+    nodes: int,
+    latency: float = 0.0,
+    guests_per_node: int = 12,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    slow_nodes: dict[str, float] | None = None,
+) -> ThreadingHTTPServer:
+    """Build (but do not start) a fake Proxmox server; ``port=0`` picks a free port."""
+    cluster = FakeCluster(nodes, guests_per_node)
+    slow_nodes = {} if slow_nodes is None else slow_nodes
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+            pass
+
+        def do_GET(self) -> None:  # noqa: N802
+            if latency:
+                time.sleep(latency)
+            url = urlsplit(self.path)
+            parts = url.path.split("/")
+            if len(parts) > 4 and parts[3] == "nodes" and parts[4] in slow_nodes:
+                time.sleep(slow_nodes[parts[4]])
+            data = cluster.route(url.path, parse_qs(url.query))
+            if data is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = json.dumps({"data": data}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_in_thread(
+    nodes: int,
+    latency: float = 0.0,
+    guests_per_node: int = 12,
+    slow_nodes: dict[str, float] | None = None,
+) -> ThreadingHTTPServer:
+    server = make_server(nodes, latency, guests_per_node, slow_nodes=slow_nodes)
+    threading.Thread(target=server.serve_forever, name="fake-proxmox", daemon=True).start()
+    return server
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every request")
+    parser.add_argument("--guests-per-node", type=int, default=12)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8006)
+    parser.add_argument(
+        "--slow-node",
+        action="append",
+        default=[],
+        metavar="NODE=SECONDS",
+        help="extra delay for one node's endpoints (repeatable)",
+    )
+    args = parser.parse_args()
+
+    slow_nodes = {}
+    for entry in args.slow_node:
+        node, _sep, seconds = entry.partition("=")
+        slow_nodes[node] = float(seconds or 0)
+    server = make_server(args.nodes, args.latency, args.guests_per_node, args.host, args.port, slow_nodes)
+    print(
+        f"fake Proxmox with {args.nodes} nodes on http://{args.host}:{server.server_port} "
+        f"({args.latency * 1000:.0f}ms latency)"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
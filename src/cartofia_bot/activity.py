@@ -0,0 +1,222 @@
+"""Write-behind ingestion of arcade game events into ``activity_log``.
+
+Request handlers only enqueue events. A single background writer drains the
+bounded queue and inserts them with one ``executemany`` per transaction, so
+a burst of plays costs a handful of commits instead of one per request. When
+the queue is full ``submit()`` returns False and callers shed load. Feed
+rollups for finished games are bumped in the same transaction.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import AbstractContextManager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable
+
+try:
+    from cartofia_bot.rollups import PLAYS, bump_many
+except ImportError:  # pragma: no cover - fallback for direct script execution
+    from rollups import PLAYS, bump_many
+
+log = logging.getLogger(__name__)
+
+GAME_STARTED = "game_started"
+PLAYED_GAME = "played_game"
+ACTIVITY_EVENT_TYPES = frozenset({GAME_STARTED, PLAYED_GAME})
+
+_PRUNE_CHUNK = 5000
+
+
+@dataclass(frozen=True)
+class ActivityEvent:
+    username: str
+    event_type: str
+    game_name: str
+    result: str
+    duration_seconds: int | None
+    metadata: str
+    logged_at: str
+
+    def as_row(self) -> tuple[object, ...]:
+        return (
+            self.username,
+            self.event_type,
+            self.game_name,
+            self.result,
+            self.duration_seconds,
+            self.metadata,
+            self.logged_at,
+        )
+
+
+class ActivityWriter:
+    """Batch queued activity events into SQLite on a background thread."""
+
+    def __init__(
+        self,
+        connect: Callable[[], AbstractContextManager[sqlite3.Connection]],
+        *,
+        max_queue: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        retention_days: int = 90,
+        prune_interval: float = 3600,
+    ) -> None:
+        self.connect = connect
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = max(0.0, float(flush_interval))
+        self.retention_days = max(1, int(retention_days))
+        self.prune_interval = max(60.0, float(prune_interval))
+        self._queue: queue.Queue[ActivityEvent] = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._next_prune = 0.0
+        self.written = 0
+        self.rejected = 0
+        self.batches = 0
+        self.failed_batches = 0
+
+    def submit(self, event: ActivityEvent) -> bool:
+        """Queue an event; False means the queue is full and it was dropped."""
+        self.start()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.rejected += 1
+            return False
+        return True
+
+    def _drain(self, first: ActivityEvent) -> list[ActivityEvent]:
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: list[ActivityEvent]) -> None:
+        with self._flush_lock, self.connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    """
+                    INSERT INTO activity_log (
+                        username, event_type, game_name, result, duration_seconds, metadata, logged_at
+                    )
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    [event.as_row() for event in batch],
+                )
+                bump_many(
+                    conn,
+                    [
+                        (PLAYS, event.logged_at, dimension, 1)
+                        for event in batch
+                        if event.event_type == PLAYED_GAME
+                        for dimension in ("", event.game_name)
+                    ],
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        self.written += len(batch)
+        self.batches += 1
+
+    def prune(self, now: float | None = None) -> int:
+        """Delete rows older than the retention window, in small chunks."""
+        now = time.time() if now is None else now
+        cutoff = datetime.fromtimestamp(now - self.retention_days * 86400, tz=timezone.utc).isoformat()
+        deleted = 0
+        while True:
+            with self._flush_lock, self.connect() as conn:
+                cursor = conn.execute(
+                    """
+                    DELETE FROM activity_log
+                    WHERE id IN (
+                        SELECT id FROM activity_log WHERE logged_at < ? ORDER BY logged_at LIMIT ?
+                    )
+                    """,
+                    (cutoff, _PRUNE_CHUNK),
+                )
+                conn.commit()
+            deleted += max(0, cursor.rowcount)
+            if cursor.rowcount < _PRUNE_CHUNK:
+                return deleted
+
+    def flush(self) -> int:
+        """Synchronously write everything currently queued."""
+        flushed = 0
+        while True:
+            batch: list[ActivityEvent] = []
+            try:
+                while len(batch) < self.batch_size:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            if not batch:
+                return flushed
+            self._write(batch)
+            flushed += len(batch)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            if time.monotonic() >= self._next_prune:
+                self._next_prune = time.monotonic() + self.prune_interval
+                try:
+                    self.prune()
+                except sqlite3.Error:
+                    log.warning("Pruning activity_log failed.", exc_info=True)
+            try:
+                first = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            batch = self._drain(first)
+            try:
+                self._write(batch)
+            except sqlite3.Error:
+                self.failed_batches += 1
+                log.warning("Dropping %s activity events after a failed write.", len(batch), exc_info=True)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            thread = threading.Thread(target=self._run, name="activity-writer", daemon=True)
+            thread.start()
+            self._thread = thread
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the writer and flush whatever is still queued."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        try:
+            self.flush()
+        except sqlite3.Error:
+            log.warning("Final activity flush failed.", exc_info=True)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+        }
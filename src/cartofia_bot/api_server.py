@@ -2,8 +2,11 @@
 
 from __future__ import annotations
 
+import atexit
 import os
 import json
+import mimetypes
+import re
 import logging
 import sqlite3
 import threading
@@ -14,34 +17,194 @@ import hmac
 from datetime import datetime, timezone
 from functools import wraps
 from pathlib import Path
+from typing import Callable
 from urllib.parse import quote
 
 import requests
-from flask import Flask, g, jsonify, request, send_file
+from requests.adapters import HTTPAdapter
+from flask import Flask, Response, g, jsonify, request, send_file
 from flask_cors import CORS
 from flask_sock import Sock
 from werkzeug.utils import secure_filename
 
 try:
+    from cartofia_bot.activity import ACTIVITY_EVENT_TYPES, ActivityEvent, ActivityWriter
+    from cartofia_bot.archive_store import (
+        StagedUpload,
+        discard_blob,
+        hash_file,
+        stage_upload,
+        store_blob,
+        stream_zip,
+    )
+    from cartofia_bot.badges import (
+        AVATAR_SET,
+        FILE_UPLOADED,
+        PROFILE_CREATED,
+        UNEARNED_BADGE_ENTRIES,
+        emit_profile_event,
+    )
+    from cartofia_bot.caching import SingleFlight, StaleWhileRevalidate, TTLCache
+    from cartofia_bot.live_events import SnapshotBroadcaster
+    from cartofia_bot.migrations import migrate
+    from cartofia_bot.oidc_jwt import JwksCache, JwtVerifier, looks_like_jwt
+    from cartofia_bot.paths import archive_data_dir, archive_db_path
+    from cartofia_bot.presence import PresenceTracker, normalize_page
     from cartofia_bot.proxmox_stats import ProxmoxStats
+    from cartofia_bot.queries import (
+        ARCHIVE_ANCHOR_SQL,
+        ARCHIVE_FILE_BY_ID_SQL,
+        ARCHIVE_FIRST_ID_SINCE_SQL,
+        ARCHIVE_LAST_ID_BEFORE_SQL,
+        ARCHIVE_LIST_SORTS,
+        ARCHIVE_LIST_START,
+        MAX_ROWID,
+        PROFILE_AVATAR_SQL,
+        PROFILE_BADGES_SQL,
+        PROFILE_ROW_SQL,
+        archive_count_sql,
+        archive_files_by_ids_sql,
+        archive_page_sql,
+        profile_batch_badges_sql,
+        profile_batch_rows_sql,
+    )
+    from cartofia_bot import rollups
+    from cartofia_bot.sharding import locate, place
+    from cartofia_bot.stats_history import StatsHistory
+    from cartofia_bot.stats_poller import ALL, CONTAINERS, LIVE, NODE, VMS, StatsPoller, StatsSnapshot
+    from cartofia_bot.storage import SQLitePool
+    from cartofia_bot.upload_sessions import (
+        UploadSessionError,
+        claim_session,
+        collect_expired,
+        create_session,
+        delete_session,
+        get_session,
+        finish_digest,
+        release_session,
+        session_path,
+        session_payload,
+        write_chunk,
+    )
 except ImportError:  # pragma: no cover - fallback for direct script execution
+    from activity import ACTIVITY_EVENT_TYPES, ActivityEvent, ActivityWriter
+    from archive_store import (
+        StagedUpload,
+        discard_blob,
+        hash_file,
+        stage_upload,
+        store_blob,
+        stream_zip,
+    )
+    from badges import (
+        AVATAR_SET,
+        FILE_UPLOADED,
+        PROFILE_CREATED,
+        UNEARNED_BADGE_ENTRIES,
+        emit_profile_event,
+    )
+    from caching import SingleFlight, StaleWhileRevalidate, TTLCache
+    from live_events import SnapshotBroadcaster
+    from migrations import migrate
+    from oidc_jwt import JwksCache, JwtVerifier, looks_like_jwt
+    from paths import archive_data_dir, archive_db_path
+    from presence import PresenceTracker, normalize_page
     from proxmox_stats import ProxmoxStats
+    from queries import (
+        ARCHIVE_ANCHOR_SQL,
+        ARCHIVE_FILE_BY_ID_SQL,
+        ARCHIVE_FIRST_ID_SINCE_SQL,
+        ARCHIVE_LAST_ID_BEFORE_SQL,
+        ARCHIVE_LIST_SORTS,
+        ARCHIVE_LIST_START,
+        MAX_ROWID,
+        PROFILE_AVATAR_SQL,
+        PROFILE_BADGES_SQL,
+        PROFILE_ROW_SQL,
+        archive_count_sql,
+        archive_files_by_ids_sql,
+        archive_page_sql,
+        profile_batch_badges_sql,
+        profile_batch_rows_sql,
+    )
+    import rollups
+    from sharding import locate, place
+    from stats_history import StatsHistory
+    from stats_poller import ALL, CONTAINERS, LIVE, NODE, VMS, StatsPoller, StatsSnapshot
+    from storage import SQLitePool
+    from upload_sessions import (
+        UploadSessionError,
+        claim_session,
+        collect_expired,
+        create_session,
+        delete_session,
+        get_session,
+        finish_digest,
+        release_session,
+        session_path,
+        session_payload,
+        write_chunk,
+    )
 
-ROOT_DIR = Path(__file__).resolve().parents[2]
-ARCHIVE_DATA_DIR = Path(
-    os.getenv("ARCHIVE_DATA_DIR", str(ROOT_DIR / "archive_data"))
-).resolve()
-ARCHIVE_DB_PATH = Path(
-    os.getenv("ARCHIVE_DB_PATH", str(ARCHIVE_DATA_DIR / "archive.db"))
-).resolve()
+ARCHIVE_DATA_DIR = archive_data_dir()
+ARCHIVE_DB_PATH = archive_db_path()
+ARCHIVE_DB_POOL_SIZE = max(1, int(os.getenv("ARCHIVE_DB_POOL_SIZE", "8")))
+ARCHIVE_DB_CACHE_KIB = max(0, int(os.getenv("ARCHIVE_DB_CACHE_KIB", "16384")))
+ARCHIVE_DB_MMAP_MB = max(0, int(os.getenv("ARCHIVE_DB_MMAP_MB", "128")))
+ARCHIVE_DB_BUSY_TIMEOUT_MS = max(0, int(os.getenv("ARCHIVE_DB_BUSY_TIMEOUT_MS", "5000")))
 ARCHIVE_FILES_DIR = (ARCHIVE_DATA_DIR / "files").resolve()
+ARCHIVE_STAGING_DIR = (ARCHIVE_DATA_DIR / "incoming").resolve()
 PROFILE_DATA_DIR = (ARCHIVE_DATA_DIR / "profiles").resolve()
 PROFILE_AVATAR_DIR = (PROFILE_DATA_DIR / "avatars").resolve()
 MAX_UPLOAD_MB = int(os.getenv("ARCHIVE_MAX_UPLOAD_MB", "50"))
+# "" streams downloads from Python; "x-accel-redirect" (nginx) or "x-sendfile"
+# (Apache/lighttpd) hand the bytes to the front proxy after authorization.
+ARCHIVE_SENDFILE_MODE = os.getenv("ARCHIVE_SENDFILE_MODE", "").strip().lower()
+ARCHIVE_ACCEL_REDIRECT_PREFIX = "/" + os.getenv(
+    "ARCHIVE_ACCEL_REDIRECT_PREFIX", "/_archive_files/"
+).strip().strip("/") + "/"
+ARCHIVE_MAX_SESSION_UPLOAD_MB = max(1, int(os.getenv("ARCHIVE_MAX_SESSION_UPLOAD_MB", "4096")))
+ARCHIVE_UPLOAD_CHUNK_MB = max(1, min(MAX_UPLOAD_MB, int(os.getenv("ARCHIVE_UPLOAD_CHUNK_MB", "8"))))
+ARCHIVE_UPLOAD_SESSION_TTL = max(60.0, float(os.getenv("ARCHIVE_UPLOAD_SESSION_TTL_HOURS", "24")) * 3600)
+ARCHIVE_UPLOAD_SESSION_GC_SECONDS = 300.0
+ARCHIVE_UPLOAD_MAX_SESSIONS_PER_USER = max(
+    1, int(os.getenv("ARCHIVE_UPLOAD_MAX_SESSIONS_PER_USER", "4"))
+)
+ARCHIVE_EXPORT_MAX_FILES = max(1, int(os.getenv("ARCHIVE_EXPORT_MAX_FILES", "200")))
+ARCHIVE_PAGE_DEFAULT_LIMIT = max(1, int(os.getenv("ARCHIVE_PAGE_DEFAULT_LIMIT", "50")))
+ARCHIVE_PAGE_MAX_LIMIT = max(
+    ARCHIVE_PAGE_DEFAULT_LIMIT, int(os.getenv("ARCHIVE_PAGE_MAX_LIMIT", "200"))
+)
+ARCHIVE_COUNT_CACHE_TTL = max(0.0, float(os.getenv("ARCHIVE_COUNT_CACHE_TTL", "30")))
 MAX_PROFILE_AVATAR_MB = max(1, int(os.getenv("PROFILE_AVATAR_MAX_MB", "4")))
 MAX_PROFILE_AVATAR_BYTES = MAX_PROFILE_AVATAR_MB * 1024 * 1024
 PROFILE_USERNAME_MAX_LENGTH = 128
 PROFILE_DISPLAY_NAME_MAX_LENGTH = 40
+PRESENCE_WINDOW_SECONDS = max(30.0, float(os.getenv("PRESENCE_WINDOW_SECONDS", "150")))
+PRESENCE_MAX_VISITORS = max(100, int(os.getenv("PRESENCE_MAX_VISITORS", "50000")))
+PRESENCE_FLUSH_SECONDS = max(5.0, float(os.getenv("PRESENCE_FLUSH_SECONDS", "60")))
+PRESENCE_HISTORY_DAYS = max(1, int(os.getenv("PRESENCE_HISTORY_DAYS", "7")))
+ACTIVITY_QUEUE_SIZE = max(1, int(os.getenv("ACTIVITY_QUEUE_SIZE", "10000")))
+ACTIVITY_BATCH_SIZE = max(1, int(os.getenv("ACTIVITY_BATCH_SIZE", "500")))
+ACTIVITY_FLUSH_SECONDS = max(0.0, float(os.getenv("ACTIVITY_FLUSH_SECONDS", "0.5")))
+ACTIVITY_RETENTION_DAYS = max(1, int(os.getenv("ACTIVITY_RETENTION_DAYS", "90")))
+ACTIVITY_METADATA_MAX_BYTES = 2048
+# Every open stream pins one server thread for its lifetime, so keep this
+# well below the worker's thread budget (see .env.example).
+SSE_MAX_SUBSCRIBERS = max(1, int(os.getenv("SSE_MAX_SUBSCRIBERS", "32")))
+SSE_KEEPALIVE_SECONDS = max(5.0, float(os.getenv("SSE_KEEPALIVE_SECONDS", "20")))
+SSE_ONLINE_INTERVAL = max(1.0, float(os.getenv("SSE_ONLINE_INTERVAL", "5")))
+SSE_FEED_INTERVAL = max(1.0, float(os.getenv("SSE_FEED_INTERVAL", "10")))
+SSE_STATS_INTERVAL = max(5.0, float(os.getenv("SSE_STATS_INTERVAL", "15")))
+STATS_POLL_INTERVAL = max(2.0, float(os.getenv("STATS_POLL_INTERVAL", "15")))
+STATS_WARM_TIMEOUT = max(0.0, float(os.getenv("STATS_WARM_TIMEOUT", "5")))
+STATS_HISTORY_PATH = Path(
+    os.getenv("STATS_HISTORY_PATH", str(ARCHIVE_DATA_DIR / "stats_history.bin"))
+).resolve()
+STATS_HISTORY_RANGES = {"1h": 3600, "6h": 6 * 3600, "24h": 86400, "7d": 7 * 86400, "30d": 30 * 86400}
+PROFILE_PAYLOAD_CACHE_SIZE = max(1, int(os.getenv("PROFILE_PAYLOAD_CACHE_SIZE", "1024")))
+PROFILE_PAYLOAD_CACHE_TTL = max(0.0, float(os.getenv("PROFILE_PAYLOAD_CACHE_TTL", "300")))
+PROFILE_BATCH_MAX_USERNAMES = max(1, min(500, int(os.getenv("PROFILE_BATCH_MAX_USERNAMES", "100"))))
 
 # OIDC / Authentik configuration
 OIDC_USERINFO_URL = os.getenv("OIDC_USERINFO_URL")
@@ -59,6 +222,31 @@ OIDC_UPLOAD_GROUPS = [
     ).split(",")
     if grp.strip()
 ]
+# Token verification: "userinfo" asks Authentik on every cache miss, "jwt"
+# verifies signed access tokens locally against OIDC_JWKS_URL, and "auto"
+# verifies JWTs locally while still sending opaque tokens to userinfo.
+OIDC_VERIFY_MODE = os.getenv("OIDC_VERIFY_MODE", "userinfo").strip().lower()
+OIDC_JWKS_URL = os.getenv("OIDC_JWKS_URL", "").strip()
+OIDC_ISSUER = os.getenv("OIDC_ISSUER", "").strip()
+OIDC_AUDIENCE = [
+    aud.strip() for aud in os.getenv("OIDC_AUDIENCE", "").split(",") if aud.strip()
+]
+OIDC_JWT_ALGORITHMS = [
+    alg.strip()
+    for alg in os.getenv("OIDC_JWT_ALGORITHMS", "RS256,ES256").split(",")
+    if alg.strip()
+]
+OIDC_JWT_LEEWAY = max(0.0, float(os.getenv("OIDC_JWT_LEEWAY", "30")))
+OIDC_JWKS_REFRESH_SECONDS = max(10.0, float(os.getenv("OIDC_JWKS_REFRESH_SECONDS", "3600")))
+
+# Validated token claims are cached per process, keyed by a hash of the token.
+OIDC_CLAIMS_CACHE_TTL = max(0.0, float(os.getenv("OIDC_CLAIMS_CACHE_TTL", "60")))
+OIDC_CLAIMS_CACHE_NEGATIVE_TTL = max(
+    0.0, float(os.getenv("OIDC_CLAIMS_CACHE_NEGATIVE_TTL", "10"))
+)
+OIDC_CLAIMS_CACHE_SIZE = max(1, int(os.getenv("OIDC_CLAIMS_CACHE_SIZE", "2048")))
+OIDC_HTTP_POOL_SIZE = max(1, int(os.getenv("OIDC_HTTP_POOL_SIZE", "16")))
+OIDC_USERINFO_TIMEOUT = max(1.0, float(os.getenv("OIDC_USERINFO_TIMEOUT", "10")))
 ARCHIVE_ACCESS_GROUPS = list(OIDC_REQUIRED_GROUPS)
 ARCHIVE_UPLOAD_GROUPS = list(OIDC_UPLOAD_GROUPS)
 
@@ -67,6 +255,13 @@ log = logging.getLogger(__name__)
 app = Flask(__name__)
 app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_MB * 1024 * 1024
 app.config["SECRET_KEY"] = os.getenv("API_SECRET_KEY", "dev-unsafe-change-me")
+if ARCHIVE_SENDFILE_MODE == "x-sendfile":
+    app.config["USE_X_SENDFILE"] = True
+elif ARCHIVE_SENDFILE_MODE not in ("", "x-accel-redirect"):
+    log.warning(
+        "Unknown ARCHIVE_SENDFILE_MODE=%r; serving downloads from Python.", ARCHIVE_SENDFILE_MODE
+    )
+    ARCHIVE_SENDFILE_MODE = ""
 if app.config["SECRET_KEY"] == "dev-unsafe-change-me":
     log.warning(
         "API_SECRET_KEY is not set; using an unsafe default. Set API_SECRET_KEY in production."
@@ -84,25 +279,6 @@ else:
     # Same-origin requests do not need CORS; explicit origins can be configured via env.
     log.info("API_ALLOWED_ORIGINS is empty; CORS is disabled for cross-origin requests.")
 
-PROFILE_BADGE_CATALOG: dict[str, dict[str, str]] = {
-    "first_login": {
-        "name": "Welcome",
-        "description": "Signed in to Cartofia.",
-    },
-    "archive_uploader": {
-        "name": "Archivist",
-        "description": "Uploaded your first file to the archive.",
-    },
-    "archive_veteran": {
-        "name": "Vault Keeper",
-        "description": "Uploaded 10 files to the archive.",
-    },
-    "avatar_ready": {
-        "name": "Face of Cartofia",
-        "description": "Added a profile picture.",
-    },
-}
-
 ROOM_CODE_LENGTH = 6
 PLAYER_NAME_MAX_LENGTH = 16
 
@@ -149,63 +325,95 @@ ws_rooms_by_game: dict[str, dict[str, dict[str, object]]] = {
     game_key: {} for game_key in WS_GAME_CONFIG.keys()
 }
 
+# Shared SQLite connections (WAL mode, tuned PRAGMAs, warm statement caches).
+db_pool = SQLitePool(
+    ARCHIVE_DB_PATH,
+    max_idle=ARCHIVE_DB_POOL_SIZE,
+    cache_size_kib=ARCHIVE_DB_CACHE_KIB,
+    mmap_size=ARCHIVE_DB_MMAP_MB * 1024 * 1024,
+    busy_timeout_ms=ARCHIVE_DB_BUSY_TIMEOUT_MS,
+)
+
+# Archive listing totals per filter; cleared on upload, TTL bounds staleness
+# across worker processes.
+archive_count_cache = TTLCache(256, ARCHIVE_COUNT_CACHE_TTL)
+
+# Serialized profile payloads keyed by (username, include_email). Entries
+# carry the ETag they were built for, so a stale entry is simply rebuilt.
+profile_payload_cache = TTLCache(PROFILE_PAYLOAD_CACHE_SIZE, PROFILE_PAYLOAD_CACHE_TTL)
+
+# Live visitor counts from /api/heartbeat, snapshotted to SQLite periodically.
+presence = PresenceTracker(
+    db_pool.connection,
+    window_seconds=PRESENCE_WINDOW_SECONDS,
+    max_visitors=PRESENCE_MAX_VISITORS,
+    flush_interval=PRESENCE_FLUSH_SECONDS,
+    history_retention_days=PRESENCE_HISTORY_DAYS,
+)
+atexit.register(presence.stop)
+
+# Game events are queued by request handlers and batch-inserted by one writer.
+activity_writer = ActivityWriter(
+    db_pool.connection,
+    max_queue=ACTIVITY_QUEUE_SIZE,
+    batch_size=ACTIVITY_BATCH_SIZE,
+    flush_interval=ACTIVITY_FLUSH_SECONDS,
+    retention_days=ACTIVITY_RETENTION_DAYS,
+)
+atexit.register(activity_writer.stop)
+
 # Initialize Proxmox stats fetcher
 proxmox = ProxmoxStats()
 
+# Shared keep-alive session and claims cache for OIDC userinfo lookups.
+oidc_session = requests.Session()
+oidc_session.mount(
+    "https://",
+    HTTPAdapter(pool_connections=1, pool_maxsize=OIDC_HTTP_POOL_SIZE),
+)
+oidc_session.mount(
+    "http://",
+    HTTPAdapter(pool_connections=1, pool_maxsize=OIDC_HTTP_POOL_SIZE),
+)
+oidc_claims_cache = TTLCache(OIDC_CLAIMS_CACHE_SIZE, OIDC_CLAIMS_CACHE_TTL)
+# Concurrent validations of the same token share one userinfo request.
+oidc_userinfo_flight = SingleFlight()
+
+oidc_jwt_verifier: JwtVerifier | None = None
+if OIDC_VERIFY_MODE in ("jwt", "auto"):
+    if OIDC_JWKS_URL:
+        oidc_jwt_verifier = JwtVerifier(
+            JwksCache(
+                OIDC_JWKS_URL,
+                refresh_interval=OIDC_JWKS_REFRESH_SECONDS,
+                session=oidc_session,
+            ),
+            issuer=OIDC_ISSUER,
+            audiences=OIDC_AUDIENCE,
+            algorithms=OIDC_JWT_ALGORITHMS,
+            leeway=OIDC_JWT_LEEWAY,
+        )
+    else:
+        log.warning(
+            "OIDC_VERIFY_MODE=%s requires OIDC_JWKS_URL; falling back to userinfo.",
+            OIDC_VERIFY_MODE,
+        )
+
 
 def init_storage() -> None:
-    """Create folders and database tables for archive and profile data."""
+    """Create folders and bring the archive/profile database schema up to date."""
     ARCHIVE_FILES_DIR.mkdir(parents=True, exist_ok=True)
+    ARCHIVE_STAGING_DIR.mkdir(parents=True, exist_ok=True)
     PROFILE_AVATAR_DIR.mkdir(parents=True, exist_ok=True)
     ARCHIVE_DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(ARCHIVE_DB_PATH)
-    conn.row_factory = sqlite3.Row
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS archive_files (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            original_name TEXT NOT NULL,
-            stored_name TEXT NOT NULL UNIQUE,
-            size_bytes INTEGER NOT NULL,
-            uploaded_by TEXT NOT NULL,
-            uploaded_at TEXT NOT NULL
-        )
-        """
-    )
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS user_profiles (
-            username TEXT PRIMARY KEY,
-            email TEXT NOT NULL DEFAULT '',
-            display_name TEXT NOT NULL DEFAULT '',
-            picture_filename TEXT NOT NULL DEFAULT '',
-            picture_updated_at TEXT NOT NULL DEFAULT '',
-            created_at TEXT NOT NULL,
-            updated_at TEXT NOT NULL
-        )
-        """
-    )
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS user_badges (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT NOT NULL,
-            badge_key TEXT NOT NULL,
-            source TEXT NOT NULL DEFAULT 'auto',
-            awarded_at TEXT NOT NULL,
-            UNIQUE(username, badge_key)
-        )
-        """
-    )
-    conn.commit()
-    conn.close()
+    with db_pool.connection() as conn:
+        migrate(conn)
 
 
 def get_db() -> sqlite3.Connection:
-    """Get a per-request SQLite connection."""
+    """Borrow a pooled SQLite connection for the current request."""
     if "db" not in g:
-        g.db = sqlite3.connect(ARCHIVE_DB_PATH)
-        g.db.row_factory = sqlite3.Row
+        g.db = db_pool.acquire()
     return g.db
 
 
@@ -213,7 +421,7 @@ def get_db() -> sqlite3.Connection:
 def close_db(_error: Exception | None) -> None:
     db = g.pop("db", None)
     if db is not None:
-        db.close()
+        db_pool.release(db)
 
 
 def _utc_now_iso() -> str:
@@ -244,14 +452,7 @@ def _profile_avatar_url(username: str, picture_filename: str, picture_updated_at
 
 
 def _fetch_profile_row(db: sqlite3.Connection, username: str) -> sqlite3.Row | None:
-    return db.execute(
-        """
-        SELECT username, email, display_name, picture_filename, picture_updated_at, created_at, updated_at
-        FROM user_profiles
-        WHERE username = ?
-        """,
-        (username,),
-    ).fetchone()
+    return db.execute(PROFILE_ROW_SQL, (username,)).fetchone()
 
 
 def _ensure_profile_row(db: sqlite3.Connection, username: str, email: str = "") -> sqlite3.Row:
@@ -268,6 +469,8 @@ def _ensure_profile_row(db: sqlite3.Connection, username: str, email: str = "")
             """,
             (clean_username, str(email or "").strip(), clean_username, now, now),
         )
+        rollups.bump(db, rollups.NEW_PROFILES, now)
+        emit_profile_event(db, clean_username, PROFILE_CREATED)
     else:
         changed = False
         new_email = str(email or "").strip()
@@ -297,90 +500,28 @@ def _ensure_profile_row(db: sqlite3.Connection, username: str, email: str = "")
     return _fetch_profile_row(db, clean_username)
 
 
-def _archive_upload_count(db: sqlite3.Connection, username: str) -> int:
-    row = db.execute(
-        """
-        SELECT COUNT(*) AS count
-        FROM archive_files
-        WHERE uploaded_by = ?
-        """,
-        (username,),
-    ).fetchone()
-    if row is None:
-        return 0
-    return int(row["count"] or 0)
-
-
-def _award_badge(
-    db: sqlite3.Connection,
-    username: str,
-    badge_key: str,
-    source: str = "auto",
-) -> bool:
-    if badge_key not in PROFILE_BADGE_CATALOG:
-        return False
-    now = _utc_now_iso()
-    cursor = db.execute(
-        """
-        INSERT OR IGNORE INTO user_badges (username, badge_key, source, awarded_at)
-        VALUES (?, ?, ?, ?)
-        """,
-        (username, badge_key, source, now),
-    )
-    return cursor.rowcount > 0
-
-
-def _sync_profile_badges(db: sqlite3.Connection, username: str) -> bool:
-    clean_username = _clean_profile_username(username)
-    row = _fetch_profile_row(db, clean_username)
-    if row is None:
-        return False
-
-    changed = False
-    changed = _award_badge(db, clean_username, "first_login") or changed
-
-    upload_count = _archive_upload_count(db, clean_username)
-    if upload_count >= 1:
-        changed = _award_badge(db, clean_username, "archive_uploader") or changed
-    if upload_count >= 10:
-        changed = _award_badge(db, clean_username, "archive_veteran") or changed
-
-    if row["picture_filename"]:
-        changed = _award_badge(db, clean_username, "avatar_ready") or changed
-
-    return changed
-
-
 def _profile_badge_payload(
     db: sqlite3.Connection,
     username: str,
 ) -> tuple[list[dict[str, object]], list[dict[str, object]]]:
-    rows = db.execute(
-        """
-        SELECT badge_key, source, awarded_at
-        FROM user_badges
-        WHERE username = ?
-        ORDER BY awarded_at ASC
-        """,
-        (username,),
-    ).fetchall()
+    rows = db.execute(PROFILE_BADGES_SQL, (username,)).fetchall()
     by_key: dict[str, sqlite3.Row] = {str(row["badge_key"]): row for row in rows}
 
     catalog: list[dict[str, object]] = []
     earned: list[dict[str, object]] = []
-    for badge_key, meta in PROFILE_BADGE_CATALOG.items():
+    for badge_key, unearned_entry in UNEARNED_BADGE_ENTRIES.items():
         award = by_key.get(badge_key)
-        entry = {
-            "key": badge_key,
-            "name": meta["name"],
-            "description": meta["description"],
-            "earned": bool(award),
-            "awarded_at": award["awarded_at"] if award else None,
-            "source": award["source"] if award else None,
-        }
+        if award is None:
+            catalog.append(unearned_entry)
+            continue
+        entry = dict(
+            unearned_entry,
+            earned=True,
+            awarded_at=award["awarded_at"],
+            source=award["source"],
+        )
         catalog.append(entry)
-        if award:
-            earned.append(entry)
+        earned.append(entry)
     return catalog, earned
 
 
@@ -402,8 +543,9 @@ def _profile_payload(
         "created_at": row["created_at"],
         "updated_at": row["updated_at"],
         "stats": {
-            "upload_count": _archive_upload_count(db, username),
-            "badge_count": len(earned_badges),
+            "upload_count": int(row["upload_count"] or 0),
+            "upload_bytes": int(row["upload_bytes"] or 0),
+            "badge_count": int(row["badge_count"] or 0),
         },
         "badges": earned_badges,
         "badge_catalog": badge_catalog,
@@ -413,36 +555,146 @@ def _profile_payload(
     return payload
 
 
-def _resolve_oidc_user() -> dict | None:
-    """Validate the OIDC token against Authentik and cache the result on g."""
-    if hasattr(g, "user"):
-        return g.user
+def _profile_etag(row: sqlite3.Row, include_email: bool) -> str:
+    """Strong validator over every row field the profile payload depends on."""
+    parts = [
+        str(row["username"]),
+        str(row["updated_at"] or ""),
+        str(row["picture_updated_at"] or ""),
+        str(int(row["badge_count"] or 0)),
+        str(int(row["upload_count"] or 0)),
+        str(int(row["upload_bytes"] or 0)),
+        "me" if include_email else "public",
+    ]
+    if include_email:
+        parts.append(str(row["email"] or ""))
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()[:32]
 
-    if not OIDC_USERINFO_URL:
-        g.user = None
-        return None
 
-    token = None
+def _invalidate_profile_payloads(username: str) -> None:
+    profile_payload_cache.delete((username, True))
+    profile_payload_cache.delete((username, False))
+
+
+def _profile_response(db: sqlite3.Connection, row: sqlite3.Row, include_email: bool) -> Response:
+    """Serve a profile payload, answering ``If-None-Match`` without building it."""
+    username = str(row["username"])
+    etag = _profile_etag(row, include_email)
+    if request.method == "GET" and etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        cache_key = (username, include_email)
+        cached = profile_payload_cache.get(cache_key, None)
+        if cached is not None and cached[0] == etag:
+            body = cached[1]
+        else:
+            payload = _profile_payload(db, row, include_email=include_email)
+            payload["is_me"] = include_email
+            body = app.json.dumps(payload).encode("utf-8")
+            profile_payload_cache.set(cache_key, (etag, body))
+        response = Response(body, status=200, mimetype=app.json.mimetype)
+    response.set_etag(etag)
+    # Profiles are per-viewer (email, is_me): allow browser caching but
+    # always revalidate.
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def _request_bearer_token() -> str | None:
     auth_header = request.headers.get("Authorization", "")
     if auth_header.startswith("Bearer "):
-        token = auth_header[7:]
-    if not token:
-        token = request.cookies.get("access_token")
-    if not token:
-        g.user = None
-        return None
+        token = auth_header[7:].strip()
+        if token:
+            return token
+    return request.cookies.get("access_token") or None
+
+
+def _token_cache_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
 
+
+def _query_userinfo(token: str, cache_key: str) -> dict | None:
     try:
-        resp = requests.get(
+        return oidc_claims_cache.get(cache_key)
+    except KeyError:
+        pass
+
+    try:
+        resp = oidc_session.get(
             OIDC_USERINFO_URL,
             headers={"Authorization": f"Bearer {token}"},
-            timeout=10,
+            timeout=OIDC_USERINFO_TIMEOUT,
         )
+        if resp.status_code in (401, 403):
+            oidc_claims_cache.set(cache_key, None, ttl=OIDC_CLAIMS_CACHE_NEGATIVE_TTL)
+            return None
         if resp.status_code != 200:
-            g.user = None
             return None
         claims = resp.json()
     except (requests.RequestException, ValueError):
+        # Transient upstream failures are not cached.
+        return None
+    if not isinstance(claims, dict):
+        return None
+
+    oidc_claims_cache.set(cache_key, claims)
+    return claims
+
+
+def _fetch_userinfo_claims(token: str) -> dict | None:
+    """Call the userinfo endpoint, caching accepted and rejected tokens."""
+    cache_key = _token_cache_key(token)
+    try:
+        return oidc_claims_cache.get(cache_key)
+    except KeyError:
+        pass
+
+    try:
+        return oidc_userinfo_flight.do(
+            cache_key,
+            lambda: _query_userinfo(token, cache_key),
+            timeout=OIDC_USERINFO_TIMEOUT + 1,
+        )
+    except TimeoutError:
+        log.warning("Timed out waiting for a shared userinfo lookup.")
+        return None
+
+
+def _verify_token_claims(token: str) -> dict | None:
+    """Resolve claims locally for JWTs when configured, else via userinfo.
+
+    In "auto" mode a JWT that fails local verification (unknown kid, other
+    issuer or audience, ...) is still offered to userinfo, which has the
+    final say; only "jwt" mode rejects it outright.
+    """
+    if oidc_jwt_verifier is not None:
+        if OIDC_VERIFY_MODE == "jwt":
+            return oidc_jwt_verifier.verify(token)
+        if looks_like_jwt(token):
+            claims = oidc_jwt_verifier.verify(token)
+            if claims is not None:
+                return claims
+    if not OIDC_USERINFO_URL:
+        return None
+    return _fetch_userinfo_claims(token)
+
+
+def _resolve_oidc_user() -> dict | None:
+    """Validate the OIDC token against Authentik and cache the result on g."""
+    if hasattr(g, "user"):
+        return g.user
+
+    if not OIDC_USERINFO_URL and oidc_jwt_verifier is None:
+        g.user = None
+        return None
+
+    token = _request_bearer_token()
+    if not token:
+        g.user = None
+        return None
+
+    claims = _verify_token_claims(token)
+    if claims is None:
         g.user = None
         return None
 
@@ -521,28 +773,195 @@ def login_required(handler):
     return wrapped
 
 
+def _archive_row_payload(row: sqlite3.Row) -> dict[str, object]:
+    return {
+        "id": row["id"],
+        "name": row["original_name"],
+        "size_bytes": row["size_bytes"],
+        "sha256": row["sha256"] or None,
+        "uploaded_at": row["uploaded_at"],
+        "uploaded_by": row["uploaded_by"],
+    }
+
+
+def _archive_total_count(db: sqlite3.Connection, params: dict[str, object]) -> int:
+    cache_key = tuple(sorted(params.items()))
+    cached = archive_count_cache.get(cache_key, None)
+    if cached is not None:
+        return cached
+    row = db.execute(archive_count_sql("uploader" in params), params).fetchone()
+    total = int(row["n"] or 0) if row else 0
+    archive_count_cache.set(cache_key, total)
+    return total
+
+
+def _parse_utc_bound(raw: str) -> str | None:
+    """Normalize an ISO-8601 date/time to the stored ``uploaded_at`` format; None if invalid."""
+    try:
+        value = datetime.fromisoformat(raw)
+    except ValueError:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+
+def _archive_id_range(
+    db: sqlite3.Connection, since: str | None, until: str | None
+) -> tuple[int, int] | None:
+    """Translate ``uploaded_at`` bounds into an inclusive id range (None: no rows).
+
+    Rows get their id and ``uploaded_at`` in the same insert, so ids follow
+    upload time; one indexed lookup per bound lets every page keep paging on
+    the id-based indexes.
+    """
+    low, high = 0, MAX_ROWID
+    if since is not None:
+        row = db.execute(ARCHIVE_FIRST_ID_SINCE_SQL, (since,)).fetchone()
+        if row is None:
+            return None
+        low = int(row["id"])
+    if until is not None:
+        row = db.execute(ARCHIVE_LAST_ID_BEFORE_SQL, (until,)).fetchone()
+        if row is None:
+            return None
+        high = int(row["id"])
+    return (low, high) if low <= high else None
+
+
 @app.route("/api/archive/files", methods=["GET"])
 @archive_access_required
 def list_archive_files():
-    """Return list of files in the archive."""
-    rows = get_db().execute(
-        """
-        SELECT id, original_name, size_bytes, uploaded_at, uploaded_by
-        FROM archive_files
-        ORDER BY id DESC
-        """
-    ).fetchall()
-    files = [
+    """Return one keyset-paginated page of archive files.
+
+    Query parameters: ``limit``, ``after_id`` (the last id of the previous
+    page), ``sort`` (newest/oldest/largest/smallest), ``uploader``, and
+    ``since``/``until`` bounds on ``uploaded_at`` (ISO-8601, UTC if no offset).
+    """
+    sort = request.args.get("sort", "newest").strip().lower()
+    if sort not in ARCHIVE_LIST_SORTS:
+        return jsonify({"error": f"Unknown sort. Use one of: {', '.join(ARCHIVE_LIST_SORTS)}."}), 400
+    limit = request.args.get("limit", type=int) or ARCHIVE_PAGE_DEFAULT_LIMIT
+    limit = max(1, min(limit, ARCHIVE_PAGE_MAX_LIMIT))
+    after_id = request.args.get("after_id", type=int)
+
+    bounds: dict[str, str | None] = {}
+    for name in ("since", "until"):
+        raw = request.args.get(name, "").strip()
+        bounds[name] = _parse_utc_bound(raw) if raw else None
+        if raw and bounds[name] is None:
+            return jsonify({"error": f"{name} must be an ISO-8601 date or date-time."}), 400
+
+    db = get_db()
+    id_range = _archive_id_range(db, bounds["since"], bounds["until"])
+    if id_range is None:
+        return jsonify(
+            {
+                "files": [],
+                "count": 0,
+                "total": 0,
+                "has_more": False,
+                "next_after_id": None,
+                "sort": sort,
+                "username": g.user["username"],
+            }
+        ), 200
+
+    params: dict[str, object] = {"min_id": id_range[0], "max_id": id_range[1]}
+    uploader = _clean_profile_username(request.args.get("uploader", ""))
+    if uploader:
+        params["uploader"] = uploader
+
+    anchor_size, anchor_id = ARCHIVE_LIST_START[sort]
+    if after_id is not None:
+        anchor = db.execute(ARCHIVE_ANCHOR_SQL, (after_id,)).fetchone()
+        if anchor is None:
+            return jsonify({"error": "Unknown after_id cursor."}), 400
+        anchor_size, anchor_id = anchor["size_bytes"], anchor["id"]
+    page_params = dict(params, anchor_size=anchor_size, anchor_id=anchor_id, limit=limit + 1)
+
+    rows = db.execute(archive_page_sql(sort, bool(uploader)), page_params).fetchall()
+    has_more = len(rows) > limit
+    files = [_archive_row_payload(row) for row in rows[:limit]]
+    return jsonify(
         {
-            "id": row["id"],
-            "name": row["original_name"],
-            "size_bytes": row["size_bytes"],
-            "uploaded_at": row["uploaded_at"],
-            "uploaded_by": row["uploaded_by"],
+            "files": files,
+            "count": len(files),
+            "total": _archive_total_count(db, params),
+            "has_more": has_more,
+            "next_after_id": files[-1]["id"] if has_more else None,
+            "sort": sort,
+            "username": g.user["username"],
         }
-        for row in rows
-    ]
-    return jsonify({"files": files, "count": len(files), "username": g.user["username"]}), 200
+    ), 200
+
+
+def _record_archive_upload(
+    db: sqlite3.Connection,
+    staged: StagedUpload,
+    original_name: str,
+    before_commit: Callable[[sqlite3.Connection], None] | None = None,
+) -> dict[str, object]:
+    """Store a staged upload and add its archive_files row in one transaction.
+
+    Consumes ``staged``. ``before_commit`` runs inside the same transaction.
+    """
+    username = g.user["username"]
+    size_bytes = staged.size_bytes
+    now = datetime.now(timezone.utc).isoformat()
+    try:
+        _ensure_profile_row(db, username, g.user.get("email", ""))
+        db.execute("BEGIN IMMEDIATE")
+    except BaseException:
+        staged.path.unlink(missing_ok=True)
+        raise
+    blob = None
+    try:
+        blob = store_blob(db, staged, ARCHIVE_FILES_DIR)
+        cursor = db.execute(
+            """
+            INSERT INTO archive_files (original_name, stored_name, sha256, size_bytes, uploaded_by, uploaded_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (original_name, blob.stored_name, blob.sha256, size_bytes, username, now),
+        )
+        db.execute(
+            """
+            UPDATE user_profiles
+            SET upload_count = upload_count + 1, upload_bytes = upload_bytes + ?
+            WHERE username = ?
+            """,
+            (size_bytes, username),
+        )
+        rollups.bump_many(
+            db,
+            [
+                (rollups.UPLOADS, now, "", 1),
+                (rollups.UPLOADS, now, username, 1),
+                (rollups.UPLOAD_BYTES, now, "", size_bytes),
+            ],
+        )
+        emit_profile_event(db, username, FILE_UPLOADED)
+        if before_commit is not None:
+            before_commit(db)
+        db.commit()
+    except BaseException:
+        db.rollback()
+        if blob is not None:
+            discard_blob(blob, ARCHIVE_FILES_DIR)
+        staged.path.unlink(missing_ok=True)
+        raise
+    archive_count_cache.clear()
+    _invalidate_profile_payloads(username)
+    return {
+        "id": cursor.lastrowid,
+        "name": original_name,
+        "size_bytes": size_bytes,
+        "sha256": blob.sha256,
+        "deduplicated": blob.deduplicated,
+        "uploaded_at": now,
+        "uploaded_by": username,
+    }
 
 
 @app.route("/api/archive/upload", methods=["POST"])
@@ -562,64 +981,315 @@ def upload_archive_file():
     if not original_name:
         return jsonify({"error": "Invalid filename."}), 400
 
-    stored_name = f"{uuid.uuid4().hex}_{original_name}"
-    output_path = (ARCHIVE_FILES_DIR / stored_name).resolve()
-    if output_path.parent != ARCHIVE_FILES_DIR:
-        return jsonify({"error": "Invalid destination path."}), 400
+    # Hash while copying to a staging file on the same filesystem, so the
+    # final move into the content-addressed store is an atomic rename.
+    staged = stage_upload(incoming_file.stream, ARCHIVE_STAGING_DIR)
+    return jsonify(_record_archive_upload(get_db(), staged, original_name)), 201
 
-    incoming_file.save(output_path)
-    size_bytes = output_path.stat().st_size
 
-    now = datetime.now(timezone.utc).isoformat()
+_upload_session_gc_lock = threading.Lock()
+_upload_session_next_gc = 0.0
+
+
+def _collect_expired_upload_sessions(db: sqlite3.Connection) -> None:
+    """Garbage-collect expired sessions at most once per GC interval per worker."""
+    global _upload_session_next_gc
+    now = time.monotonic()
+    with _upload_session_gc_lock:
+        if now < _upload_session_next_gc:
+            return
+        _upload_session_next_gc = now + ARCHIVE_UPLOAD_SESSION_GC_SECONDS
+    removed = collect_expired(db, ARCHIVE_STAGING_DIR)
+    if removed:
+        log.info("Removed %s expired archive upload sessions.", removed)
+
+
+def _upload_session_error(exc: UploadSessionError):
+    return jsonify({"error": str(exc)}), exc.status
+
+
+@app.route("/api/archive/uploads", methods=["POST"])
+@archive_access_required
+def create_archive_upload_session():
+    """Start a resumable upload. Body: ``{"name": str, "size_bytes": int}``."""
+    if not _has_archive_upload_access(g.user):
+        return _archive_not_found_response()
+    data = request.get_json(silent=True) or {}
+    original_name = secure_filename(str(data.get("name", "")).strip())
+    if not original_name:
+        return jsonify({"error": "Invalid filename."}), 400
+    try:
+        size_bytes = int(data.get("size_bytes"))
+    except (TypeError, ValueError):
+        return jsonify({"error": "size_bytes must be an integer."}), 400
+    if size_bytes < 0 or size_bytes > ARCHIVE_MAX_SESSION_UPLOAD_MB * 1024 * 1024:
+        return (
+            jsonify({"error": f"File is too large. Max size is {ARCHIVE_MAX_SESSION_UPLOAD_MB}MB."}),
+            413,
+        )
+
     db = get_db()
-    _ensure_profile_row(db, g.user["username"], g.user.get("email", ""))
-    cursor = db.execute(
-        """
-        INSERT INTO archive_files (original_name, stored_name, size_bytes, uploaded_by, uploaded_at)
-        VALUES (?, ?, ?, ?, ?)
-        """,
-        (original_name, stored_name, size_bytes, g.user["username"], now),
-    )
-    _sync_profile_badges(db, g.user["username"])
-    db.commit()
-    return jsonify(
-        {
-            "id": cursor.lastrowid,
-            "name": original_name,
-            "size_bytes": size_bytes,
-            "uploaded_at": now,
-            "uploaded_by": g.user["username"],
-        }
-    ), 201
+    _collect_expired_upload_sessions(db)
+    try:
+        session = create_session(
+            db,
+            ARCHIVE_STAGING_DIR,
+            g.user["username"],
+            original_name,
+            size_bytes,
+            ARCHIVE_UPLOAD_SESSION_TTL,
+            ARCHIVE_UPLOAD_MAX_SESSIONS_PER_USER,
+        )
+    except UploadSessionError as exc:
+        return _upload_session_error(exc)
+    payload = session_payload(session)
+    payload["chunk_size"] = ARCHIVE_UPLOAD_CHUNK_MB * 1024 * 1024
+    return jsonify(payload), 201
+
+
+@app.route("/api/archive/uploads/<upload_id>", methods=["GET"])
+@archive_access_required
+def get_archive_upload_session(upload_id: str):
+    """Report how many bytes have been received, so a client can resume."""
+    session = get_session(get_db(), upload_id, g.user["username"])
+    if session is None:
+        return jsonify({"error": "Upload session not found or expired."}), 404
+    return jsonify(session_payload(session)), 200
+
+
+@app.route("/api/archive/uploads/<upload_id>", methods=["PUT"])
+@archive_access_required
+def put_archive_upload_chunk(upload_id: str):
+    """Write the raw request body at ``?offset=`` into the session file."""
+    db = get_db()
+    session = get_session(db, upload_id, g.user["username"])
+    if session is None:
+        return jsonify({"error": "Upload session not found or expired."}), 404
+    offset = request.args.get("offset", type=int)
+    if offset is None:
+        return jsonify({"error": "Missing integer offset query parameter."}), 400
+    length = request.content_length
+    if length is None:
+        return jsonify({"error": "Content-Length is required."}), 411
+    if length > ARCHIVE_UPLOAD_CHUNK_MB * 1024 * 1024:
+        return jsonify({"error": f"Chunk too large. Max {ARCHIVE_UPLOAD_CHUNK_MB}MB per request."}), 413
+    try:
+        received = write_chunk(
+            db,
+            ARCHIVE_STAGING_DIR,
+            session,
+            offset,
+            length,
+            request.stream,
+            ARCHIVE_UPLOAD_SESSION_TTL,
+        )
+    except UploadSessionError as exc:
+        response, status = _upload_session_error(exc)
+        current = get_session(db, upload_id, g.user["username"])
+        if current is not None:
+            response.headers["Upload-Offset"] = str(current["received_bytes"])
+        return response, status
+    response = jsonify(session_payload(get_session(db, upload_id, g.user["username"])))
+    response.headers["Upload-Offset"] = str(received)
+    return response, 200
+
+
+@app.route("/api/archive/uploads/<upload_id>/complete", methods=["POST"])
+@archive_access_required
+def complete_archive_upload_session(upload_id: str):
+    """Add the assembled file to the archive like a direct upload.
+
+    The digest was computed while chunks arrived; the file is only re-hashed
+    if that running digest was lost (e.g. the server restarted mid-upload).
+    The session is claimed first, so a concurrent complete gets 409 and
+    further chunks are refused.
+    """
+    if not _has_archive_upload_access(g.user):
+        return _archive_not_found_response()
+    db = get_db()
+    session = get_session(db, upload_id, g.user["username"])
+    if session is None:
+        return jsonify({"error": "Upload session not found or expired."}), 404
+    if session["received_bytes"] < session["size_bytes"]:
+        return (
+            jsonify(
+                {
+                    "error": "Upload is incomplete.",
+                    "received_bytes": session["received_bytes"],
+                    "size_bytes": session["size_bytes"],
+                }
+            ),
+            409,
+        )
+
+    if not claim_session(db, upload_id, ARCHIVE_UPLOAD_SESSION_TTL):
+        return jsonify({"error": "Upload session is already being completed."}), 409
+
+    part_path = session_path(ARCHIVE_STAGING_DIR, upload_id)
+    try:
+        sha256 = finish_digest(upload_id, int(session["size_bytes"]))
+        if sha256 is None:
+            log.info("No running digest for upload session %s; hashing the whole file.", upload_id)
+            sha256, size_bytes = hash_file(part_path)
+        else:
+            size_bytes = part_path.stat().st_size
+    except BaseException:
+        release_session(db, upload_id)
+        raise
+    if size_bytes != session["size_bytes"]:
+        release_session(db, upload_id)
+        return jsonify({"error": "Stored upload size does not match the session."}), 500
+
+    def drop_session(conn: sqlite3.Connection) -> None:
+        conn.execute("DELETE FROM archive_upload_sessions WHERE id = ?", (upload_id,))
+
+    staged = StagedUpload(part_path, sha256, size_bytes)
+    try:
+        payload = _record_archive_upload(db, staged, str(session["original_name"]), drop_session)
+    except BaseException:
+        # The part file was consumed either way; the session cannot be retried.
+        delete_session(db, ARCHIVE_STAGING_DIR, upload_id)
+        raise
+    return jsonify(payload), 201
+
+
+@app.route("/api/archive/uploads/<upload_id>", methods=["DELETE"])
+@archive_access_required
+def cancel_archive_upload_session(upload_id: str):
+    db = get_db()
+    if get_session(db, upload_id, g.user["username"]) is None:
+        return jsonify({"error": "Upload session not found or expired."}), 404
+    delete_session(db, ARCHIVE_STAGING_DIR, upload_id)
+    return "", 204
 
 
 @app.route("/api/archive/download/<int:file_id>", methods=["GET"])
 @archive_access_required
 def download_archive_file(file_id: int):
-    """Download a file from the archive."""
-    row = get_db().execute(
-        """
-        SELECT id, original_name, stored_name
-        FROM archive_files
-        WHERE id = ?
-        """,
-        (file_id,),
-    ).fetchone()
+    """Download a file from the archive.
+
+    Supports Range/If-Range and If-None-Match. The ETag is the content hash
+    (or mtime/size for files not yet backfilled into blobs).
+    """
+    row = get_db().execute(ARCHIVE_FILE_BY_ID_SQL, (file_id,)).fetchone()
     if row is None:
         return jsonify({"error": "File not found."}), 404
 
-    file_path = (ARCHIVE_FILES_DIR / row["stored_name"]).resolve()
-    if file_path.parent != ARCHIVE_FILES_DIR:
+    file_path = locate(ARCHIVE_FILES_DIR, str(row["stored_name"]))
+    if file_path is None:
         return jsonify({"error": "Invalid stored file path."}), 500
-    if not file_path.exists():
+    try:
+        file_stat = file_path.stat()
+    except FileNotFoundError:
         return jsonify({"error": "Stored file is missing."}), 404
+    etag = row["sha256"] or f"{file_stat.st_mtime_ns:x}-{file_stat.st_size:x}"
+
+    if etag in request.if_none_match:
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
+
+    if ARCHIVE_SENDFILE_MODE == "x-accel-redirect":
+        # nginx serves the bytes (including Range) from an internal location.
+        response = Response(
+            status=200,
+            mimetype=mimetypes.guess_type(row["original_name"])[0] or "application/octet-stream",
+        )
+        response.headers["X-Accel-Redirect"] = ARCHIVE_ACCEL_REDIRECT_PREFIX + quote(
+            file_path.relative_to(ARCHIVE_FILES_DIR).as_posix()
+        )
+        response.headers.set("Content-Disposition", "attachment", filename=row["original_name"])
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
 
-    return send_file(
+    response = send_file(
         file_path,
         as_attachment=True,
         download_name=row["original_name"],
+        conditional=True,
+        etag=etag,
+        last_modified=file_stat.st_mtime,
         max_age=0,
     )
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def _export_entry_name(original_name: str, used: set[str]) -> str:
+    # Keep Unicode names (zipfile marks them UTF-8) but never a path.
+    name = re.sub(r"[\x00-\x1f/\\:]+", "_", original_name).strip(" .") or "file"
+    stem, dot, extension = name.rpartition(".")
+    if not stem:
+        stem, dot, extension = name, "", ""
+    candidate = name
+    counter = 2
+    while candidate.lower() in used:
+        candidate = f"{stem} ({counter}){dot}{extension}"
+        counter += 1
+    used.add(candidate.lower())
+    return candidate
+
+
+@app.route("/api/archive/export", methods=["POST"])
+@archive_access_required
+def export_archive_files():
+    """Stream several archive files as one ZIP download.
+
+    Body: ``{"ids": [...]}``. The archive is generated on the fly, so nothing
+    is staged on disk and memory use does not grow with the export size.
+    """
+    data = request.get_json(silent=True) or {}
+    raw_ids = data.get("ids")
+    if not isinstance(raw_ids, list):
+        return jsonify({"error": "Expected a JSON list in 'ids'."}), 400
+
+    file_ids: list[int] = []
+    for raw in raw_ids:
+        if isinstance(raw, bool) or not isinstance(raw, (int, str)):
+            return jsonify({"error": "File ids must be integers."}), 400
+        try:
+            file_id = int(raw)
+        except ValueError:
+            return jsonify({"error": "File ids must be integers."}), 400
+        if file_id not in file_ids:
+            file_ids.append(file_id)
+    if not file_ids:
+        return jsonify({"error": "No files selected."}), 400
+    if len(file_ids) > ARCHIVE_EXPORT_MAX_FILES:
+        return (
+            jsonify({"error": f"Too many files. Max {ARCHIVE_EXPORT_MAX_FILES} per export."}),
+            400,
+        )
+
+    rows = {
+        int(row["id"]): row
+        for row in get_db().execute(archive_files_by_ids_sql(len(file_ids)), file_ids).fetchall()
+    }
+    missing = [file_id for file_id in file_ids if file_id not in rows]
+    if missing:
+        return jsonify({"error": "File not found.", "missing": missing}), 404
+
+    # Resolve everything before streaming starts; the request's DB connection
+    # is released before the generator runs.
+    entries: list[tuple[str, Path]] = []
+    used_names: set[str] = set()
+    for file_id in file_ids:
+        row = rows[file_id]
+        file_path = locate(ARCHIVE_FILES_DIR, str(row["stored_name"]))
+        if file_path is None:
+            return jsonify({"error": "Invalid stored file path."}), 500
+        if not file_path.is_file():
+            return jsonify({"error": "Stored file is missing.", "missing": [file_id]}), 404
+        entries.append((_export_entry_name(row["original_name"], used_names), file_path))
+
+    download_name = f"cartofia-archive-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.zip"
+    response = Response(stream_zip(entries), mimetype="application/zip")
+    response.headers.set("Content-Disposition", "attachment", filename=download_name)
+    response.headers["Cache-Control"] = "private, no-store"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
 
 
 @app.route("/api/profile/me", methods=["GET"])
@@ -631,12 +1301,7 @@ def get_my_profile():
         return jsonify({"error": "Missing username in token claims."}), 400
 
     row = _ensure_profile_row(db, username, g.user.get("email", ""))
-    if _sync_profile_badges(db, username):
-        db.commit()
-        row = _fetch_profile_row(db, username)
-    payload = _profile_payload(db, row, include_email=True)
-    payload["is_me"] = True
-    return jsonify(payload), 200
+    return _profile_response(db, row, include_email=True)
 
 
 @app.route("/api/profile/<username>", methods=["GET"])
@@ -657,12 +1322,113 @@ def get_profile_by_username(username: str):
         if row is None:
             return jsonify({"error": "Profile not found."}), 404
 
-    if _sync_profile_badges(db, target_username):
-        db.commit()
-        row = _fetch_profile_row(db, target_username)
-    payload = _profile_payload(db, row, include_email=include_email)
-    payload["is_me"] = include_email
-    return jsonify(payload), 200
+    return _profile_response(db, row, include_email=include_email)
+
+
+@app.route("/api/profiles/batch", methods=["POST"])
+@auth_required
+def get_profiles_batch():
+    """Return compact public profiles for many usernames in one round-trip.
+
+    Body: ``{"usernames": [...]}``. Unknown usernames are listed under
+    ``missing`` instead of failing the whole request.
+    """
+    data = request.get_json(silent=True) or {}
+    raw_usernames = data.get("usernames")
+    if not isinstance(raw_usernames, list):
+        return jsonify({"error": "Expected a JSON list in 'usernames'."}), 400
+
+    usernames: list[str] = []
+    seen: set[str] = set()
+    for raw in raw_usernames:
+        clean_username = _clean_profile_username(raw)
+        if clean_username and clean_username not in seen:
+            seen.add(clean_username)
+            usernames.append(clean_username)
+    if len(usernames) > PROFILE_BATCH_MAX_USERNAMES:
+        return (
+            jsonify(
+                {"error": f"Too many usernames. Max {PROFILE_BATCH_MAX_USERNAMES} per request."}
+            ),
+            400,
+        )
+    if not usernames:
+        return jsonify({"profiles": {}, "missing": []}), 200
+
+    db = get_db()
+    rows = db.execute(profile_batch_rows_sql(len(usernames)), usernames).fetchall()
+    badges_by_user: dict[str, list[str]] = {}
+    for award in db.execute(profile_batch_badges_sql(len(usernames)), usernames).fetchall():
+        badges_by_user.setdefault(str(award["username"]), []).append(str(award["badge_key"]))
+
+    profiles: dict[str, dict[str, object]] = {}
+    for row in rows:
+        username = str(row["username"])
+        profiles[username] = {
+            "username": username,
+            "display_name": row["display_name"] or username,
+            "avatar_url": _profile_avatar_url(
+                username,
+                str(row["picture_filename"] or ""),
+                str(row["picture_updated_at"] or ""),
+            ),
+            "upload_count": int(row["upload_count"] or 0),
+            "badge_count": int(row["badge_count"] or 0),
+            "badges": badges_by_user.get(username, []),
+        }
+    missing = [username for username in usernames if username not in profiles]
+    return jsonify({"profiles": profiles, "missing": missing}), 200
+
+
+_GAME_NAME_RE = re.compile(r"^[a-z0-9][a-z0-9-]{0,39}$")
+
+
+@app.route("/api/profile/me/activity", methods=["POST"])
+@auth_required
+def log_my_activity():
+    """Queue a game start/finish event from the arcade pages.
+
+    Body: ``{"event_type": "game_started"|"played_game", "metadata": {"game",
+    "result", "duration_seconds", ...}}``. Responds 202 once queued and 503
+    when the ingest queue is full.
+    """
+    username = _clean_profile_username(g.user.get("username", ""))
+    if not username:
+        return jsonify({"error": "Missing username in token claims."}), 400
+
+    data = request.get_json(silent=True) or {}
+    event_type = str(data.get("event_type", "")).strip()
+    if event_type not in ACTIVITY_EVENT_TYPES:
+        allowed = ", ".join(sorted(ACTIVITY_EVENT_TYPES))
+        return jsonify({"error": f"Unknown event_type. Use one of: {allowed}."}), 400
+    metadata = data.get("metadata") or {}
+    if not isinstance(metadata, dict):
+        return jsonify({"error": "metadata must be an object."}), 400
+    game_name = str(metadata.get("game", "")).strip().lower()
+    if not _GAME_NAME_RE.match(game_name):
+        return jsonify({"error": "Invalid or missing metadata.game."}), 400
+    metadata_json = json.dumps(metadata, separators=(",", ":"), default=str)
+    if len(metadata_json.encode("utf-8")) > ACTIVITY_METADATA_MAX_BYTES:
+        return jsonify({"error": "metadata too large."}), 413
+    try:
+        duration_seconds = max(0, int(metadata.get("duration_seconds")))
+    except (TypeError, ValueError):
+        duration_seconds = None
+
+    event = ActivityEvent(
+        username=username,
+        event_type=event_type,
+        game_name=game_name,
+        result=str(metadata.get("result", "") or "")[:32],
+        duration_seconds=duration_seconds,
+        metadata=metadata_json,
+        logged_at=_utc_now_iso(),
+    )
+    if not activity_writer.submit(event):
+        response = jsonify({"error": "Activity ingest is busy. Retry shortly."})
+        response.headers["Retry-After"] = "5"
+        return response, 503
+    return jsonify({"queued": True}), 202
 
 
 @app.route("/api/profile/me", methods=["PATCH"])
@@ -699,10 +1465,9 @@ def update_my_profile():
         (next_display_name, g.user.get("email", ""), now, username),
     )
     db.commit()
+    _invalidate_profile_payloads(username)
     row = _fetch_profile_row(db, username)
-    payload = _profile_payload(db, row, include_email=True)
-    payload["is_me"] = True
-    return jsonify(payload), 200
+    return _profile_response(db, row, include_email=True)
 
 
 @app.route("/api/profile/me/avatar", methods=["POST"])
@@ -730,11 +1495,7 @@ def upload_my_profile_avatar():
 
     old_filename = str(row["picture_filename"] or "")
     file_key = hashlib.sha256(f"{username}:{uuid.uuid4().hex}".encode("utf-8")).hexdigest()[:24]
-    new_filename = f"{file_key}.{extension}"
-    output_path = (PROFILE_AVATAR_DIR / new_filename).resolve()
-    if output_path.parent != PROFILE_AVATAR_DIR:
-        return jsonify({"error": "Invalid avatar destination path."}), 500
-
+    new_filename, output_path = place(PROFILE_AVATAR_DIR, f"{file_key}.{extension}")
     output_path.write_bytes(raw_data)
     now = _utc_now_iso()
     db.execute(
@@ -745,21 +1506,20 @@ def upload_my_profile_avatar():
         """,
         (new_filename, now, g.user.get("email", ""), now, username),
     )
-    _sync_profile_badges(db, username)
+    emit_profile_event(db, username, AVATAR_SET)
     db.commit()
+    _invalidate_profile_payloads(username)
 
     if old_filename and old_filename != new_filename:
-        old_path = (PROFILE_AVATAR_DIR / old_filename).resolve()
-        if old_path.parent == PROFILE_AVATAR_DIR and old_path.exists():
+        old_path = locate(PROFILE_AVATAR_DIR, old_filename)
+        if old_path is not None and old_path.exists():
             try:
                 old_path.unlink()
             except OSError:
                 pass
 
     row = _fetch_profile_row(db, username)
-    payload = _profile_payload(db, row, include_email=True)
-    payload["is_me"] = True
-    return jsonify(payload), 200
+    return _profile_response(db, row, include_email=True)
 
 
 @app.route("/api/profile/avatar/<username>", methods=["GET"])
@@ -768,19 +1528,12 @@ def get_profile_avatar(username: str):
     if not clean_username:
         return jsonify({"error": "Invalid username."}), 400
 
-    row = get_db().execute(
-        """
-        SELECT picture_filename
-        FROM user_profiles
-        WHERE username = ?
-        """,
-        (clean_username,),
-    ).fetchone()
+    row = get_db().execute(PROFILE_AVATAR_SQL, (clean_username,)).fetchone()
     if row is None or not row["picture_filename"]:
         return jsonify({"error": "Avatar not found."}), 404
 
-    avatar_path = (PROFILE_AVATAR_DIR / str(row["picture_filename"])).resolve()
-    if avatar_path.parent != PROFILE_AVATAR_DIR or (not avatar_path.exists()):
+    avatar_path = locate(PROFILE_AVATAR_DIR, str(row["picture_filename"]))
+    if avatar_path is None or (not avatar_path.exists()):
         return jsonify({"error": "Avatar file is missing."}), 404
     return send_file(avatar_path, max_age=3600, conditional=True)
 
@@ -792,75 +1545,53 @@ def file_too_large(_error):
 
 # ── Homepage feed ──────────────────────────────────────────────────────────────
 
-_feed_cache: dict[str, object] = {"payload": None, "expires_at": 0.0}
-_feed_cache_lock = threading.Lock()
 _FEED_CACHE_TTL = 60.0  # seconds
 
 
 def _build_feed_payload() -> dict:
-    """Query SQLite for live feed items. Never raises — returns fallback on any error."""
+    """Sum feed rollup buckets into live feed items. Never raises — returns fallback on any error."""
     items: list[dict[str, str]] = []
     try:
-        db = sqlite3.connect(ARCHIVE_DB_PATH)
-        db.row_factory = sqlite3.Row
-        try:
-            now_iso = _utc_now_iso()
-            week_ago = datetime.fromtimestamp(
-                time.time() - 7 * 86400, tz=timezone.utc
-            ).isoformat()
+        with db_pool.connection() as db:
+            now = time.time()
+            # Windows are whole buckets ending with the current one: 7 day
+            # buckets (today and the 6 before) and 24 hour buckets. Starting
+            # from the bucket that holds "7 days ago" would add an 8th day.
+            week_start = datetime.fromtimestamp(now - 6 * 86400, tz=timezone.utc).isoformat()
+            day_start = datetime.fromtimestamp(now - 23 * 3600, tz=timezone.utc).isoformat()
 
             # New profiles this week
-            try:
-                row = db.execute(
-                    "SELECT COUNT(*) AS n FROM user_profiles WHERE created_at >= ?",
-                    (week_ago,),
-                ).fetchone()
-                count = row["n"] if row else 0
-                if count > 0:
-                    noun = "profile" if count == 1 else "profiles"
-                    items.append({"icon": "🏆", "text": f"{count} new {noun} created this week"})
-            except sqlite3.OperationalError:
-                pass  # table may not exist yet
+            count = rollups.window_total(db, rollups.NEW_PROFILES, week_start, rollups.DAY)
+            if count > 0:
+                noun = "profile" if count == 1 else "profiles"
+                items.append({"icon": "🏆", "text": f"{count} new {noun} created this week"})
 
             # Recent archive uploads
-            try:
-                row = db.execute(
-                    "SELECT COUNT(*) AS n FROM archive_files WHERE uploaded_at >= ?",
-                    (week_ago,),
-                ).fetchone()
-                count = row["n"] if row else 0
-                if count > 0:
-                    noun = "file" if count == 1 else "files"
-                    items.append({"icon": "📦", "text": f"{count} {noun} uploaded to the archive recently"})
-            except sqlite3.OperationalError:
-                pass
-
-            # Most played game today (activity_log table — populated by game sessions)
-            try:
-                today = datetime.fromtimestamp(
-                    time.time() - 86400, tz=timezone.utc
-                ).isoformat()
-                row = db.execute(
-                    """
-                    SELECT game_name, COUNT(*) AS plays
-                    FROM activity_log
-                    WHERE logged_at >= ? AND game_name IS NOT NULL AND game_name != ''
-                    GROUP BY game_name
-                    ORDER BY plays DESC
-                    LIMIT 1
-                    """,
-                    (today,),
-                ).fetchone()
-                if row and row["plays"] > 0:
-                    noun = "time" if row["plays"] == 1 else "times"
-                    items.append(
-                        {"icon": "🎮", "text": f"{row['game_name']} played {row['plays']} {noun} today"}
-                    )
-            except sqlite3.OperationalError:
-                pass  # activity_log not yet created
-
-        finally:
-            db.close()
+            count = rollups.window_total(db, rollups.UPLOADS, week_start, rollups.DAY)
+            if count > 0:
+                noun = "file" if count == 1 else "files"
+                items.append({"icon": "📦", "text": f"{count} {noun} uploaded to the archive recently"})
+
+            # Top uploader this week
+            top_uploader = rollups.window_top(db, rollups.UPLOADS, week_start, rollups.DAY)
+            if top_uploader and top_uploader[1] > 1:
+                name, uploads = top_uploader
+                items.append({"icon": "🗄️", "text": f"{name} uploaded the most files this week ({uploads})"})
+
+            # Most played game today (rolled up by the activity writer)
+            top_game = rollups.window_top(db, rollups.PLAYS, day_start, rollups.HOUR)
+            if top_game:
+                game_name, plays = top_game
+                noun = "time" if plays == 1 else "times"
+                items.append({"icon": "🎮", "text": f"{game_name} played {plays} {noun} today"})
+
+            # Busiest hour today
+            busiest = rollups.busiest_bucket(db, rollups.PLAYS, day_start, rollups.HOUR)
+            if busiest and busiest[1] > 1:
+                hour, plays = busiest
+                items.append(
+                    {"icon": "⏰", "text": f"Busiest hour today: {hour[11:13]}:00 UTC with {plays} plays"}
+                )
     except Exception:
         log.debug("homepage feed: db query failed", exc_info=True)
 
@@ -870,71 +1601,223 @@ def _build_feed_payload() -> dict:
     return {"items": items}
 
 
+def _serialize_json(payload: object) -> tuple[bytes, str]:
+    """Serialize once and derive a strong ETag from the bytes."""
+    body = app.json.dumps(payload).encode("utf-8")
+    return body, hashlib.sha256(body).hexdigest()[:32]
+
+
+def _cached_json_response(body: bytes, etag: str, cache_control: str) -> Response:
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = Response(body, status=200, mimetype=app.json.mimetype)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = cache_control
+    return response
+
+
+# One background rebuild per TTL; callers always get the last serialized feed.
+homepage_feed_cache = StaleWhileRevalidate(
+    lambda: _serialize_json(_build_feed_payload()),
+    ttl=_FEED_CACHE_TTL,
+    name="homepage-feed-refresh",
+)
+
+
 @app.route("/api/homepage/feed", methods=["GET"])
 def homepage_feed():
     """Public feed of live platform activity for the homepage sidebar."""
-    now = time.monotonic()
-    with _feed_cache_lock:
-        if _feed_cache["payload"] is not None and now < _feed_cache["expires_at"]:
-            return jsonify(_feed_cache["payload"]), 200
+    body, etag = homepage_feed_cache.get()
+    return _cached_json_response(
+        body,
+        etag,
+        f"public, max-age={int(_FEED_CACHE_TTL)}, stale-while-revalidate={int(_FEED_CACHE_TTL)}",
+    )
+
+
+_VISITOR_ID_RE = re.compile(r"^[A-Za-z0-9_-]{8,64}$")
+
+
+@app.route("/api/heartbeat", methods=["POST"])
+def presence_heartbeat():
+    """Record that a visitor is currently on ``page``."""
+    data = request.get_json(silent=True) or {}
+    visitor_id = str(data.get("visitor_id", "")).strip()
+    if not _VISITOR_ID_RE.match(visitor_id):
+        return jsonify({"error": "Invalid visitor_id."}), 400
+    presence.record(visitor_id, normalize_page(data.get("page", "/")))
+    return "", 204
+
 
-    payload = _build_feed_payload()
+@app.route("/api/online", methods=["GET"])
+def online_count():
+    snapshot = presence.snapshot()
+    return jsonify({"count": snapshot["count"], "pages": snapshot["pages"]}), 200
 
-    with _feed_cache_lock:
-        _feed_cache["payload"] = payload
-        _feed_cache["expires_at"] = time.monotonic() + _FEED_CACHE_TTL
 
-    return jsonify(payload), 200
+@app.route("/api/online/games", methods=["GET"])
+def online_games():
+    snapshot = presence.snapshot()
+    return jsonify({"games": snapshot["games"]}), 200
+
+
+def _online_snapshot_body() -> bytes:
+    snapshot = presence.snapshot()
+    return _serialize_json({"count": snapshot["count"], "pages": snapshot["pages"]})[0]
+
+
+# Downsampled history of every fresh poll, kept across restarts.
+stats_history = StatsHistory(STATS_HISTORY_PATH)
+stats_history.load()
+atexit.register(stats_history.save)
+
+
+def _record_stats_history(snapshot: StatsSnapshot) -> None:
+    # Stale sections repeat old values; leave a gap instead of a flat line.
+    if snapshot.ready and not snapshot.stats.get("stale"):
+        stats_history.record(snapshot.fetched_at, snapshot.stats)
+
+
+# Proxmox is polled in the background; /api/stats* and SSE read the snapshot.
+stats_poller = StatsPoller(
+    proxmox,
+    _serialize_json,
+    interval=STATS_POLL_INTERVAL,
+    on_refresh=_record_stats_history,
+)
+atexit.register(stats_poller.stop)
+
+
+# A single producer thread publishes changed snapshots to every SSE client.
+live_events = SnapshotBroadcaster(
+    max_subscribers=SSE_MAX_SUBSCRIBERS,
+    keepalive_seconds=SSE_KEEPALIVE_SECONDS,
+)
+live_events.register("feed", lambda: homepage_feed_cache.get()[0], SSE_FEED_INTERVAL)
+live_events.register("online", _online_snapshot_body, SSE_ONLINE_INTERVAL)
+live_events.register(
+    "stats", lambda: stats_poller.snapshot().bodies[LIVE][0], SSE_STATS_INTERVAL
+)
+atexit.register(live_events.stop)
+
+
+@app.route("/api/events", methods=["GET"])
+def live_event_stream():
+    """Server-Sent Events stream of ``feed``, ``online`` and ``stats`` snapshots.
+
+    ``?topics=feed,online`` selects topics (default: all). Each topic's latest
+    snapshot is sent on connect, then again whenever it changes.
+    """
+    requested = {
+        topic.strip()
+        for topic in request.args.get("topics", "").split(",")
+        if topic.strip()
+    }
+    topics = frozenset(requested) if requested else live_events.topics
+    unknown = topics - live_events.topics
+    if unknown:
+        return jsonify({"error": f"Unknown topics: {', '.join(sorted(unknown))}."}), 400
+
+    subscriber = live_events.subscribe(topics)
+    if subscriber is None:
+        response = jsonify({"error": "Too many live connections. Poll the JSON endpoints instead."})
+        response.headers["Retry-After"] = "30"
+        return response, 503
+
+    response = Response(live_events.stream(subscriber), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    # Tell nginx not to buffer the stream.
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+def _stats_response(section: str) -> Response:
+    snapshot = stats_poller.snapshot()
+    age = snapshot.age()
+    body, etag = snapshot.bodies[section]
+    response = _cached_json_response(
+        body,
+        etag,
+        f"public, max-age={int(max(0.0, stats_poller.interval - age))}",
+    )
+    response.headers["Age"] = str(int(age))
+    return response
 
 
 @app.route("/api/stats", methods=["GET"])
 def get_stats():
     """Endpoint to get all infrastructure statistics."""
-    try:
-        stats = proxmox.get_all_stats()
-        return jsonify(stats), 200
-    except Exception as exc:
-        log.exception("Error in /api/stats: %s", exc)
-        return jsonify({"error": str(exc)}), 500
+    return _stats_response(ALL)
 
 
 @app.route("/api/stats/containers", methods=["GET"])
 def get_container_stats():
     """Endpoint to get container statistics only."""
-    try:
-        stats = proxmox.get_container_stats()
-        return jsonify(stats), 200
-    except Exception as exc:
-        log.exception("Error in /api/stats/containers: %s", exc)
-        return jsonify({"error": str(exc)}), 500
+    return _stats_response(CONTAINERS)
 
 
 @app.route("/api/stats/vms", methods=["GET"])
 def get_vm_stats():
     """Endpoint to get VM statistics only."""
-    try:
-        stats = proxmox.get_qemu_stats()
-        return jsonify(stats), 200
-    except Exception as exc:
-        log.exception("Error in /api/stats/vms: %s", exc)
-        return jsonify({"error": str(exc)}), 500
+    return _stats_response(VMS)
 
 
 @app.route("/api/stats/node", methods=["GET"])
 def get_node_stats():
     """Endpoint to get node statistics only."""
-    try:
-        stats = proxmox.get_node_stats()
-        return jsonify(stats), 200
-    except Exception as exc:
-        log.exception("Error in /api/stats/node: %s", exc)
-        return jsonify({"error": str(exc)}), 500
+    return _stats_response(NODE)
+
+
+@app.route("/api/stats/history", methods=["GET"])
+def get_stats_history():
+    """Downsampled series for one metric: ``?metric=memory_used_gb&range=24h``."""
+    metric = request.args.get("metric", "").strip()
+    if metric not in stats_history.metrics:
+        return (
+            jsonify({"error": f"Unknown metric. Use one of: {', '.join(stats_history.metrics)}."}),
+            400,
+        )
+    range_key = request.args.get("range", "1h").strip()
+    range_seconds = STATS_HISTORY_RANGES.get(range_key)
+    if range_seconds is None:
+        return (
+            jsonify({"error": f"Unknown range. Use one of: {', '.join(STATS_HISTORY_RANGES)}."}),
+            400,
+        )
+
+    resolution, step, timestamps, values = stats_history.series(metric, range_seconds)
+    response = jsonify(
+        {
+            "metric": metric,
+            "range": range_key,
+            "resolution": resolution,
+            "step_seconds": step,
+            "timestamps": timestamps,
+            "values": values,
+        }
+    )
+    response.headers["Cache-Control"] = f"public, max-age={min(step, 60)}"
+    return response
 
 
 @app.route("/health", methods=["GET"])
 def health():
     """Health check endpoint."""
-    return jsonify({"status": "ok"}), 200
+    return jsonify(
+        {
+            "status": "ok",
+            "oidc_claims_cache": oidc_claims_cache.stats(),
+            "oidc_userinfo_flight": oidc_userinfo_flight.stats(),
+            "profile_payload_cache": profile_payload_cache.stats(),
+            "activity_writer": activity_writer.stats(),
+            "homepage_feed_cache": homepage_feed_cache.stats(),
+            "live_events": live_events.stats(),
+            "stats_poller": stats_poller.stats(),
+            "proxmox_breaker": proxmox.breaker_stats(),
+            "stats_history": stats_history.stats(),
+        }
+    ), 200
 
 
 def _normalize_room_code(raw: str) -> str:
@@ -1392,6 +2275,18 @@ def blackjack_socket(ws):
 init_storage()
 
 
+def start_background_services() -> None:
+    """Start the stats poller and wait briefly for its first poll.
+
+    Importing this module starts no threads. ``__main__`` calls this; under
+    another WSGI server call it from the worker startup hook (e.g. gunicorn's
+    ``post_worker_init``), or the poller starts on the first stats request.
+    Every worker process polls Proxmox on its own.
+    """
+    stats_poller.start()
+    stats_poller.wait_ready(STATS_WARM_TIMEOUT)
+
+
 if __name__ == "__main__":
     port = int(os.getenv("API_PORT", "5000"))
     debug = os.getenv("FLASK_ENV", "production") == "development"
@@ -1401,4 +2296,8 @@ if __name__ == "__main__":
             format="%(asctime)s | %(levelname)-8s | %(name)s | %(message)s",
             datefmt="%Y-%m-%d %H:%M:%S",
         )
+    # Flask's debug reloader runs this block in a watcher process too; only
+    # the serving child needs the poller.
+    if not debug or os.getenv("WERKZEUG_RUN_MAIN") == "true":
+        start_background_services()
     app.run(host="0.0.0.0", port=port, debug=debug)
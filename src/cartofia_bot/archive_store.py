@@ -0,0 +1,293 @@
+"""Content-addressed storage for archive uploads.
+
+Uploads are copied in fixed-size chunks to a temp file while their SHA-256
+is computed in the same pass. Blobs are stored once per digest and tracked
+in ``archive_blobs`` with a reference count, so re-uploading an existing
+file only bumps the count and never writes the payload to its final place
+again. The digest doubles as a strong ETag and an integrity check.
+
+Run ``python -m cartofia_bot.archive_store --backfill`` once to hash (and
+deduplicate) files uploaded before blobs existed, and ``--verify`` to
+re-hash every blob against its recorded digest.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import zipfile
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator
+
+try:
+    from cartofia_bot.paths import archive_data_dir, archive_db_path
+    from cartofia_bot.sharding import locate, place
+except ImportError:  # pragma: no cover - fallback for direct script execution
+    from paths import archive_data_dir, archive_db_path
+    from sharding import locate, place
+
+log = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+# Looked up on every upload; also planned by ``migrations.HOT_QUERIES``.
+BLOB_BY_SHA_SQL = "SELECT stored_name FROM archive_blobs WHERE sha256 = ?"
+
+
+@dataclass(frozen=True)
+class StagedUpload:
+    path: Path
+    sha256: str
+    size_bytes: int
+
+
+@dataclass(frozen=True)
+class StoredBlob:
+    sha256: str
+    stored_name: str
+    size_bytes: int
+    deduplicated: bool
+
+
+# Formats that are already compressed; deflating them again only burns CPU.
+STORED_EXTENSIONS = frozenset(
+    {
+        "7z", "aab", "apk", "avif", "br", "bz2", "docx", "epub", "flac", "gif", "gz",
+        "heic", "jar", "jpeg", "jpg", "m4a", "mkv", "mov", "mp3", "mp4", "odt", "ogg",
+        "opus", "png", "pptx", "rar", "tgz", "webm", "webp", "xlsx", "xz", "zip", "zst",
+    }
+)
+
+
+def hash_file(path: Path, chunk_size: int = CHUNK_SIZE) -> tuple[str, int]:
+    digest = hashlib.sha256()
+    size = 0
+    with path.open("rb") as handle:
+        while chunk := handle.read(chunk_size):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def stage_upload(stream: BinaryIO, staging_dir: Path, chunk_size: int = CHUNK_SIZE) -> StagedUpload:
+    """Copy ``stream`` to a temp file in ``staging_dir``, hashing as it goes."""
+    digest = hashlib.sha256()
+    size = 0
+    handle = tempfile.NamedTemporaryFile(dir=staging_dir, prefix="upload-", delete=False)
+    try:
+        with handle:
+            while chunk := stream.read(chunk_size):
+                digest.update(chunk)
+                handle.write(chunk)
+                size += len(chunk)
+    except BaseException:
+        Path(handle.name).unlink(missing_ok=True)
+        raise
+    return StagedUpload(Path(handle.name), digest.hexdigest(), size)
+
+
+def store_blob(conn: sqlite3.Connection, staged: StagedUpload, files_dir: Path) -> StoredBlob:
+    """Add a reference to the blob for ``staged``; move it into place if new.
+
+    Must run inside the caller's write transaction (``BEGIN IMMEDIATE``) so
+    concurrent uploads of the same content cannot both insert the blob. The
+    staged temp file is always consumed. If the caller rolls back after a new
+    blob was moved into place, it should ``discard_blob`` it.
+    """
+    row = conn.execute(BLOB_BY_SHA_SQL, (staged.sha256,)).fetchone()
+    if row is not None:
+        stored_name = str(row[0])
+        conn.execute(
+            "UPDATE archive_blobs SET ref_count = ref_count + 1 WHERE sha256 = ?",
+            (staged.sha256,),
+        )
+        path = locate(files_dir, stored_name)
+        if path is not None and path.is_file():
+            staged.path.unlink(missing_ok=True)
+        else:
+            # The row outlived its file; the upload has the same bytes, so restore it.
+            log.warning("Blob %s was missing on disk; restoring it from this upload.", staged.sha256)
+            if path is None:
+                stored_name, path = place(files_dir, staged.sha256)
+                conn.execute(
+                    "UPDATE archive_blobs SET stored_name = ? WHERE sha256 = ?",
+                    (stored_name, staged.sha256),
+                )
+                conn.execute(
+                    "UPDATE archive_files SET stored_name = ? WHERE sha256 = ?",
+                    (stored_name, staged.sha256),
+                )
+            else:
+                path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(staged.path, path)
+        return StoredBlob(staged.sha256, stored_name, staged.size_bytes, deduplicated=True)
+
+    stored_name, path = place(files_dir, staged.sha256)
+    conn.execute(
+        """
+        INSERT INTO archive_blobs (sha256, stored_name, size_bytes, ref_count, created_at)
+        VALUES (?, ?, ?, 1, ?)
+        """,
+        (staged.sha256, stored_name, staged.size_bytes, datetime.now(timezone.utc).isoformat()),
+    )
+    os.replace(staged.path, path)
+    return StoredBlob(staged.sha256, stored_name, staged.size_bytes, deduplicated=False)
+
+
+def discard_blob(blob: StoredBlob, files_dir: Path) -> None:
+    """Remove a freshly stored blob whose transaction was rolled back."""
+    path = locate(files_dir, blob.stored_name)
+    if not blob.deduplicated and path is not None:
+        path.unlink(missing_ok=True)
+
+
+class _ChunkSink:
+    """Write-only, non-seekable file object that hands out what was written."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+        self._offset = 0
+
+    def write(self, data: bytes) -> int:
+        if data:
+            self._chunks.append(bytes(data))
+            self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(
+    entries: Iterable[tuple[str, Path]],
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """Yield a ZIP archive of ``(arcname, path)`` entries without buffering it.
+
+    Memory stays around one ``chunk_size`` regardless of archive size.
+    Already-compressed formats are stored, everything else deflated. Sizes
+    and CRCs go in data descriptors, which is what lets ``zipfile`` write to
+    a non-seekable sink.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, mode="w", allowZip64=True) as archive:
+        for arcname, path in entries:
+            stat = path.stat()
+            info = zipfile.ZipInfo(arcname, date_time=datetime.fromtimestamp(stat.st_mtime).timetuple()[:6])
+            extension = arcname.rsplit(".", 1)[-1].lower() if "." in arcname else ""
+            info.compress_type = zipfile.ZIP_STORED if extension in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+            info.file_size = stat.st_size
+            with path.open("rb") as source, archive.open(info, mode="w", force_zip64=True) as dest:
+                while chunk := source.read(chunk_size):
+                    dest.write(chunk)
+                    yield sink.drain()
+            yield sink.drain()
+    yield sink.drain()
+
+
+def backfill_hashes(conn: sqlite3.Connection, files_dir: Path) -> tuple[int, int]:
+    """Hash legacy rows and fold duplicate files into shared blobs.
+
+    Returns ``(hashed_rows, removed_duplicate_files)``.
+    """
+    rows = conn.execute(
+        "SELECT id, stored_name FROM archive_files WHERE sha256 = '' ORDER BY id"
+    ).fetchall()
+    hashed = 0
+    removed = 0
+    for file_id, stored_name in rows:
+        path = locate(files_dir, str(stored_name))
+        if path is None or not path.is_file():
+            log.warning("Skipping archive file %s: %s is missing.", file_id, path)
+            continue
+        sha256, size = hash_file(path)
+        with conn:
+            existing = conn.execute(BLOB_BY_SHA_SQL, (sha256,)).fetchone()
+            if existing is None:
+                conn.execute(
+                    """
+                    INSERT INTO archive_blobs (sha256, stored_name, size_bytes, ref_count, created_at)
+                    VALUES (?, ?, ?, 1, ?)
+                    """,
+                    (sha256, stored_name, size, datetime.now(timezone.utc).isoformat()),
+                )
+                duplicate = None
+            else:
+                conn.execute(
+                    "UPDATE archive_blobs SET ref_count = ref_count + 1 WHERE sha256 = ?",
+                    (sha256,),
+                )
+                duplicate = path if str(existing[0]) != str(stored_name) else None
+                stored_name = existing[0]
+            conn.execute(
+                "UPDATE archive_files SET sha256 = ?, stored_name = ? WHERE id = ?",
+                (sha256, stored_name, file_id),
+            )
+        hashed += 1
+        if duplicate is not None:
+            duplicate.unlink(missing_ok=True)
+            removed += 1
+    return hashed, removed
+
+
+def verify_blobs(conn: sqlite3.Connection, files_dir: Path) -> list[str]:
+    """Return a problem description for every blob that is missing or corrupt."""
+    problems: list[str] = []
+    for sha256, stored_name in conn.execute(
+        "SELECT sha256, stored_name FROM archive_blobs ORDER BY sha256"
+    ).fetchall():
+        path = locate(files_dir, str(stored_name))
+        if path is None or not path.is_file():
+            problems.append(f"{sha256}: missing {path}")
+            continue
+        actual, _size = hash_file(path)
+        if actual != sha256:
+            problems.append(f"{sha256}: content hashes to {actual}")
+    return problems
+
+
+def main(argv: list[str] | None = None) -> int:
+    data_dir = archive_data_dir()
+    parser = argparse.ArgumentParser(description="Maintain content-addressed archive blobs.")
+    parser.add_argument("--db", default=str(archive_db_path()), help="archive database path")
+    parser.add_argument("--files-dir", default=str(data_dir / "files"), help="archive files directory")
+    parser.add_argument("--backfill", action="store_true", help="hash and dedupe legacy uploads")
+    parser.add_argument("--verify", action="store_true", help="re-hash every blob")
+    args = parser.parse_args(argv)
+
+    files_dir = Path(args.files_dir).resolve()
+    conn = sqlite3.connect(args.db)
+    try:
+        if args.backfill:
+            hashed, removed = backfill_hashes(conn, files_dir)
+            print(f"hashed {hashed} files, removed {removed} duplicate copies")
+        if args.verify:
+            problems = verify_blobs(conn, files_dir)
+            for problem in problems:
+                print(problem, file=sys.stderr)
+            if problems:
+                return 1
+            print("all blobs match their digests")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
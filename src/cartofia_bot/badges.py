@@ -0,0 +1,172 @@
+"""Profile badge catalog and the event-driven rules that award badges.
+
+Badges are only evaluated when a domain event fires (profile created, file
+uploaded, avatar set), inside the caller's write transaction. Profile reads
+never touch ``user_badges`` beyond a SELECT.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Callable, Mapping
+
+PROFILE_CREATED = "profile_created"
+FILE_UPLOADED = "file_uploaded"
+AVATAR_SET = "avatar_set"
+
+PROFILE_BADGE_CATALOG: dict[str, dict[str, str]] = {
+    "first_login": {
+        "name": "Welcome",
+        "description": "Signed in to Cartofia.",
+    },
+    "archive_uploader": {
+        "name": "Archivist",
+        "description": "Uploaded your first file to the archive.",
+    },
+    "archive_veteran": {
+        "name": "Vault Keeper",
+        "description": "Uploaded 10 files to the archive.",
+    },
+    "avatar_ready": {
+        "name": "Face of Cartofia",
+        "description": "Added a profile picture.",
+    },
+}
+
+
+@dataclass(frozen=True)
+class BadgeRule:
+    badge_key: str
+    events: frozenset[str]
+    qualifies: Callable[[sqlite3.Row], bool]
+
+
+BADGE_RULES: tuple[BadgeRule, ...] = (
+    BadgeRule("first_login", frozenset({PROFILE_CREATED}), lambda row: True),
+    BadgeRule(
+        "archive_uploader",
+        frozenset({FILE_UPLOADED}),
+        lambda row: int(row["upload_count"] or 0) >= 1,
+    ),
+    BadgeRule(
+        "archive_veteran",
+        frozenset({FILE_UPLOADED}),
+        lambda row: int(row["upload_count"] or 0) >= 10,
+    ),
+    BadgeRule(
+        "avatar_ready",
+        frozenset({AVATAR_SET}),
+        lambda row: bool(row["picture_filename"]),
+    ),
+)
+
+_RULES_BY_EVENT: Mapping[str, tuple[BadgeRule, ...]] = MappingProxyType(
+    {
+        event: tuple(rule for rule in BADGE_RULES if event in rule.events)
+        for event in (PROFILE_CREATED, FILE_UPLOADED, AVATAR_SET)
+    }
+)
+
+# Catalog entries for badges a user has not earned are identical for
+# everyone, so they are built once and shared between responses. Treat the
+# entries as read-only; copy before adding award details.
+UNEARNED_BADGE_ENTRIES: Mapping[str, dict[str, object]] = MappingProxyType(
+    {
+        badge_key: {
+            "key": badge_key,
+            "name": meta["name"],
+            "description": meta["description"],
+            "earned": False,
+            "awarded_at": None,
+            "source": None,
+        }
+        for badge_key, meta in PROFILE_BADGE_CATALOG.items()
+    }
+)
+
+
+# Run inside upload/profile write transactions; also planned by
+# ``migrations.HOT_QUERIES``.
+AWARD_BADGE_SQL = """
+    INSERT OR IGNORE INTO user_badges (username, badge_key, source, awarded_at)
+    VALUES (?, ?, ?, ?)
+"""
+BUMP_BADGE_COUNT_SQL = "UPDATE user_profiles SET badge_count = badge_count + 1 WHERE username = ?"
+BADGE_STATE_SQL = """
+    SELECT username, upload_count, picture_filename
+    FROM user_profiles
+    WHERE username = ?
+"""
+EARNED_BADGE_KEYS_SQL = "SELECT badge_key FROM user_badges WHERE username = ?"
+
+
+def award_badge(
+    db: sqlite3.Connection,
+    username: str,
+    badge_key: str,
+    source: str = "auto",
+) -> bool:
+    """Insert a badge and bump the profile's badge counter if it is new."""
+    if badge_key not in PROFILE_BADGE_CATALOG:
+        return False
+    cursor = db.execute(
+        AWARD_BADGE_SQL,
+        (username, badge_key, source, datetime.now(timezone.utc).isoformat()),
+    )
+    if cursor.rowcount <= 0:
+        return False
+    db.execute(BUMP_BADGE_COUNT_SQL, (username,))
+    return True
+
+
+def _badge_state(db: sqlite3.Connection, username: str) -> tuple[sqlite3.Row | None, set[str]]:
+    row = db.execute(BADGE_STATE_SQL, (username,)).fetchone()
+    if row is None:
+        return None, set()
+    earned = {str(award[0]) for award in db.execute(EARNED_BADGE_KEYS_SQL, (username,)).fetchall()}
+    return row, earned
+
+
+def emit_profile_event(db: sqlite3.Connection, username: str, event: str) -> list[str]:
+    """Evaluate the rules subscribed to ``event`` and award what qualifies.
+
+    Runs inside the caller's transaction and does not commit. Returns the
+    badge keys that were newly awarded.
+    """
+    rules = _RULES_BY_EVENT.get(event, ())
+    if not rules:
+        return []
+    row, earned = _badge_state(db, username)
+    if row is None:
+        return []
+    awarded: list[str] = []
+    for rule in rules:
+        if rule.badge_key in earned or not rule.qualifies(row):
+            continue
+        if award_badge(db, username, rule.badge_key):
+            awarded.append(rule.badge_key)
+    return awarded
+
+
+def award_all_eligible(db: sqlite3.Connection) -> int:
+    """Evaluate every rule for every profile; used for one-shot backfills."""
+    usernames = [
+        str(row[0]) for row in db.execute("SELECT username FROM user_profiles").fetchall()
+    ]
+    awarded = 0
+    previous_factory = db.row_factory
+    db.row_factory = sqlite3.Row
+    try:
+        for username in usernames:
+            row, earned = _badge_state(db, username)
+            if row is None:
+                continue
+            for rule in BADGE_RULES:
+                if rule.badge_key not in earned and rule.qualifies(row):
+                    awarded += int(award_badge(db, username, rule.badge_key))
+    finally:
+        db.row_factory = previous_factory
+    return awarded
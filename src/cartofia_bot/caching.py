@@ -0,0 +1,241 @@
+"""In-process caching primitives shared by the API server."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+log = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a per-entry TTL.
+
+    Entries are evicted least-recently-used first once ``max_entries`` is
+    reached. Hit/miss/eviction counters are kept so the cache can be sized
+    from production traffic via ``stats()``.
+    """
+
+    def __init__(self, max_entries: int, ttl: float) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = max(0.0, float(ttl))
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = _MISSING) -> Any:
+        """Return the cached value, or ``default`` when absent or expired.
+
+        Without a ``default`` a miss raises ``KeyError`` so callers can cache
+        ``None`` as a legitimate value (e.g. negative lookups).
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if now < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+        if default is _MISSING:
+            raise KeyError(key)
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        lifetime = self.ttl if ttl is None else max(0.0, float(ttl))
+        if lifetime <= 0:
+            return
+        expires_at = time.monotonic() + lifetime
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> dict[str, object]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class _InFlightCall:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into a single execution.
+
+    The first caller for a key (the leader) runs ``fn``; callers arriving
+    while it is in flight wait for and share its result, or its exception.
+    Waiters give up with ``TimeoutError`` after ``timeout`` seconds without
+    cancelling the leader.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, _InFlightCall] = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn, timeout: float | None = None) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _InFlightCall()
+                self._calls[key] = call
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if leader:
+            try:
+                call.result = fn()
+            except BaseException as exc:
+                call.error = exc
+                raise
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                call.done.set()
+            return call.result
+
+        if not call.done.wait(timeout):
+            raise TimeoutError(f"Timed out waiting for in-flight call {key!r}")
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self) -> dict[str, object]:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+            }
+
+
+class StaleWhileRevalidate:
+    """Hold one loader result; refresh it in the background once it is stale.
+
+    Only the very first ``get()`` (or one after ``max_stale`` has passed)
+    blocks on ``loader``, and concurrent cold callers share that single call.
+    After that, expired values keep being served while exactly one
+    background thread reloads. A failed refresh keeps the previous value.
+    """
+
+    def __init__(
+        self,
+        loader,
+        ttl: float,
+        max_stale: float | None = None,
+        name: str = "swr-refresh",
+    ) -> None:
+        self.loader = loader
+        self.ttl = max(0.0, float(ttl))
+        self.max_stale = None if max_stale is None else max(0.0, float(max_stale))
+        self.name = name
+        self._value: Any = _MISSING
+        self._loaded_at = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self.hits = 0
+        self.stale_hits = 0
+        self.loads = 0
+        self.refresh_errors = 0
+
+    def _load(self) -> Any:
+        value = self.loader()
+        with self._lock:
+            self._value = value
+            self._loaded_at = time.monotonic()
+            self.loads += 1
+        return value
+
+    def _refresh(self) -> None:
+        try:
+            self._load()
+        except Exception:
+            with self._lock:
+                self.refresh_errors += 1
+            log.warning("Background refresh %s failed; serving stale value.", self.name, exc_info=True)
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def get(self) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            value = self._value
+            age = now - self._loaded_at
+            if value is not _MISSING:
+                if age < self.ttl:
+                    self.hits += 1
+                    return value
+                if self.max_stale is None or age < self.ttl + self.max_stale:
+                    self.stale_hits += 1
+                    if not self._refreshing:
+                        self._refreshing = True
+                        threading.Thread(target=self._refresh, name=self.name, daemon=True).start()
+                    return value
+        return self._flight.do("load", self._load)
+
+    def invalidate(self) -> None:
+        """Mark the current value stale so the next ``get()`` refreshes it."""
+        with self._lock:
+            self._loaded_at = time.monotonic() - self.ttl
+
+    def stats(self) -> dict[str, object]:
+        with self._lock:
+            return {
+                "loaded": self._value is not _MISSING,
+                "age_seconds": round(time.monotonic() - self._loaded_at, 3)
+                if self._value is not _MISSING
+                else None,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "loads": self.loads,
+                "refresh_errors": self.refresh_errors,
+                "refreshing": self._refreshing,
+            }
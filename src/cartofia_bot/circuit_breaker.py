@@ -0,0 +1,177 @@
+"""Circuit breaker with jittered exponential backoff for upstream APIs.
+
+After ``failure_threshold`` consecutive failures the circuit opens and calls
+fail immediately with :class:`CircuitOpenError` instead of waiting on
+timeouts. Once the backoff delay has passed, a single probe call is let
+through (half-open): success closes the circuit, failure re-opens it with
+the delay doubled, up to ``max_delay``. Delays are jittered so several
+workers do not probe in lockstep.
+
+Use one breaker per failure domain: :class:`BreakerGroup` hands out a breaker
+per key (e.g. per Proxmox node) so one dead node does not open the circuit
+for calls that never touch it.
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, TypeVar
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling upstream while the circuit is open."""
+
+    def __init__(self, name: str, retry_after: float) -> None:
+        super().__init__(f"{name} is unavailable; retrying in {retry_after:.0f}s.")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker guarding calls to one upstream."""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        failure_threshold: int = 3,
+        base_delay: float = 2.0,
+        max_delay: float = 120.0,
+        jitter: float = 0.5,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.base_delay = max(0.1, float(base_delay))
+        self.max_delay = max(self.base_delay, float(max_delay))
+        self.jitter = min(1.0, max(0.0, float(jitter)))
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._trips = 0
+        self._open_until = 0.0
+        self._probe_in_flight = False
+        self.rejected = 0
+        self.last_error = ""
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def _backoff(self) -> float:
+        delay = min(self.max_delay, self.base_delay * (2 ** max(0, self._trips - 1)))
+        # Keep at least (1 - jitter) of the delay, spread the rest randomly.
+        return delay * (1.0 - self.jitter * random.random())
+
+    def allow(self) -> bool:
+        """Return True if a call may go upstream right now."""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and self._clock() >= self._open_until:
+                self._state = HALF_OPEN
+                self._probe_in_flight = False
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def retry_after(self) -> float:
+        with self._lock:
+            return max(0.0, self._open_until - self._clock())
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != CLOSED:
+                log.info("Circuit %s closed; upstream recovered.", self.name)
+            self._state = CLOSED
+            self._failures = 0
+            self._trips = 0
+            self._probe_in_flight = False
+
+    def record_failure(self, error: BaseException | None = None) -> None:
+        with self._lock:
+            self._failures += 1
+            if error is not None:
+                self.last_error = f"{type(error).__name__}: {error}"
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._trips += 1
+                delay = self._backoff()
+                self._state = OPEN
+                self._open_until = self._clock() + delay
+                self._probe_in_flight = False
+                log.warning("Circuit %s open for %.1fs after %s failures.", self.name, delay, self._failures)
+
+    def _release_probe(self) -> None:
+        with self._lock:
+            self._probe_in_flight = False
+
+    def call(self, fn: Callable[..., T], *args: object, **kwargs: object) -> T:
+        """Run ``fn`` through the breaker; raise CircuitOpenError while open."""
+        if not self.allow():
+            raise CircuitOpenError(self.name, self.retry_after())
+        settled = False
+        try:
+            result = fn(*args, **kwargs)
+            settled = True
+        except Exception as exc:
+            settled = True
+            self.record_failure(exc)
+            raise
+        finally:
+            # KeyboardInterrupt, SystemExit, a killed greenlet: no verdict on
+            # upstream, but a half-open probe must not stay claimed forever.
+            if not settled:
+                self._release_probe()
+        self.record_success()
+        return result
+
+    def stats(self) -> dict[str, object]:
+        with self._lock:
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "retry_after_seconds": round(max(0.0, self._open_until - self._clock()), 1)
+                if self._state == OPEN
+                else 0.0,
+                "rejected": self.rejected,
+                "last_error": self.last_error,
+            }
+
+
+class BreakerGroup:
+    """One :class:`CircuitBreaker` per key, created on first use with shared settings."""
+
+    def __init__(self, prefix: str, **settings: Any) -> None:
+        self.prefix = prefix
+        self._settings = settings
+        self._lock = threading.Lock()
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def get(self, key: str) -> CircuitBreaker:
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(key)
+                if breaker is None:
+                    breaker = CircuitBreaker(f"{self.prefix}:{key}", **self._settings)
+                    self._breakers[key] = breaker
+        return breaker
+
+    def stats(self) -> dict[str, dict[str, object]]:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {key: breaker.stats() for key, breaker in sorted(breakers.items())}
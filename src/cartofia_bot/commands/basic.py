@@ -117,9 +117,13 @@ def register(tree: app_commands.CommandTree, config: BotConfig) -> None:
         else:
             colour = discord.Colour.dark_grey()
 
+        description = f"Status: **{status.upper()}**"
+        if data.get("stale"):
+            description += "\n_Proxmox is unreachable; showing the last known status._"
+
         embed = discord.Embed(
             title="Cartofia CT2000 Status",
-            description=f"Status: **{status.upper()}**",
+            description=description,
             colour=colour,
         )
 
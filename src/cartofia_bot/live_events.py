@@ -0,0 +1,188 @@
+"""Server-Sent Events fan-out for homepage feed, online count and stats.
+
+One producer thread polls each registered source on its own interval and,
+only when the serialized snapshot changed, encodes a single SSE frame that
+is handed to every subscriber queue. Publishing to N subscribers therefore
+costs one serialization and N ``put_nowait`` calls. Subscribers that fall
+too far behind are disconnected instead of buffering without bound.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Iterator
+
+log = logging.getLogger(__name__)
+
+# Queued to end a stream; compared by identity, never sent.
+_CLOSE = object()
+
+
+@dataclass
+class _Source:
+    topic: str
+    fetch: Callable[[], bytes]
+    interval: float
+    next_due: float = 0.0
+    last_body: bytes | None = None
+    last_frame: bytes | None = None
+    event_id: int = 0
+
+
+@dataclass(eq=False)
+class Subscriber:
+    topics: frozenset[str]
+    frames: queue.Queue[bytes | object] = field(default_factory=queue.Queue)
+
+
+def encode_frame(topic: str, event_id: int, body: bytes) -> bytes:
+    data = b"\n".join(b"data: " + line for line in body.splitlines() or [b""])
+    return b"event: " + topic.encode("ascii") + b"\nid: " + str(event_id).encode("ascii") + b"\n" + data + b"\n\n"
+
+
+class SnapshotBroadcaster:
+    """Publish changed snapshots from registered sources to SSE subscribers."""
+
+    def __init__(
+        self,
+        *,
+        max_subscribers: int = 500,
+        queue_size: int = 32,
+        keepalive_seconds: float = 20,
+    ) -> None:
+        self.max_subscribers = max(1, int(max_subscribers))
+        self.queue_size = max(1, int(queue_size))
+        self.keepalive_seconds = max(1.0, float(keepalive_seconds))
+        self._sources: dict[str, _Source] = {}
+        self._subscribers: set[Subscriber] = set()
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.published = 0
+        self.dropped_subscribers = 0
+
+    @property
+    def topics(self) -> frozenset[str]:
+        return frozenset(self._sources)
+
+    def register(self, topic: str, fetch: Callable[[], bytes], interval: float) -> None:
+        self._sources[topic] = _Source(topic, fetch, max(0.5, float(interval)))
+
+    def subscribe(self, topics: frozenset[str]) -> Subscriber | None:
+        """Add a subscriber primed with the latest frame of each topic.
+
+        Returns None when the subscriber limit is reached.
+        """
+        self.start()
+        subscriber = Subscriber(topics, queue.Queue(maxsize=self.queue_size))
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            self._subscribers.add(subscriber)
+            for topic in topics:
+                frame = self._sources[topic].last_frame
+                if frame is not None:
+                    subscriber.frames.put_nowait(frame)
+        # Topics nobody watched may not have a snapshot yet.
+        self._wake.set()
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def stream(self, subscriber: Subscriber) -> Iterator[bytes]:
+        """Yield SSE frames for ``subscriber`` until it is dropped or closed."""
+        try:
+            yield b"retry: 5000\n\n"
+            while not self._stop.is_set():
+                try:
+                    frame = subscriber.frames.get(timeout=self.keepalive_seconds)
+                except queue.Empty:
+                    yield b": keepalive\n\n"
+                    continue
+                if frame is _CLOSE:
+                    return
+                yield frame
+        finally:
+            self.unsubscribe(subscriber)
+
+    def _publish(self, source: _Source, body: bytes) -> None:
+        source.event_id += 1
+        frame = encode_frame(source.topic, source.event_id, body)
+        with self._lock:
+            source.last_body = body
+            source.last_frame = frame
+            targets = [sub for sub in self._subscribers if source.topic in sub.topics]
+        for subscriber in targets:
+            try:
+                subscriber.frames.put_nowait(frame)
+            except queue.Full:
+                self._drop(subscriber)
+        self.published += 1
+
+    def _drop(self, subscriber: Subscriber) -> None:
+        self.unsubscribe(subscriber)
+        self.dropped_subscribers += 1
+        # Make room for the close marker so the stream generator exits.
+        try:
+            while True:
+                subscriber.frames.get_nowait()
+        except queue.Empty:
+            pass
+        subscriber.frames.put_nowait(_CLOSE)
+
+    def poll_once(self, now: float | None = None) -> float:
+        """Refresh due sources that have subscribers; return seconds until the next one."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            watched = set().union(*(sub.topics for sub in self._subscribers)) if self._subscribers else set()
+        next_due = now + 60.0
+        for source in self._sources.values():
+            if source.topic in watched and (now >= source.next_due or source.last_frame is None):
+                source.next_due = now + source.interval
+                try:
+                    body = source.fetch()
+                except Exception:
+                    log.warning("SSE source %s failed.", source.topic, exc_info=True)
+                else:
+                    if body != source.last_body:
+                        self._publish(source, body)
+            next_due = min(next_due, source.next_due)
+        return max(0.0, next_due - time.monotonic())
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            delay = self.poll_once()
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            thread = threading.Thread(target=self._run, name="sse-producer", daemon=True)
+            thread.start()
+            self._thread = thread
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def stats(self) -> dict[str, object]:
+        with self._lock:
+            return {
+                "subscribers": len(self._subscribers),
+                "max_subscribers": self.max_subscribers,
+                "published": self.published,
+                "dropped_subscribers": self.dropped_subscribers,
+                "event_ids": {topic: source.event_id for topic, source in self._sources.items()},
+            }
@@ -0,0 +1,638 @@
+"""Versioned schema migrations for the archive/profile SQLite database.
+
+The schema version is stored in ``PRAGMA user_version``. ``migrate()`` reads
+it once and returns immediately when the database is current, so warm
+starts execute no DDL at all.
+
+Run ``python -m cartofia_bot.migrations --check-plans`` to assert that every
+hot query in the API is served by an index rather than a table scan, and
+``--db <path> --check-counters`` (or ``--repair-counters``) to verify the
+denormalized counters on ``user_profiles``. ``--rebuild-rollups`` recomputes
+the homepage feed rollups from the source tables and ``--award-badges``
+applies the current badge rules to every profile.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sqlite3
+import sys
+from dataclasses import dataclass
+from typing import Mapping, Sequence
+
+try:
+    from cartofia_bot.archive_store import BLOB_BY_SHA_SQL
+    from cartofia_bot.badges import (
+        AWARD_BADGE_SQL,
+        BADGE_STATE_SQL,
+        BUMP_BADGE_COUNT_SQL,
+        EARNED_BADGE_KEYS_SQL,
+        award_all_eligible,
+    )
+    from cartofia_bot.queries import (
+        ARCHIVE_ANCHOR_SQL,
+        ARCHIVE_FILE_BY_ID_SQL,
+        ARCHIVE_FIRST_ID_SINCE_SQL,
+        ARCHIVE_LAST_ID_BEFORE_SQL,
+        ARCHIVE_LIST_START,
+        MAX_ROWID,
+        PROFILE_AVATAR_SQL,
+        PROFILE_BADGES_SQL,
+        PROFILE_ROW_SQL,
+        archive_count_sql,
+        archive_files_by_ids_sql,
+        archive_page_sql,
+        profile_batch_badges_sql,
+        profile_batch_rows_sql,
+    )
+    from cartofia_bot.rollups import (
+        BUSIEST_BUCKET_SQL,
+        DAY,
+        HOUR,
+        NEW_PROFILES,
+        PLAYS,
+        UPLOADS,
+        UPSERT_SQL,
+        WINDOW_TOP_SQL,
+        WINDOW_TOTAL_SQL,
+    )
+    from cartofia_bot.rollups import rebuild as rebuild_rollups
+    from cartofia_bot.sharding import (
+        REPOINT_ARCHIVE_BLOBS_SQL,
+        REPOINT_ARCHIVE_FILES_SQL,
+        REPOINT_AVATARS_SQL,
+    )
+except ImportError:  # pragma: no cover - fallback for direct script execution
+    from archive_store import BLOB_BY_SHA_SQL
+    from badges import (
+        AWARD_BADGE_SQL,
+        BADGE_STATE_SQL,
+        BUMP_BADGE_COUNT_SQL,
+        EARNED_BADGE_KEYS_SQL,
+        award_all_eligible,
+    )
+    from queries import (
+        ARCHIVE_ANCHOR_SQL,
+        ARCHIVE_FILE_BY_ID_SQL,
+        ARCHIVE_FIRST_ID_SINCE_SQL,
+        ARCHIVE_LAST_ID_BEFORE_SQL,
+        ARCHIVE_LIST_START,
+        MAX_ROWID,
+        PROFILE_AVATAR_SQL,
+        PROFILE_BADGES_SQL,
+        PROFILE_ROW_SQL,
+        archive_count_sql,
+        archive_files_by_ids_sql,
+        archive_page_sql,
+        profile_batch_badges_sql,
+        profile_batch_rows_sql,
+    )
+    from rollups import (
+        BUSIEST_BUCKET_SQL,
+        DAY,
+        HOUR,
+        NEW_PROFILES,
+        PLAYS,
+        UPLOADS,
+        UPSERT_SQL,
+        WINDOW_TOP_SQL,
+        WINDOW_TOTAL_SQL,
+    )
+    from rollups import rebuild as rebuild_rollups
+    from sharding import (
+        REPOINT_ARCHIVE_BLOBS_SQL,
+        REPOINT_ARCHIVE_FILES_SQL,
+        REPOINT_AVATARS_SQL,
+    )
+
+log = logging.getLogger(__name__)
+
+
+_PROFILE_COUNTER_SQL = {
+    "upload_count": "SELECT COUNT(*) FROM archive_files WHERE uploaded_by = user_profiles.username",
+    "upload_bytes": (
+        "SELECT COALESCE(SUM(size_bytes), 0) FROM archive_files "
+        "WHERE uploaded_by = user_profiles.username"
+    ),
+    "badge_count": "SELECT COUNT(*) FROM user_badges WHERE username = user_profiles.username",
+}
+
+
+def recount_profile_counters(conn: sqlite3.Connection) -> None:
+    """Recompute every denormalized counter on user_profiles from source rows."""
+    assignments = ", ".join(f"{column} = ({sql})" for column, sql in _PROFILE_COUNTER_SQL.items())
+    conn.execute(f"UPDATE user_profiles SET {assignments}")
+
+
+def profile_counter_drift(conn: sqlite3.Connection) -> list[dict[str, object]]:
+    """Return profiles whose stored counters disagree with the source tables."""
+    expected = ", ".join(f"({sql}) AS expected_{column}" for column, sql in _PROFILE_COUNTER_SQL.items())
+    rows = conn.execute(
+        f"SELECT username, upload_count, upload_bytes, badge_count, {expected} FROM user_profiles"
+    ).fetchall()
+    drift: list[dict[str, object]] = []
+    for row in rows:
+        stored = dict(zip(_PROFILE_COUNTER_SQL, row[1:4]))
+        actual = dict(zip(_PROFILE_COUNTER_SQL, row[4:7]))
+        if stored != actual:
+            drift.append({"username": row[0], "stored": stored, "expected": actual})
+    return drift
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    # Backfills are plain SQL frozen here as of the migration's version, never
+    # calls into application code, so replaying an old migration does not
+    # change when rules or rollups evolve. Re-derive current state with the
+    # --repair-counters / --award-badges / --rebuild-rollups commands instead.
+    statements: tuple[str, ...] = ()
+
+
+_NOW_SQL = "strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')"
+
+# Feed rollups as defined by migration 8: (granularity, bucket prefix length).
+_V8_ROLLUP_GRANULARITIES = (("hour", 13), ("day", 10))
+_V8_ROLLUP_SOURCES = (
+    # (metric, bucket column, dimension, value, FROM/WHERE, extra GROUP BY)
+    ("new_profiles", "created_at", "''", "COUNT(*)", "user_profiles", ""),
+    ("uploads", "uploaded_at", "''", "COUNT(*)", "archive_files", ""),
+    ("uploads", "uploaded_at", "uploaded_by", "COUNT(*)", "archive_files", ", 4"),
+    ("upload_bytes", "uploaded_at", "''", "SUM(size_bytes)", "archive_files", ""),
+    (
+        "plays",
+        "logged_at",
+        "game_name",
+        "COUNT(*)",
+        "activity_log WHERE event_type = 'played_game' AND game_name != ''",
+        ", 4",
+    ),
+    (
+        "plays",
+        "logged_at",
+        "''",
+        "COUNT(*)",
+        "activity_log WHERE event_type = 'played_game' AND game_name != ''",
+        "",
+    ),
+)
+_V8_ROLLUP_BACKFILL = ("DELETE FROM feed_rollups",) + tuple(
+    f"""
+    INSERT INTO feed_rollups (granularity, metric, bucket, dimension, value)
+    SELECT '{granularity}', '{metric}', substr({column}, 1, {length}), {dimension}, {value}
+    FROM {source}
+    GROUP BY 3{group_by}
+    """
+    for granularity, length in _V8_ROLLUP_GRANULARITIES
+    for metric, column, dimension, value, source, group_by in _V8_ROLLUP_SOURCES
+)
+
+
+MIGRATIONS: tuple[Migration, ...] = (
+    Migration(
+        1,
+        "base archive and profile tables",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS archive_files (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                original_name TEXT NOT NULL,
+                stored_name TEXT NOT NULL UNIQUE,
+                size_bytes INTEGER NOT NULL,
+                uploaded_by TEXT NOT NULL,
+                uploaded_at TEXT NOT NULL
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS user_profiles (
+                username TEXT PRIMARY KEY,
+                email TEXT NOT NULL DEFAULT '',
+                display_name TEXT NOT NULL DEFAULT '',
+                picture_filename TEXT NOT NULL DEFAULT '',
+                picture_updated_at TEXT NOT NULL DEFAULT '',
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS user_badges (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT NOT NULL,
+                badge_key TEXT NOT NULL,
+                source TEXT NOT NULL DEFAULT 'auto',
+                awarded_at TEXT NOT NULL,
+                UNIQUE(username, badge_key)
+            )
+            """,
+        ),
+    ),
+    Migration(
+        2,
+        "indexes for upload counts, feed windows and badge lookups",
+        (
+            "CREATE INDEX IF NOT EXISTS idx_archive_files_uploaded_by ON archive_files (uploaded_by, id)",
+            "CREATE INDEX IF NOT EXISTS idx_archive_files_uploaded_at ON archive_files (uploaded_at)",
+            "CREATE INDEX IF NOT EXISTS idx_user_profiles_created_at ON user_profiles (created_at)",
+            "CREATE INDEX IF NOT EXISTS idx_user_badges_username ON user_badges (username, awarded_at)",
+        ),
+    ),
+    Migration(
+        3,
+        "indexes for keyset-paginated archive listing by size",
+        (
+            "CREATE INDEX IF NOT EXISTS idx_archive_files_size ON archive_files (size_bytes, id)",
+            """
+            CREATE INDEX IF NOT EXISTS idx_archive_files_uploader_size
+            ON archive_files (uploaded_by, size_bytes, id)
+            """,
+        ),
+    ),
+    Migration(
+        4,
+        "denormalized upload and badge counters on user_profiles",
+        (
+            "ALTER TABLE user_profiles ADD COLUMN upload_count INTEGER NOT NULL DEFAULT 0",
+            "ALTER TABLE user_profiles ADD COLUMN upload_bytes INTEGER NOT NULL DEFAULT 0",
+            "ALTER TABLE user_profiles ADD COLUMN badge_count INTEGER NOT NULL DEFAULT 0",
+            """
+            UPDATE user_profiles SET
+                upload_count = (SELECT COUNT(*) FROM archive_files
+                                WHERE uploaded_by = user_profiles.username),
+                upload_bytes = (SELECT COALESCE(SUM(size_bytes), 0) FROM archive_files
+                                WHERE uploaded_by = user_profiles.username),
+                badge_count = (SELECT COUNT(*) FROM user_badges
+                               WHERE username = user_profiles.username)
+            """,
+        ),
+    ),
+    Migration(
+        5,
+        "award badges earned before badges became event-driven",
+        (
+            # The badge rules as they stood at schema version 5.
+            f"""
+            INSERT OR IGNORE INTO user_badges (username, badge_key, source, awarded_at)
+            SELECT username, 'first_login', 'auto', {_NOW_SQL} FROM user_profiles
+            """,
+            f"""
+            INSERT OR IGNORE INTO user_badges (username, badge_key, source, awarded_at)
+            SELECT username, 'archive_uploader', 'auto', {_NOW_SQL} FROM user_profiles
+            WHERE upload_count >= 1
+            """,
+            f"""
+            INSERT OR IGNORE INTO user_badges (username, badge_key, source, awarded_at)
+            SELECT username, 'archive_veteran', 'auto', {_NOW_SQL} FROM user_profiles
+            WHERE upload_count >= 10
+            """,
+            f"""
+            INSERT OR IGNORE INTO user_badges (username, badge_key, source, awarded_at)
+            SELECT username, 'avatar_ready', 'auto', {_NOW_SQL} FROM user_profiles
+            WHERE picture_filename != ''
+            """,
+            """
+            UPDATE user_profiles SET badge_count = (
+                SELECT COUNT(*) FROM user_badges WHERE username = user_profiles.username
+            )
+            """,
+        ),
+    ),
+    Migration(
+        6,
+        "presence snapshot and per-minute online history",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS presence_visitors (
+                visitor_id TEXT PRIMARY KEY,
+                page TEXT NOT NULL,
+                last_seen REAL NOT NULL
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS presence_minutes (
+                minute INTEGER PRIMARY KEY,
+                online INTEGER NOT NULL,
+                pages TEXT NOT NULL DEFAULT '{}'
+            )
+            """,
+        ),
+    ),
+    Migration(
+        7,
+        "activity_log for arcade game events",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS activity_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT NOT NULL,
+                event_type TEXT NOT NULL,
+                game_name TEXT NOT NULL DEFAULT '',
+                result TEXT NOT NULL DEFAULT '',
+                duration_seconds INTEGER,
+                metadata TEXT NOT NULL DEFAULT '{}',
+                logged_at TEXT NOT NULL
+            )
+            """,
+            # Covers the feed's "most played today" window + GROUP BY and
+            # the retention prune.
+            """
+            CREATE INDEX IF NOT EXISTS idx_activity_log_logged_at
+            ON activity_log (logged_at, event_type, game_name)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_activity_log_username
+            ON activity_log (username, logged_at)
+            """,
+        ),
+    ),
+    Migration(
+        8,
+        "hourly/daily feed rollups maintained on write",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS feed_rollups (
+                granularity TEXT NOT NULL,
+                metric TEXT NOT NULL,
+                bucket TEXT NOT NULL,
+                dimension TEXT NOT NULL DEFAULT '',
+                value INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (granularity, metric, bucket, dimension)
+            ) WITHOUT ROWID
+            """,
+            *_V8_ROLLUP_BACKFILL,
+        ),
+    ),
+    Migration(
+        9,
+        "content-addressed archive blobs; archive_files rows may share a stored file",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS archive_blobs (
+                sha256 TEXT PRIMARY KEY,
+                stored_name TEXT NOT NULL UNIQUE,
+                size_bytes INTEGER NOT NULL,
+                ref_count INTEGER NOT NULL DEFAULT 0,
+                created_at TEXT NOT NULL
+            )
+            """,
+            # SQLite cannot drop the UNIQUE(stored_name) constraint in place,
+            # so rebuild archive_files with the new sha256 column.
+            """
+            CREATE TABLE archive_files_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                original_name TEXT NOT NULL,
+                stored_name TEXT NOT NULL,
+                sha256 TEXT NOT NULL DEFAULT '',
+                size_bytes INTEGER NOT NULL,
+                uploaded_by TEXT NOT NULL,
+                uploaded_at TEXT NOT NULL
+            )
+            """,
+            """
+            INSERT INTO archive_files_new (id, original_name, stored_name, size_bytes, uploaded_by, uploaded_at)
+            SELECT id, original_name, stored_name, size_bytes, uploaded_by, uploaded_at FROM archive_files
+            """,
+            "DROP TABLE archive_files",
+            "ALTER TABLE archive_files_new RENAME TO archive_files",
+            "CREATE INDEX IF NOT EXISTS idx_archive_files_uploaded_by ON archive_files (uploaded_by, id)",
+            "CREATE INDEX IF NOT EXISTS idx_archive_files_uploaded_at ON archive_files (uploaded_at)",
+            "CREATE INDEX IF NOT EXISTS idx_archive_files_size ON archive_files (size_bytes, id)",
+            """
+            CREATE INDEX IF NOT EXISTS idx_archive_files_uploader_size
+            ON archive_files (uploaded_by, size_bytes, id)
+            """,
+        ),
+    ),
+    Migration(
+        10,
+        "resumable archive upload sessions",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS archive_upload_sessions (
+                id TEXT PRIMARY KEY,
+                username TEXT NOT NULL,
+                original_name TEXT NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                received_bytes INTEGER NOT NULL DEFAULT 0,
+                created_at TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_archive_upload_sessions_user
+            ON archive_upload_sessions (username, expires_at)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_archive_upload_sessions_expires
+            ON archive_upload_sessions (expires_at)
+            """,
+        ),
+    ),
+    Migration(
+        11,
+        "look up archive rows by stored file so sharding can repoint them",
+        (
+            "CREATE INDEX IF NOT EXISTS idx_archive_files_stored_name ON archive_files (stored_name)",
+        ),
+    ),
+    Migration(
+        12,
+        "look up profiles by avatar file so sharding can repoint them",
+        (
+            "CREATE INDEX IF NOT EXISTS idx_user_profiles_picture_filename "
+            "ON user_profiles (picture_filename)",
+        ),
+    ),
+    Migration(
+        13,
+        "upload session state so completing one is an atomic claim",
+        (
+            "ALTER TABLE archive_upload_sessions ADD COLUMN state TEXT NOT NULL DEFAULT 'open'",
+        ),
+    ),
+)
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+# Queries on request paths that must never fall back to a full table scan.
+# Every entry is the SQL object the endpoint executes, imported from where it
+# is defined, so the gate cannot drift from the code it guards.
+_SAMPLE_SHA = "0" * 64
+
+
+def _hot_queries() -> dict[str, tuple[str, Sequence[object] | Mapping[str, object]]]:
+    hot: dict[str, tuple[str, Sequence[object] | Mapping[str, object]]] = {}
+    week = "2000-01-01"
+    hour = "2000-01-01T00"
+    hot["feed_new_profiles_week"] = (WINDOW_TOTAL_SQL, (DAY, NEW_PROFILES, week, ""))
+    hot["feed_uploads_week"] = (WINDOW_TOTAL_SQL, (DAY, UPLOADS, week, ""))
+    hot["feed_top_uploader_week"] = (WINDOW_TOP_SQL, (DAY, UPLOADS, week))
+    hot["feed_top_game_day"] = (WINDOW_TOP_SQL, (HOUR, PLAYS, hour))
+    hot["feed_busiest_hour"] = (BUSIEST_BUCKET_SQL, (HOUR, PLAYS, hour))
+    hot["feed_rollup_upsert"] = (UPSERT_SQL, (HOUR, PLAYS, hour, "", 1))
+
+    hot["profile_row"] = (PROFILE_ROW_SQL, ("user",))
+    hot["profile_avatar"] = (PROFILE_AVATAR_SQL, ("user",))
+    hot["profile_badges"] = (PROFILE_BADGES_SQL, ("user",))
+    hot["profile_batch_rows"] = (profile_batch_rows_sql(3), ("a", "b", "c"))
+    hot["profile_batch_badges"] = (profile_batch_badges_sql(3), ("a", "b", "c"))
+    hot["badge_state"] = (BADGE_STATE_SQL, ("user",))
+    hot["badge_earned_keys"] = (EARNED_BADGE_KEYS_SQL, ("user",))
+    hot["badge_award"] = (AWARD_BADGE_SQL, ("user", "first_login", "auto", week))
+    hot["badge_count_bump"] = (BUMP_BADGE_COUNT_SQL, ("user",))
+
+    # Every listing variant list_archive_files can build: first pages use the
+    # sort's start anchor, later pages a real row; since/until narrow the id range.
+    for uploader in (False, True):
+        suffix = "_by_uploader" if uploader else ""
+        count_params: dict[str, object] = {"min_id": 1, "max_id": MAX_ROWID}
+        if uploader:
+            count_params["uploader"] = "user"
+        hot[f"archive_count{suffix}"] = (archive_count_sql(uploader), count_params)
+        for sort, (anchor_size, anchor_id) in ARCHIVE_LIST_START.items():
+            first = {**count_params, "anchor_size": anchor_size, "anchor_id": anchor_id, "limit": 51}
+            later = {**first, "min_id": 10, "max_id": 500, "anchor_size": 1024, "anchor_id": 100}
+            hot[f"archive_page_{sort}{suffix}"] = (archive_page_sql(sort, uploader), first)
+            hot[f"archive_page_{sort}{suffix}_after"] = (archive_page_sql(sort, uploader), later)
+    hot["archive_anchor"] = (ARCHIVE_ANCHOR_SQL, (100,))
+    hot["archive_since_first_id"] = (ARCHIVE_FIRST_ID_SINCE_SQL, (week,))
+    hot["archive_until_last_id"] = (ARCHIVE_LAST_ID_BEFORE_SQL, (week,))
+    hot["archive_file_by_id"] = (ARCHIVE_FILE_BY_ID_SQL, (1,))
+    hot["archive_files_by_ids"] = (archive_files_by_ids_sql(3), (1, 2, 3))
+    hot["archive_blob_by_sha"] = (BLOB_BY_SHA_SQL, (_SAMPLE_SHA,))
+
+    # Run by the online sharding migration while the API is serving.
+    hot["shard_repoint_files"] = (REPOINT_ARCHIVE_FILES_SQL, ("ab/cd/name", "name"))
+    hot["shard_repoint_blobs"] = (REPOINT_ARCHIVE_BLOBS_SQL, ("ab/cd/name", "name"))
+    hot["shard_repoint_avatars"] = (REPOINT_AVATARS_SQL, ("ab/cd/name", "name"))
+    return hot
+
+
+HOT_QUERIES = _hot_queries()
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return int(conn.execute("PRAGMA user_version").fetchone()[0])
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Apply pending migrations and return the resulting schema version."""
+    if schema_version(conn) >= SCHEMA_VERSION:
+        return SCHEMA_VERSION
+
+    for migration in MIGRATIONS:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-read under the write lock in case another worker migrated first.
+            if schema_version(conn) >= migration.version:
+                conn.rollback()
+                continue
+            for statement in migration.statements:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {int(migration.version)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        log.info("Applied schema migration %s: %s", migration.version, migration.description)
+    return schema_version(conn)
+
+
+def query_plan_scans(conn: sqlite3.Connection) -> dict[str, list[str]]:
+    """Return hot queries whose plan contains a full table scan."""
+    offenders: dict[str, list[str]] = {}
+    for name, (sql, params) in HOT_QUERIES.items():
+        rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+        details = [str(row[-1]) for row in rows]
+        # "SCAN t USING COVERING INDEX" still walks the whole index.
+        scans = [detail for detail in details if detail.startswith("SCAN ")]
+        if scans:
+            offenders[name] = details
+    return offenders
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Apply or verify archive DB migrations.")
+    parser.add_argument(
+        "--db",
+        default=":memory:",
+        help="database path (defaults to a fresh in-memory database)",
+    )
+    parser.add_argument(
+        "--check-plans",
+        action="store_true",
+        help="fail if any hot query is planned as a table scan",
+    )
+    parser.add_argument(
+        "--check-counters",
+        action="store_true",
+        help="fail if user_profiles counters drifted from archive_files/user_badges",
+    )
+    parser.add_argument(
+        "--repair-counters",
+        action="store_true",
+        help="recompute all user_profiles counters (one-shot backfill)",
+    )
+    parser.add_argument(
+        "--award-badges",
+        action="store_true",
+        help="award every badge the current rules say a profile has earned",
+    )
+    parser.add_argument(
+        "--rebuild-rollups",
+        action="store_true",
+        help="recompute feed_rollups from profiles, uploads and activity_log",
+    )
+    args = parser.parse_args(argv)
+
+    conn = sqlite3.connect(args.db)
+    try:
+        version = migrate(conn)
+        print(f"schema version {version}")
+        failed = False
+
+        if args.repair_counters:
+            with conn:
+                recount_profile_counters(conn)
+            print("profile counters recomputed")
+
+        if args.award_badges:
+            with conn:
+                awarded = award_all_eligible(conn)
+            print(f"{awarded} badges awarded")
+
+        if args.rebuild_rollups:
+            with conn:
+                rebuild_rollups(conn)
+            print("feed rollups rebuilt")
+
+        if args.check_counters:
+            drift = profile_counter_drift(conn)
+            for entry in drift:
+                print(
+                    f"counter drift for {entry['username']!r}: "
+                    f"stored {entry['stored']} expected {entry['expected']}",
+                    file=sys.stderr,
+                )
+            if drift:
+                failed = True
+            else:
+                print("profile counters are consistent")
+
+        if args.check_plans:
+            offenders = query_plan_scans(conn)
+            for name, details in offenders.items():
+                print(f"SCAN in hot query {name!r}: {'; '.join(details)}", file=sys.stderr)
+            if offenders:
+                failed = True
+            else:
+                print(f"{len(HOT_QUERIES)} hot queries use indexes")
+
+        return 1 if failed else 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+"""Local verification of signed OIDC access tokens against a cached JWKS."""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any
+from urllib.parse import unquote, urlparse
+
+import jwt
+import requests
+
+log = logging.getLogger(__name__)
+
+
+def looks_like_jwt(token: str) -> bool:
+    """Return True for compact JWS strings (three dot-separated segments)."""
+    parts = token.split(".")
+    return len(parts) == 3 and all(parts)
+
+
+class JwksCache:
+    """Hold the signing keys of a JWKS document and keep them fresh.
+
+    ``source`` may be an ``http(s)://`` URL, a ``file://`` URL or a plain
+    filesystem path; the latter two make it easy to run against a locally
+    generated key set. The document is fetched once on first use and then
+    refreshed by a daemon thread every ``refresh_interval`` seconds. A token
+    signed with an unknown ``kid`` forces an early refresh so key rotation is
+    picked up immediately. Forced refreshes run at most once per
+    ``min_refresh_interval`` after the last attempt, successful or not, and
+    never make a request wait behind a fetch already in progress, so an
+    unreachable JWKS endpoint rejects tokens quickly instead of stalling.
+    """
+
+    def __init__(
+        self,
+        source: str,
+        refresh_interval: float = 3600.0,
+        min_refresh_interval: float = 30.0,
+        session: requests.Session | None = None,
+        timeout: float = 10.0,
+    ) -> None:
+        self.source = source.strip()
+        self.refresh_interval = max(10.0, float(refresh_interval))
+        self.min_refresh_interval = max(0.0, float(min_refresh_interval))
+        self.timeout = timeout
+        self._session = session or requests.Session()
+        self._keys: dict[str, jwt.PyJWK] = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._last_attempt: float | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def _load_document(self) -> dict[str, Any]:
+        parsed = urlparse(self.source)
+        if parsed.scheme in ("http", "https"):
+            resp = self._session.get(self.source, timeout=self.timeout)
+            resp.raise_for_status()
+            return resp.json()
+        path = Path(unquote(parsed.path)) if parsed.scheme == "file" else Path(self.source)
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reload the key set. Returns True when new keys were installed."""
+        # A forced refresh comes from a request; if another thread is already
+        # fetching, give up instead of queueing behind its timeout.
+        if not self._refresh_lock.acquire(blocking=not force):
+            return False
+        try:
+            now = time.monotonic()
+            if (
+                force
+                and self._last_attempt is not None
+                and now - self._last_attempt < self.min_refresh_interval
+            ):
+                return False
+            self._last_attempt = now
+            return self._install(self._fetch_keys())
+        finally:
+            self._refresh_lock.release()
+
+    def _fetch_keys(self) -> dict[str, jwt.PyJWK]:
+        try:
+            document = self._load_document()
+        except (OSError, ValueError, requests.RequestException) as exc:
+            log.warning("JWKS refresh from %s failed: %s", self.source, exc)
+            return {}
+        if not isinstance(document, dict):
+            log.warning(
+                "JWKS refresh from %s failed: expected a JSON object, got %s",
+                self.source,
+                type(document).__name__,
+            )
+            return {}
+
+        keys: dict[str, jwt.PyJWK] = {}
+        for index, raw_key in enumerate(document.get("keys", []) or []):
+            if not isinstance(raw_key, dict) or raw_key.get("use", "sig") != "sig":
+                continue
+            try:
+                key = jwt.PyJWK(raw_key)
+            except jwt.PyJWTError as exc:
+                log.debug("Skipping unusable JWKS key %s: %s", raw_key.get("kid"), exc)
+                continue
+            keys[str(raw_key.get("kid") or f"#{index}")] = key
+
+        if not keys:
+            log.warning("JWKS document from %s contained no usable signing keys.", self.source)
+        return keys
+
+    def _install(self, keys: dict[str, jwt.PyJWK]) -> bool:
+        if not keys:
+            return False
+        with self._lock:
+            self._keys = keys
+        return True
+
+    def start(self) -> None:
+        """Load keys synchronously and start the background refresher once."""
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self.refresh()
+            thread = threading.Thread(
+                target=self._refresh_loop, name="jwks-refresh", daemon=True
+            )
+            thread.start()
+            self._thread = thread
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.wait(self.refresh_interval):
+            self.refresh()
+
+    def get_key(self, kid: str | None) -> jwt.PyJWK | None:
+        if self._thread is None:
+            self.start()
+        with self._lock:
+            keys = self._keys
+        if kid is None:
+            return next(iter(keys.values())) if len(keys) == 1 else None
+        key = keys.get(kid)
+        if key is None and self.refresh(force=True):
+            with self._lock:
+                key = self._keys.get(kid)
+        return key
+
+
+class JwtVerifier:
+    """Validate signature, ``exp``, ``aud`` and ``iss`` of access tokens."""
+
+    def __init__(
+        self,
+        jwks: JwksCache,
+        issuer: str | None = None,
+        audiences: list[str] | None = None,
+        algorithms: list[str] | None = None,
+        leeway: float = 30.0,
+    ) -> None:
+        self.jwks = jwks
+        self.issuer = issuer or None
+        self.audiences = list(audiences or [])
+        self.algorithms = list(algorithms or ["RS256"])
+        self.leeway = leeway
+
+    def verify(self, token: str) -> dict[str, Any] | None:
+        """Return the token claims, or None when the token is not acceptable."""
+        try:
+            header = jwt.get_unverified_header(token)
+        except jwt.PyJWTError:
+            return None
+        if header.get("alg") not in self.algorithms:
+            return None
+
+        key = self.jwks.get_key(header.get("kid"))
+        if key is None:
+            log.debug("No JWKS key matches token kid %r.", header.get("kid"))
+            return None
+
+        try:
+            claims = jwt.decode(
+                token,
+                key=key.key,
+                algorithms=self.algorithms,
+                audience=self.audiences or None,
+                issuer=self.issuer,
+                leeway=self.leeway,
+                options={
+                    "require": ["exp"],
+                    "verify_aud": bool(self.audiences),
+                    "verify_iss": bool(self.issuer),
+                },
+            )
+        except jwt.PyJWTError as exc:
+            log.debug("Rejected access token: %s", exc)
+            return None
+        return claims if isinstance(claims, dict) else None
@@ -0,0 +1,23 @@
+"""Default archive locations shared by the API server and maintenance CLIs.
+
+Defaults are anchored to the repository root rather than the working
+directory, so ``python -m cartofia_bot.<tool>`` run from anywhere opens the
+same database and file tree as the API server.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+
+
+def archive_data_dir() -> Path:
+    """``ARCHIVE_DATA_DIR``, defaulting to ``<repo>/archive_data``."""
+    return Path(os.getenv("ARCHIVE_DATA_DIR", str(ROOT_DIR / "archive_data"))).resolve()
+
+
+def archive_db_path() -> Path:
+    """``ARCHIVE_DB_PATH``, defaulting to ``archive.db`` in the data directory."""
+    return Path(os.getenv("ARCHIVE_DB_PATH", str(archive_data_dir() / "archive.db"))).resolve()
@@ -0,0 +1,224 @@
+"""In-memory visitor presence behind ``/api/heartbeat`` and ``/api/online``.
+
+Visitors are kept in an ordered map sorted by last heartbeat, so expiring
+stale visitors only ever looks at the oldest entries, and per-page / per-game
+counts are maintained incrementally. Reading the online count is O(1) plus
+whatever expiry is due. Memory is bounded by ``max_visitors``.
+
+A background thread periodically snapshots live visitors and a per-minute
+aggregate to SQLite so counts survive restarts.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import AbstractContextManager
+from typing import Callable
+
+log = logging.getLogger(__name__)
+
+VISITOR_ID_MAX_LENGTH = 64
+PAGE_MAX_LENGTH = 128
+_GAME_PAGE_RE = re.compile(r"^/arcade/([a-z0-9][a-z0-9-]{0,39})(?:/|$)")
+
+
+def normalize_page(raw: object) -> str:
+    """Reduce a client-supplied location to a bounded path key."""
+    page = str(raw or "").strip().split("?", 1)[0].split("#", 1)[0]
+    if not page.startswith("/"):
+        page = "/" + page
+    if page.endswith("/index.html"):
+        page = page[: -len("index.html")]
+    return page[:PAGE_MAX_LENGTH]
+
+
+def game_for_page(page: str) -> str | None:
+    match = _GAME_PAGE_RE.match(page)
+    return match.group(1) if match else None
+
+
+class PresenceTracker:
+    """Count visitors seen within the last ``window_seconds``."""
+
+    def __init__(
+        self,
+        connect: Callable[[], AbstractContextManager[sqlite3.Connection]] | None = None,
+        *,
+        window_seconds: float = 120,
+        max_visitors: int = 50000,
+        flush_interval: float = 60,
+        history_retention_days: int = 7,
+    ) -> None:
+        self.connect = connect
+        self.window_seconds = max(1.0, float(window_seconds))
+        self.max_visitors = max(1, int(max_visitors))
+        self.flush_interval = max(1.0, float(flush_interval))
+        self.history_retention_days = max(1, int(history_retention_days))
+        # visitor_id -> (last_seen epoch seconds, page), oldest first.
+        self._visitors: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._pages: Counter[str] = Counter()
+        self._games: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.dropped = 0
+
+    def _add(self, visitor_id: str, seen_at: float, page: str) -> None:
+        self._visitors[visitor_id] = (seen_at, page)
+        self._pages[page] += 1
+        game = game_for_page(page)
+        if game:
+            self._games[game] += 1
+
+    def _remove(self, visitor_id: str) -> None:
+        _seen_at, page = self._visitors.pop(visitor_id)
+        self._pages[page] -= 1
+        if self._pages[page] <= 0:
+            del self._pages[page]
+        game = game_for_page(page)
+        if game:
+            self._games[game] -= 1
+            if self._games[game] <= 0:
+                del self._games[game]
+
+    def _expire(self, now: float) -> None:
+        cutoff = now - self.window_seconds
+        while self._visitors:
+            visitor_id, (seen_at, _page) = next(iter(self._visitors.items()))
+            if seen_at >= cutoff:
+                break
+            self._remove(visitor_id)
+
+    def record(self, visitor_id: str, page: str, now: float | None = None) -> None:
+        self.start()
+        now = time.time() if now is None else now
+        with self._lock:
+            if visitor_id in self._visitors:
+                self._remove(visitor_id)
+            elif len(self._visitors) >= self.max_visitors:
+                self._expire(now)
+                if len(self._visitors) >= self.max_visitors:
+                    self._remove(next(iter(self._visitors)))
+                    self.dropped += 1
+            self._add(visitor_id, now, page)
+
+    def online_count(self, now: float | None = None) -> int:
+        self.start()
+        with self._lock:
+            self._expire(time.time() if now is None else now)
+            return len(self._visitors)
+
+    def snapshot(self, now: float | None = None) -> dict[str, object]:
+        self.start()
+        with self._lock:
+            self._expire(time.time() if now is None else now)
+            return {
+                "count": len(self._visitors),
+                "pages": dict(self._pages),
+                "games": dict(self._games),
+            }
+
+    # -- persistence -----------------------------------------------------
+
+    def restore(self) -> int:
+        """Reload visitors still inside the window from the last snapshot."""
+        if self.connect is None:
+            return 0
+        cutoff = time.time() - self.window_seconds
+        try:
+            with self.connect() as conn:
+                rows = conn.execute(
+                    """
+                    SELECT visitor_id, page, last_seen
+                    FROM presence_visitors
+                    WHERE last_seen >= ?
+                    ORDER BY last_seen ASC
+                    LIMIT ?
+                    """,
+                    (cutoff, self.max_visitors),
+                ).fetchall()
+        except sqlite3.Error:
+            log.warning("Could not restore presence snapshot.", exc_info=True)
+            return 0
+        with self._lock:
+            for visitor_id, page, last_seen in rows:
+                if visitor_id not in self._visitors:
+                    self._add(str(visitor_id), float(last_seen), str(page))
+        return len(rows)
+
+    def flush(self, now: float | None = None) -> None:
+        """Write live visitors and this minute's aggregate to SQLite."""
+        if self.connect is None:
+            return
+        now = time.time() if now is None else now
+        with self._lock:
+            self._expire(now)
+            visitors = [
+                (visitor_id, page, seen_at)
+                for visitor_id, (seen_at, page) in self._visitors.items()
+            ]
+            pages = dict(self._pages)
+        minute = int(now // 60) * 60
+        with self.connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM presence_visitors")
+                conn.executemany(
+                    "INSERT INTO presence_visitors (visitor_id, page, last_seen) VALUES (?, ?, ?)",
+                    visitors,
+                )
+                conn.execute(
+                    """
+                    INSERT INTO presence_minutes (minute, online, pages)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT(minute) DO UPDATE SET
+                        online = excluded.online,
+                        pages = excluded.pages
+                    WHERE excluded.online >= presence_minutes.online
+                    """,
+                    (minute, len(visitors), json.dumps(pages, separators=(",", ":"))),
+                )
+                conn.execute(
+                    "DELETE FROM presence_minutes WHERE minute < ?",
+                    (minute - self.history_retention_days * 86400,),
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+    def start(self) -> None:
+        """Restore the last snapshot and start the flusher once."""
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self.restore()
+            thread = threading.Thread(target=self._flush_loop, name="presence-flush", daemon=True)
+            thread.start()
+            self._thread = thread
+
+    def stop(self) -> None:
+        """Stop the flusher and write a final snapshot."""
+        self._stop.set()
+        if self._thread is None:
+            return
+        try:
+            self.flush()
+        except sqlite3.Error:
+            log.warning("Final presence flush failed.", exc_info=True)
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except sqlite3.Error:
+                log.warning("Presence flush failed.", exc_info=True)
@@ -7,6 +7,8 @@ from typing import Any
 
 import requests
 
+from cartofia_bot.circuit_breaker import BreakerGroup, CircuitBreaker, CircuitOpenError
+
 log = logging.getLogger(__name__)
 
 
@@ -26,8 +28,14 @@ class ProxmoxConfig:
 
 
 class ProxmoxClient:
-    def __init__(self, config: ProxmoxConfig) -> None:
+    def __init__(self, config: ProxmoxConfig, breaker: CircuitBreaker | None = None) -> None:
         self.config = config
+        # Host-level calls share ``breaker``; calls under nodes/<node>/ use that
+        # node's breaker, so one dead node does not block the others.
+        self.breaker = breaker or CircuitBreaker(f"proxmox-client:{config.host}")
+        self.node_breakers = BreakerGroup(f"proxmox-client:{config.host}")
+        # Last successful GET per path, served (marked stale) while the circuit is open.
+        self._last_good: dict[str, dict[str, Any]] = {}
         self.session = requests.Session()
         self.session.headers.update(
             {
@@ -36,7 +44,25 @@ class ProxmoxClient:
         )
         self.session.verify = config.verify_ssl
 
+    def _breaker_for(self, path: str) -> CircuitBreaker:
+        parts = path.strip("/").split("/")
+        if len(parts) > 2 and parts[0] == "nodes":
+            return self.node_breakers.get(parts[1])
+        return self.breaker
+
     def _get(self, path: str) -> dict[str, Any]:
+        try:
+            data = self._breaker_for(path).call(self._request_get, path)
+        except CircuitOpenError:
+            last_good = self._last_good.get(path)
+            if last_good is None:
+                raise
+            return {**last_good, "stale": True}
+        if isinstance(data, dict):
+            self._last_good[path] = data
+        return data
+
+    def _request_get(self, path: str) -> dict[str, Any]:
         url = f"{self.config.base_url}/{path.lstrip('/')}"
         log.debug("GET %s", url)
         resp = self.session.get(url, timeout=5)
@@ -45,6 +71,9 @@ class ProxmoxClient:
         return data["data"]
 
     def _post(self, path: str, data: dict[str, Any] | None = None) -> dict[str, Any]:
+        return self._breaker_for(path).call(self._request_post, path, data)
+
+    def _request_post(self, path: str, data: dict[str, Any] | None = None) -> dict[str, Any]:
         url = f"{self.config.base_url}/{path.lstrip('/')}"
         log.debug("POST %s data=%s", url, data)
         resp = self.session.post(url, data=data or {}, timeout=5)
@@ -1,16 +1,52 @@
-"""Proxmox statistics module for fetching live infrastructure metrics."""
+"""Proxmox statistics module for fetching live infrastructure metrics.
+
+With ``PROXMOX_CLUSTER=true`` every node of the cluster is covered: guests
+for all nodes come from a single ``/cluster/resources`` call, the node list
+is discovered via ``/nodes`` and cached, and per-node status calls fan out
+in parallel. Otherwise only ``PROXMOX_NODE`` is queried.
+"""
 
 from __future__ import annotations
 
 import logging
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, Callable, Mapping
 
 import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from cartofia_bot.caching import SingleFlight, TTLCache
+    from cartofia_bot.circuit_breaker import BreakerGroup, CircuitBreaker, CircuitOpenError
+except ImportError:  # pragma: no cover - fallback for direct script execution
+    from caching import SingleFlight, TTLCache
+    from circuit_breaker import BreakerGroup, CircuitBreaker, CircuitOpenError
 
 log = logging.getLogger(__name__)
 
+CONTAINERS = "containers"
+VMS = "vms"
+NODE = "node"
+SECTIONS = (CONTAINERS, VMS, NODE)
+
+# Loaders take the fetch's absolute time.monotonic() deadline (None: no fetch-wide budget).
+_Loader = Callable[[float | None], dict[str, Any]]
+_Fallback = Callable[[], dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class SectionResult:
+    """One section of a stats fetch; stale sections carry the last good data."""
+
+    data: dict[str, Any]
+    fresh: bool
+    fetched_at: str | None
+
 
 def _env_bool(name: str, default: bool = False) -> bool:
     raw = os.getenv(name)
@@ -33,6 +69,8 @@ class ProxmoxStats:
         self.proxmox_user = os.getenv("PROXMOX_USER", "root@pam")
         self.proxmox_node = os.getenv("PROXMOX_NODE", "proxmox")
         self.verify_ssl = _env_bool("PROXMOX_VERIFY_SSL", default=False)
+        self.cluster = _env_bool("PROXMOX_CLUSTER", default=False)
+        self.max_parallel = max(1, int(os.getenv("PROXMOX_MAX_PARALLEL", "8")))
 
         token_id = os.getenv("PROXMOX_TOKEN_ID", "").strip()
         token_secret = os.getenv("PROXMOX_TOKEN_SECRET", "").strip()
@@ -46,6 +84,36 @@ class ProxmoxStats:
             self._auth_header = ""
 
         self.session: requests.Session | None = None
+        # Combined wall-clock budget for one concurrent fetch of all sections.
+        self.deadline = max(0.5, float(os.getenv("PROXMOX_STATS_DEADLINE", "6")))
+        self._auth_lock = threading.Lock()
+        # While Proxmox is down, fail fast and serve last good data instead of
+        # waiting out a 5s timeout on every call. Cluster-wide calls share one
+        # breaker; each node's status call has its own, so one dead node only
+        # fails fast itself.
+        breaker_settings = {
+            "failure_threshold": int(os.getenv("PROXMOX_BREAKER_FAILURES", "3")),
+            "max_delay": float(os.getenv("PROXMOX_BREAKER_MAX_DELAY", "120")),
+        }
+        self.breaker = CircuitBreaker("proxmox-stats", **breaker_settings)
+        self.node_breakers = BreakerGroup("proxmox-node", **breaker_settings)
+        self._last_good_lock = threading.Lock()
+        self._last_good: dict[str, tuple[dict[str, Any], str]] = {}
+        self._last_good_nodes: dict[str, dict[str, Any]] = {}
+        # Timed-out calls keep a worker until their own 5s timeout, hence 2x.
+        self._executor = ThreadPoolExecutor(
+            max_workers=2 * len(SECTIONS), thread_name_prefix="proxmox-stats"
+        )
+        # Cluster mode: the node list changes rarely, so discovery is cached;
+        # the containers and VMs sections share one /cluster/resources call.
+        self._discovery_cache = TTLCache(1, float(os.getenv("PROXMOX_DISCOVERY_TTL", "300")))
+        self._guest_cache = TTLCache(1, 30.0)
+        self._guest_flight = SingleFlight()
+        self._node_executor = ThreadPoolExecutor(
+            max_workers=self.max_parallel, thread_name_prefix="proxmox-node"
+        )
+        # Time the node fan-out leaves for summing up before the section deadline.
+        self._node_margin = min(0.5, self.deadline / 10)
 
     def _authenticate(self) -> bool:
         """Authenticate once and initialize session headers."""
@@ -65,36 +133,172 @@ class ProxmoxStats:
                 log.warning("Proxmox auth check failed with HTTP %s.", response.status_code)
                 return False
 
-            self.session = requests.Session()
-            self.session.headers.update(headers)
-            self.session.verify = self.verify_ssl
+            session = requests.Session()
+            # Enough pooled connections for every concurrent section/node call.
+            adapter = HTTPAdapter(pool_maxsize=self.max_parallel + 2 * len(SECTIONS))
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(headers)
+            session.verify = self.verify_ssl
+            self.session = session
             return True
         except requests.RequestException as exc:
             log.warning("Proxmox authentication failed: %s", exc)
             return False
 
-    def _fetch_data(self, path: str) -> Any:
-        if self.session is None and not self._authenticate():
-            raise RuntimeError("Proxmox session unavailable.")
+    def _fetch_data(self, path: str, breaker: CircuitBreaker | None = None) -> Any:
+        """GET ``path`` through ``breaker`` (the cluster-wide one by default)."""
+        if self.session is None:
+            # Authentication is a cluster-level call whichever breaker the GET uses.
+            self.breaker.call(self._ensure_session)
+        return (breaker or self.breaker).call(self._request_data, path)
+
+    def _ensure_session(self) -> None:
+        # Concurrent section fetches share one authentication attempt.
+        with self._auth_lock:
+            if self.session is None and not self._authenticate():
+                raise RuntimeError("Proxmox session unavailable.")
 
+    def _request_data(self, path: str) -> Any:
         assert self.session is not None
         response = self.session.get(f"{self.proxmox_url}/api2/json/{path.lstrip('/')}", timeout=5)
         response.raise_for_status()
         body = response.json()
         return body.get("data")
 
+    def breaker_stats(self) -> dict[str, object]:
+        """Cluster-wide breaker state plus one entry per node breaker."""
+        return {**self.breaker.stats(), "nodes": self.node_breakers.stats()}
+
+    def _remaining(self, deadline_at: float | None, margin: float = 0.0) -> float:
+        """Seconds left before ``deadline_at`` minus ``margin`` (``self.deadline`` if None)."""
+        if deadline_at is None:
+            return self.deadline
+        return max(0.0, deadline_at - time.monotonic() - margin)
+
+    def _cluster_guests(self, deadline_at: float | None = None) -> list[dict[str, Any]]:
+        """Every LXC and QEMU guest in the cluster, from one shared call."""
+        guests = self._guest_cache.get("guests", None)
+        if guests is None:
+            guests = self._guest_flight.do(
+                "guests",
+                lambda: self._fetch_data("cluster/resources?type=vm"),
+                timeout=self._remaining(deadline_at),
+            )
+            if not isinstance(guests, list):
+                raise ValueError("Unexpected cluster resources payload.")
+            self._guest_cache.set("guests", guests)
+        return guests
+
+    def discover_nodes(self) -> list[dict[str, Any]]:
+        """Return the cluster's ``/nodes`` list (cached for ``PROXMOX_DISCOVERY_TTL``)."""
+        nodes = self._discovery_cache.get("nodes", None)
+        if nodes is None:
+            nodes = self._fetch_data("nodes")
+            if not isinstance(nodes, list):
+                raise ValueError("Unexpected node list payload.")
+            nodes = sorted(nodes, key=lambda entry: str(entry.get("node", "")))
+            self._discovery_cache.set("nodes", nodes)
+        return nodes
+
+    def _list_guests(self, kind: str, deadline_at: float | None = None) -> Any:
+        if not self.cluster:
+            return self._fetch_data(f"nodes/{self.proxmox_node}/{kind}")
+        guests = []
+        for guest in self._cluster_guests(deadline_at):
+            if guest.get("type") != kind:
+                continue
+            if kind == "lxc" and "hostname" not in guest:
+                # /cluster/resources names containers "name"; keep the per-node field.
+                guest = {**guest, "hostname": guest.get("name", "")}
+            guests.append(guest)
+        return guests
+
+    def _load_container_stats(self, deadline_at: float | None = None) -> dict[str, Any]:
+        containers = self._list_guests("lxc", deadline_at)
+        if not isinstance(containers, list):
+            raise ValueError("Unexpected LXC list payload.")
+        online_count = sum(1 for c in containers if c.get("status") == "running")
+        return {
+            "online_containers": online_count,
+            "total_containers": len(containers),
+            "containers": containers,
+        }
+
+    def _load_qemu_stats(self, deadline_at: float | None = None) -> dict[str, Any]:
+        vms = self._list_guests("qemu", deadline_at)
+        if not isinstance(vms, list):
+            raise ValueError("Unexpected QEMU list payload.")
+        online_count = sum(1 for vm in vms if vm.get("status") == "running")
+        return {
+            "online_vms": online_count,
+            "total_vms": len(vms),
+            "vms": vms,
+        }
+
+    def _load_single_node(self, node: str) -> dict[str, Any]:
+        data = self._fetch_data(f"nodes/{node}/status", self.node_breakers.get(node))
+        if not isinstance(data, dict):
+            raise ValueError("Unexpected node status payload.")
+        return {
+            "uptime": int(data.get("uptime", 0) or 0),
+            "memory_used": int((data.get("memory") or {}).get("used", 0) or 0),
+            "memory_total": int((data.get("memory") or {}).get("total", 0) or 0),
+            "disk_used": int((data.get("disk") or {}).get("used", 0) or 0),
+            "disk_total": int((data.get("disk") or {}).get("total", 0) or 0),
+        }
+
+    def _load_node_stats(self, deadline_at: float | None = None) -> dict[str, Any]:
+        if not self.cluster:
+            return self._load_single_node(self.proxmox_node)
+
+        names = [
+            str(entry.get("node"))
+            for entry in self.discover_nodes()
+            if entry.get("node") and entry.get("status", "online") == "online"
+        ]
+        futures = {name: self._node_executor.submit(self._load_single_node, name) for name in names}
+        # Stop waiting early enough that the section itself still meets the
+        # fetch deadline; slow nodes then fall back on their own.
+        done, _pending = wait(futures.values(), timeout=self._remaining(deadline_at, self._node_margin))
+        nodes = []
+        for name, future in futures.items():
+            if future in done and future.exception() is None:
+                data = future.result()
+                with self._last_good_lock:
+                    self._last_good_nodes[name] = data
+                nodes.append({"node": name, "fresh": True, **data})
+                continue
+            reason = future.exception() if future in done else "timed out"
+            log.warning("Node %s stats unavailable: %s", name, reason)
+            with self._last_good_lock:
+                data = self._last_good_nodes.get(name) or self._fallback_node_stats()
+            # Last good numbers keep one node's outage from shrinking the totals.
+            nodes.append({"node": name, "fresh": False, **data})
+        if names and not any(node["fresh"] for node in nodes):
+            raise RuntimeError("No cluster node answered.")
+
+        totals = self._fallback_node_stats()
+        for node in nodes:
+            for key in ("memory_used", "memory_total", "disk_used", "disk_total"):
+                totals[key] += node[key]
+        # The cluster has been up for as long as its longest-running node.
+        totals["uptime"] = max((node["uptime"] for node in nodes), default=0)
+        totals["nodes"] = nodes
+        return totals
+
+    def _section_loaders(self) -> dict[str, tuple[_Loader, _Fallback]]:
+        """Map each section to its ``(load, fallback)`` pair."""
+        return {
+            CONTAINERS: (self._load_container_stats, self._fallback_container_stats),
+            VMS: (self._load_qemu_stats, self._fallback_vm_stats),
+            NODE: (self._load_node_stats, self._fallback_node_stats),
+        }
+
     def get_container_stats(self) -> dict[str, Any]:
         """Fetch LXC container statistics from Proxmox."""
         try:
-            containers = self._fetch_data(f"nodes/{self.proxmox_node}/lxc")
-            if not isinstance(containers, list):
-                return self._fallback_container_stats()
-            online_count = sum(1 for c in containers if c.get("status") == "running")
-            return {
-                "online_containers": online_count,
-                "total_containers": len(containers),
-                "containers": containers,
-            }
+            return self._load_container_stats()
         except Exception as exc:
             log.warning("Error fetching container stats: %s", exc)
             return self._fallback_container_stats()
@@ -102,15 +306,7 @@ class ProxmoxStats:
     def get_qemu_stats(self) -> dict[str, Any]:
         """Fetch VM statistics from Proxmox."""
         try:
-            vms = self._fetch_data(f"nodes/{self.proxmox_node}/qemu")
-            if not isinstance(vms, list):
-                return self._fallback_vm_stats()
-            online_count = sum(1 for vm in vms if vm.get("status") == "running")
-            return {
-                "online_vms": online_count,
-                "total_vms": len(vms),
-                "vms": vms,
-            }
+            return self._load_qemu_stats()
         except Exception as exc:
             log.warning("Error fetching VM stats: %s", exc)
             return self._fallback_vm_stats()
@@ -118,26 +314,65 @@ class ProxmoxStats:
     def get_node_stats(self) -> dict[str, Any]:
         """Fetch node-level memory, disk, and uptime information."""
         try:
-            data = self._fetch_data(f"nodes/{self.proxmox_node}/status")
-            if not isinstance(data, dict):
-                return self._fallback_node_stats()
-            return {
-                "uptime": int(data.get("uptime", 0) or 0),
-                "memory_used": int((data.get("memory") or {}).get("used", 0) or 0),
-                "memory_total": int((data.get("memory") or {}).get("total", 0) or 0),
-                "disk_used": int((data.get("disk") or {}).get("used", 0) or 0),
-                "disk_total": int((data.get("disk") or {}).get("total", 0) or 0),
-            }
+            return self._load_node_stats()
         except Exception as exc:
             log.warning("Error fetching node stats: %s", exc)
             return self._fallback_node_stats()
 
+    def fetch_sections(self) -> dict[str, SectionResult]:
+        """Fetch every section in parallel within ``self.deadline`` seconds.
+
+        A section that fails or misses the deadline is returned with its last
+        good data (or the fallback zeros) and ``fresh=False``; the others are
+        unaffected.
+        """
+        loaders = self._section_loaders()
+        # Guests are shared by this fetch's containers and VMs sections only.
+        self._guest_cache.clear()
+        # One absolute deadline; nested fan-outs only get what is left of it.
+        deadline_at = time.monotonic() + self.deadline
+        futures = {
+            name: self._executor.submit(load, deadline_at) for name, (load, _fallback) in loaders.items()
+        }
+        done, _pending = wait(futures.values(), timeout=self._remaining(deadline_at))
+        now = datetime.now(timezone.utc).isoformat()
+        results: dict[str, SectionResult] = {}
+        for name, future in futures.items():
+            if future in done and future.exception() is None:
+                data = future.result()
+                with self._last_good_lock:
+                    self._last_good[name] = (data, now)
+                results[name] = SectionResult(data, True, now)
+                continue
+            if future in done and isinstance(future.exception(), CircuitOpenError):
+                log.debug("Skipping %s stats: %s", name, future.exception())
+            elif future in done:
+                log.warning("Error fetching %s stats: %s", name, future.exception())
+            else:
+                log.warning("Fetching %s stats missed the %.1fs deadline.", name, self.deadline)
+            with self._last_good_lock:
+                last_good = self._last_good.get(name)
+            if last_good is not None:
+                results[name] = SectionResult(last_good[0], False, last_good[1])
+            else:
+                results[name] = SectionResult(loaders[name][1](), False, None)
+        return results
+
+    def fallback_sections(self) -> dict[str, SectionResult]:
+        return {
+            name: SectionResult(fallback(), False, None)
+            for name, (_load, fallback) in self._section_loaders().items()
+        }
+
     def get_all_stats(self) -> dict[str, Any]:
         """Fetch and aggregate all infrastructure statistics."""
-        containers = self.get_container_stats()
-        vms = self.get_qemu_stats()
-        node = self.get_node_stats()
+        return self.summarize(self.fetch_sections())
 
+    def summarize(self, sections: Mapping[str, SectionResult]) -> dict[str, Any]:
+        """Aggregate fetched sections into the ``/api/stats`` payload."""
+        containers = sections[CONTAINERS].data
+        vms = sections[VMS].data
+        node = sections[NODE].data
         container_list = containers.get("containers", [])
         active_bots = self._count_active_bots(container_list)
         games_online = self._count_game_containers(container_list)
@@ -148,7 +383,7 @@ class ProxmoxStats:
         disk_used = int(node.get("disk_used", 0) or 0)
         disk_total = int(node.get("disk_total", 0) or 0)
 
-        return {
+        summary = {
             "timestamp": datetime.now(timezone.utc).isoformat(),
             "games_online": games_online,
             "active_bots": active_bots,
@@ -162,7 +397,43 @@ class ProxmoxStats:
             "memory_total_gb": round(memory_total / (1024**3), 2),
             "disk_used_gb": round(disk_used / (1024**3), 2),
             "disk_total_gb": round(disk_total / (1024**3), 2),
+            "stale": not all(section.fresh for section in sections.values()),
+            "sections": {
+                name: {"fresh": section.fresh, "fetched_at": section.fetched_at}
+                for name, section in sections.items()
+            },
         }
+        if "nodes" in node:
+            summary["nodes"] = self._summarize_nodes(node["nodes"], container_list, vms.get("vms", []))
+        return summary
+
+    def _summarize_nodes(
+        self,
+        nodes: list[dict[str, Any]],
+        containers: list[dict[str, Any]],
+        vms: list[dict[str, Any]],
+    ) -> list[dict[str, Any]]:
+        """Per-node breakdown for cluster mode."""
+        running: dict[tuple[str, str], int] = {}
+        for kind, guests in (("containers", containers), ("vms", vms)):
+            for guest in guests:
+                if guest.get("status") == "running":
+                    key = (str(guest.get("node", "")), kind)
+                    running[key] = running.get(key, 0) + 1
+        return [
+            {
+                "node": node["node"],
+                "fresh": node["fresh"],
+                "online_containers": running.get((node["node"], "containers"), 0),
+                "online_vms": running.get((node["node"], "vms"), 0),
+                "uptime_seconds": node["uptime"],
+                "memory_used_gb": round(node["memory_used"] / (1024**3), 2),
+                "memory_total_gb": round(node["memory_total"] / (1024**3), 2),
+                "disk_used_gb": round(node["disk_used"] / (1024**3), 2),
+                "disk_total_gb": round(node["disk_total"] / (1024**3), 2),
+            }
+            for node in nodes
+        ]
 
     def _count_active_bots(self, containers: list[dict[str, Any]]) -> int:
         bot_keywords = {"bot", "cartofia-bot", "discord"}
@@ -0,0 +1,127 @@
+"""SQL run on the API's archive and profile request paths.
+
+``api_server`` executes these strings and ``migrations.HOT_QUERIES`` plans
+the very same ones (every archive listing variant included), so the
+``--check-plans`` gate fails as soon as an endpoint's query stops using an
+index. Feed, badge and blob SQL live next to their code in ``rollups``,
+``badges`` and ``archive_store`` for the same reason.
+"""
+
+from __future__ import annotations
+
+MAX_ROWID = 2**63 - 1
+
+ARCHIVE_LIST_SORTS: dict[str, tuple[str, str]] = {
+    # sort name -> (ORDER BY clause, keyset comparison against the anchor row)
+    "newest": ("id DESC", "id < :anchor_id"),
+    "oldest": ("id ASC", "id > :anchor_id"),
+    "largest": (
+        "size_bytes DESC, id DESC",
+        "(size_bytes, id) < (:anchor_size, :anchor_id)",
+    ),
+    "smallest": (
+        "size_bytes ASC, id ASC",
+        "(size_bytes, id) > (:anchor_size, :anchor_id)",
+    ),
+}
+
+# Anchor "before the first row" of each sort, so the first page uses the same
+# index range as every later page instead of scanning the table.
+ARCHIVE_LIST_START: dict[str, tuple[int, int]] = {
+    # sort name -> (anchor_size, anchor_id)
+    "newest": (0, MAX_ROWID),
+    "oldest": (0, 0),
+    "largest": (MAX_ROWID, MAX_ROWID),
+    "smallest": (-1, 0),
+}
+
+ARCHIVE_ANCHOR_SQL = "SELECT id, size_bytes FROM archive_files WHERE id = ?"
+
+# Date bounds become id bounds: ids are assigned in upload order.
+ARCHIVE_FIRST_ID_SINCE_SQL = """
+    SELECT id FROM archive_files
+    WHERE uploaded_at >= ?
+    ORDER BY uploaded_at, id
+    LIMIT 1
+"""
+ARCHIVE_LAST_ID_BEFORE_SQL = """
+    SELECT id FROM archive_files
+    WHERE uploaded_at < ?
+    ORDER BY uploaded_at DESC, id DESC
+    LIMIT 1
+"""
+
+
+def archive_list_where(uploader: bool) -> str:
+    """WHERE clause shared by a listing page and its total count."""
+    if uploader:
+        return "WHERE uploaded_by = :uploader AND id BETWEEN :min_id AND :max_id"
+    return "WHERE id BETWEEN :min_id AND :max_id"
+
+
+def archive_page_sql(sort: str, uploader: bool) -> str:
+    order_sql, keyset_sql = ARCHIVE_LIST_SORTS[sort]
+    return f"""
+        SELECT id, original_name, size_bytes, sha256, uploaded_at, uploaded_by
+        FROM archive_files
+        {archive_list_where(uploader)} AND {keyset_sql}
+        ORDER BY {order_sql}
+        LIMIT :limit
+    """
+
+
+def archive_count_sql(uploader: bool) -> str:
+    return f"SELECT COUNT(*) AS n FROM archive_files {archive_list_where(uploader)}"
+
+
+ARCHIVE_FILE_BY_ID_SQL = """
+    SELECT id, original_name, stored_name, sha256, size_bytes
+    FROM archive_files
+    WHERE id = ?
+"""
+
+
+def archive_files_by_ids_sql(count: int) -> str:
+    placeholders = ", ".join("?" for _ in range(count))
+    return f"SELECT id, original_name, stored_name FROM archive_files WHERE id IN ({placeholders})"
+
+
+PROFILE_ROW_SQL = """
+    SELECT username, email, display_name, picture_filename, picture_updated_at,
+           upload_count, upload_bytes, badge_count, created_at, updated_at
+    FROM user_profiles
+    WHERE username = ?
+"""
+
+PROFILE_AVATAR_SQL = """
+    SELECT picture_filename
+    FROM user_profiles
+    WHERE username = ?
+"""
+
+PROFILE_BADGES_SQL = """
+    SELECT badge_key, source, awarded_at
+    FROM user_badges
+    WHERE username = ?
+    ORDER BY awarded_at ASC
+"""
+
+
+def profile_batch_rows_sql(count: int) -> str:
+    placeholders = ", ".join("?" for _ in range(count))
+    return f"""
+        SELECT username, display_name, picture_filename, picture_updated_at,
+               upload_count, badge_count
+        FROM user_profiles
+        WHERE username IN ({placeholders})
+    """
+
+
+def profile_batch_badges_sql(count: int) -> str:
+    placeholders = ", ".join("?" for _ in range(count))
+    return f"""
+        SELECT username, badge_key
+        FROM user_badges
+        WHERE username IN ({placeholders})
+        ORDER BY username, awarded_at ASC
+    """
@@ -0,0 +1,189 @@
+"""Hourly and daily counters behind the homepage feed.
+
+Writers bump ``feed_rollups`` in the same transaction as the row they insert,
+so feed queries sum at most a few dozen buckets instead of counting raw
+history. Buckets are keyed by the UTC ISO prefix of the event timestamp:
+``YYYY-MM-DDTHH`` for hours and ``YYYY-MM-DD`` for days.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from collections import Counter
+from typing import Iterable
+
+NEW_PROFILES = "new_profiles"
+UPLOADS = "uploads"
+UPLOAD_BYTES = "upload_bytes"
+PLAYS = "plays"
+
+HOUR = "hour"
+DAY = "day"
+_BUCKET_LENGTH = {HOUR: 13, DAY: 10}
+
+# Applied on every upload/profile/play event.
+UPSERT_SQL = """
+    INSERT INTO feed_rollups (granularity, metric, bucket, dimension, value)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(granularity, metric, bucket, dimension)
+    DO UPDATE SET value = value + excluded.value
+"""
+
+# Feed reads; also planned by ``migrations.HOT_QUERIES``.
+WINDOW_TOTAL_SQL = """
+    SELECT COALESCE(SUM(value), 0)
+    FROM feed_rollups
+    WHERE granularity = ? AND metric = ? AND bucket >= ? AND dimension = ?
+"""
+
+WINDOW_TOP_SQL = """
+    SELECT dimension, SUM(value) AS total
+    FROM feed_rollups
+    WHERE granularity = ? AND metric = ? AND bucket >= ? AND dimension != ''
+    GROUP BY dimension
+    ORDER BY total DESC
+    LIMIT 1
+"""
+
+BUSIEST_BUCKET_SQL = """
+    SELECT bucket, value
+    FROM feed_rollups
+    WHERE granularity = ? AND metric = ? AND bucket >= ? AND dimension = ''
+    ORDER BY value DESC
+    LIMIT 1
+"""
+
+
+def bucket_for(timestamp: str, granularity: str) -> str:
+    return timestamp[: _BUCKET_LENGTH[granularity]]
+
+
+def bump_many(
+    conn: sqlite3.Connection,
+    events: Iterable[tuple[str, str, str, int]],
+) -> None:
+    """Add ``(metric, timestamp_iso, dimension, amount)`` events to every bucket.
+
+    Runs inside the caller's transaction. Events sharing a bucket are
+    pre-aggregated so a batch costs one upsert per distinct bucket.
+    """
+    totals: Counter[tuple[str, str, str, str]] = Counter()
+    for metric, timestamp, dimension, amount in events:
+        for granularity in _BUCKET_LENGTH:
+            totals[(granularity, metric, bucket_for(timestamp, granularity), dimension)] += amount
+    if totals:
+        conn.executemany(UPSERT_SQL, [(*key, value) for key, value in totals.items()])
+
+
+def bump(
+    conn: sqlite3.Connection,
+    metric: str,
+    timestamp: str,
+    amount: int = 1,
+    dimension: str = "",
+) -> None:
+    bump_many(conn, [(metric, timestamp, dimension, amount)])
+
+
+def window_total(
+    conn: sqlite3.Connection,
+    metric: str,
+    since: str,
+    granularity: str = HOUR,
+    dimension: str = "",
+) -> int:
+    """Sum ``metric`` over buckets starting at or after ``since``'s bucket."""
+    row = conn.execute(
+        WINDOW_TOTAL_SQL,
+        (granularity, metric, bucket_for(since, granularity), dimension),
+    ).fetchone()
+    return int(row[0] or 0)
+
+
+def window_top(
+    conn: sqlite3.Connection,
+    metric: str,
+    since: str,
+    granularity: str = HOUR,
+) -> tuple[str, int] | None:
+    """Return the non-empty dimension with the largest total in the window."""
+    row = conn.execute(
+        WINDOW_TOP_SQL,
+        (granularity, metric, bucket_for(since, granularity)),
+    ).fetchone()
+    if row is None or not row[1]:
+        return None
+    return str(row[0]), int(row[1])
+
+
+def busiest_bucket(
+    conn: sqlite3.Connection,
+    metric: str,
+    since: str,
+    granularity: str = HOUR,
+) -> tuple[str, int] | None:
+    row = conn.execute(
+        BUSIEST_BUCKET_SQL,
+        (granularity, metric, bucket_for(since, granularity)),
+    ).fetchone()
+    if row is None or not row[1]:
+        return None
+    return str(row[0]), int(row[1])
+
+
+def rebuild(conn: sqlite3.Connection) -> None:
+    """Recompute every bucket from the source tables (one-shot backfill)."""
+    conn.execute("DELETE FROM feed_rollups")
+    for granularity, length in _BUCKET_LENGTH.items():
+        conn.execute(
+            f"""
+            INSERT INTO feed_rollups (granularity, metric, bucket, dimension, value)
+            SELECT ?, ?, substr(created_at, 1, {length}), '', COUNT(*)
+            FROM user_profiles GROUP BY 3
+            """,
+            (granularity, NEW_PROFILES),
+        )
+        conn.execute(
+            f"""
+            INSERT INTO feed_rollups (granularity, metric, bucket, dimension, value)
+            SELECT ?, ?, substr(uploaded_at, 1, {length}), '', COUNT(*)
+            FROM archive_files GROUP BY 3
+            """,
+            (granularity, UPLOADS),
+        )
+        conn.execute(
+            f"""
+            INSERT INTO feed_rollups (granularity, metric, bucket, dimension, value)
+            SELECT ?, ?, substr(uploaded_at, 1, {length}), uploaded_by, COUNT(*)
+            FROM archive_files GROUP BY 3, 4
+            """,
+            (granularity, UPLOADS),
+        )
+        conn.execute(
+            f"""
+            INSERT INTO feed_rollups (granularity, metric, bucket, dimension, value)
+            SELECT ?, ?, substr(uploaded_at, 1, {length}), '', SUM(size_bytes)
+            FROM archive_files GROUP BY 3
+            """,
+            (granularity, UPLOAD_BYTES),
+        )
+        conn.execute(
+            f"""
+            INSERT INTO feed_rollups (granularity, metric, bucket, dimension, value)
+            SELECT ?, ?, substr(logged_at, 1, {length}), game_name, COUNT(*)
+            FROM activity_log
+            WHERE event_type = 'played_game' AND game_name != ''
+            GROUP BY 3, 4
+            """,
+            (granularity, PLAYS),
+        )
+        conn.execute(
+            f"""
+            INSERT INTO feed_rollups (granularity, metric, bucket, dimension, value)
+            SELECT ?, ?, substr(logged_at, 1, {length}), '', COUNT(*)
+            FROM activity_log
+            WHERE event_type = 'played_game' AND game_name != ''
+            GROUP BY 3
+            """,
+            (granularity, PLAYS),
+        )
@@ -0,0 +1,248 @@
+"""Two-level hashed directory layout for archive files and avatars.
+
+Files live at ``<base>/ab/cd/<name>``, where ``abcd`` are the first hex
+digits of SHA-256(name), so no single directory grows past a few thousand
+entries. Database columns (``stored_name``, ``picture_filename``) hold the
+path relative to the base directory. Bare names without a directory part
+are legacy flat files; :func:`locate` still finds them.
+
+Run ``python -m cartofia_bot.sharding`` to move flat files into the sharded
+layout while the API keeps serving. Each batch hard-links files into place,
+repoints the rows in one short write transaction and only then removes the
+flat copies, so readers always find the file under either name.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import logging
+import os
+import shutil
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+try:
+    from cartofia_bot.paths import archive_data_dir, archive_db_path
+except ImportError:  # pragma: no cover - fallback for direct script execution
+    from paths import archive_data_dir, archive_db_path
+
+log = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 200
+
+# Run while the API is serving; also planned by ``migrations.HOT_QUERIES``.
+REPOINT_ARCHIVE_FILES_SQL = "UPDATE archive_files SET stored_name = ? WHERE stored_name = ?"
+REPOINT_ARCHIVE_BLOBS_SQL = "UPDATE archive_blobs SET stored_name = ? WHERE stored_name = ?"
+REPOINT_AVATARS_SQL = "UPDATE user_profiles SET picture_filename = ? WHERE picture_filename = ?"
+
+
+def shard_name(name: str) -> str:
+    """Return the sharded relative path (``ab/cd/<name>``) for a bare name."""
+    digest = hashlib.sha256(name.encode("utf-8")).hexdigest()
+    return f"{digest[:2]}/{digest[2:4]}/{name}"
+
+
+def is_sharded(stored_name: str) -> bool:
+    return "/" in stored_name
+
+
+def resolve(base_dir: Path, stored_name: str) -> Path | None:
+    """Return the absolute path for ``stored_name``, or None if it is not a valid layout."""
+    path = (base_dir / stored_name).resolve()
+    if not path.is_relative_to(base_dir):
+        return None
+    if len(path.relative_to(base_dir).parts) not in (1, 3):
+        return None
+    return path
+
+
+def locate(base_dir: Path, stored_name: str) -> Path | None:
+    """Like :func:`resolve`, but also finds a flat file the migration just moved."""
+    path = resolve(base_dir, stored_name)
+    if path is not None and not is_sharded(stored_name) and not path.exists():
+        moved = base_dir / shard_name(stored_name)
+        if moved.exists():
+            return moved
+    return path
+
+
+def place(base_dir: Path, name: str) -> tuple[str, Path]:
+    """Return ``(stored_name, path)`` for a new file, creating its shard directories."""
+    stored_name = shard_name(name)
+    path = base_dir / stored_name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return stored_name, path
+
+
+def _link_into_place(base_dir: Path, name: str) -> str | None:
+    """Make ``name`` reachable at its sharded path; return that path or None if lost."""
+    stored_name, target = place(base_dir, name)
+    source = base_dir / name
+    if target.exists():
+        return stored_name
+    if not source.exists():
+        log.warning("Skipping %s: file is missing.", source)
+        return None
+    try:
+        os.link(source, target)
+    except OSError:
+        # Filesystems without hard links: copy to a temp name, then rename.
+        partial = target.with_name(f".{target.name}.partial")
+        shutil.copy2(source, partial)
+        os.replace(partial, target)
+    return stored_name
+
+
+def _move_batch(
+    conn: sqlite3.Connection,
+    base_dir: Path,
+    names: list[str],
+    updates: tuple[str, ...],
+) -> int:
+    """Move one batch of flat names; ``updates`` are ``SET col = ? WHERE col = ?`` statements."""
+    linked = [(name, stored_name) for name in names if (stored_name := _link_into_place(base_dir, name))]
+    if not linked:
+        return 0
+
+    repointed: list[tuple[str, str]] = []
+    stale: list[str] = []
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for name, stored_name in linked:
+            if sum(conn.execute(sql, (stored_name, name)).rowcount for sql in updates):
+                repointed.append((name, stored_name))
+            else:
+                stale.append(stored_name)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+    for name, _stored_name in repointed:
+        (base_dir / name).unlink(missing_ok=True)
+    # Rows changed underneath us (e.g. a new avatar); drop the unused link.
+    for stored_name in stale:
+        (base_dir / stored_name).unlink(missing_ok=True)
+    return len(repointed)
+
+
+def shard_archive_files(
+    conn: sqlite3.Connection,
+    files_dir: Path,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    pause: float = 0.0,
+) -> int:
+    """Move flat archive files into the sharded layout; return how many moved."""
+    moved = 0
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, stored_name FROM archive_files WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, batch_size),
+        ).fetchall()
+        if not rows:
+            break
+        last_id = int(rows[-1][0])
+        names = list(dict.fromkeys(str(row[1]) for row in rows if not is_sharded(str(row[1]))))
+        moved += _move_batch(
+            conn,
+            files_dir,
+            names,
+            (REPOINT_ARCHIVE_FILES_SQL, REPOINT_ARCHIVE_BLOBS_SQL),
+        )
+        if names and pause:
+            time.sleep(pause)
+    return moved
+
+
+def shard_avatars(
+    conn: sqlite3.Connection,
+    avatar_dir: Path,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    pause: float = 0.0,
+) -> int:
+    """Move flat avatar images into the sharded layout; return how many moved."""
+    moved = 0
+    last_username = ""
+    while True:
+        rows = conn.execute(
+            """
+            SELECT username, picture_filename FROM user_profiles
+            WHERE username > ? ORDER BY username LIMIT ?
+            """,
+            (last_username, batch_size),
+        ).fetchall()
+        if not rows:
+            break
+        last_username = str(rows[-1][0])
+        names = [str(row[1]) for row in rows if row[1] and not is_sharded(str(row[1]))]
+        moved += _move_batch(
+            conn,
+            avatar_dir,
+            names,
+            (REPOINT_AVATARS_SQL,),
+        )
+        if names and pause:
+            time.sleep(pause)
+    return moved
+
+
+def sweep_leftovers(base_dir: Path) -> int:
+    """Remove flat files whose sharded copy exists (left by an interrupted run)."""
+    removed = 0
+    if not base_dir.is_dir():
+        return removed
+    with os.scandir(base_dir) as entries:
+        for entry in entries:
+            if not entry.is_file(follow_symlinks=False):
+                continue
+            target = base_dir / shard_name(entry.name)
+            try:
+                same = target.exists() and (
+                    os.path.samefile(entry.path, target) or entry.stat().st_size == target.stat().st_size
+                )
+            except OSError:
+                continue
+            if same:
+                os.unlink(entry.path)
+                removed += 1
+    return removed
+
+
+def main(argv: list[str] | None = None) -> int:
+    data_dir = archive_data_dir()
+    parser = argparse.ArgumentParser(description="Move flat archive files and avatars into sharded directories.")
+    parser.add_argument("--db", default=str(archive_db_path()), help="archive database path")
+    parser.add_argument("--files-dir", default=str(data_dir / "files"), help="archive files directory")
+    parser.add_argument("--avatar-dir", default=str(data_dir / "profiles" / "avatars"), help="avatar directory")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="files per transaction")
+    parser.add_argument("--pause", type=float, default=0.05, help="seconds to sleep between batches")
+    args = parser.parse_args(argv)
+
+    files_dir = Path(args.files_dir).resolve()
+    avatar_dir = Path(args.avatar_dir).resolve()
+    batch_size = max(1, args.batch_size)
+    if not Path(args.db).is_file():
+        print(f"archive database not found: {args.db} (set ARCHIVE_DATA_DIR or --db)", file=sys.stderr)
+        return 1
+    conn = sqlite3.connect(args.db, timeout=30)
+    try:
+        if files_dir.is_dir():
+            moved = shard_archive_files(conn, files_dir, batch_size, args.pause)
+            removed = sweep_leftovers(files_dir)
+            print(f"archive: moved {moved} files, removed {removed} leftover flat copies")
+        if avatar_dir.is_dir():
+            moved = shard_avatars(conn, avatar_dir, batch_size, args.pause)
+            removed = sweep_leftovers(avatar_dir)
+            print(f"avatars: moved {moved} files, removed {removed} leftover flat copies")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
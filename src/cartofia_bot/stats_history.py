@@ -0,0 +1,255 @@
+"""Fixed-memory time series of infrastructure stats at several resolutions.
+
+Every stats poll is folded into one ring buffer per resolution (by default
+10s for an hour, 1m for a day and 10m for a month). Each ring keeps one
+``array('d')`` of bucket timestamps plus one per metric, and a sample only
+updates the running sum of its open bucket; the bucket mean is written when
+the next bucket starts. Reads slice the arrays (plus the open bucket's mean so
+far), so a history request never aggregates raw samples. Rings are saved to
+one compact binary file on shutdown (and periodically) and reloaded on start;
+the newest saved bucket is reopened so samples that land in it after a
+restart are merged rather than duplicated.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Mapping
+
+log = logging.getLogger(__name__)
+
+METRICS = (
+    "games_online",
+    "active_bots",
+    "online_containers",
+    "total_containers",
+    "online_vms",
+    "total_vms",
+    "memory_used_gb",
+    "memory_total_gb",
+    "disk_used_gb",
+    "disk_total_gb",
+)
+
+# (name, bucket seconds, buckets kept)
+DEFAULT_RESOLUTIONS = (
+    ("10s", 10, 360),
+    ("1m", 60, 1440),
+    ("10m", 600, 4320),
+)
+
+_FILE_MAGIC = b"CSTH1\n"
+
+
+class _Ring:
+    def __init__(self, step: int, capacity: int, metrics: tuple[str, ...]) -> None:
+        self.step = step
+        self.capacity = capacity
+        self.times = array("d", bytes(8 * capacity))
+        self.values = {metric: array("d", bytes(8 * capacity)) for metric in metrics}
+        self.head = 0
+        self.size = 0
+        self.bucket: float | None = None
+        self.sums = dict.fromkeys(metrics, 0.0)
+        self.count = 0
+
+    @property
+    def span(self) -> int:
+        return self.step * self.capacity
+
+    def add(self, timestamp: float, sample: Mapping[str, float]) -> None:
+        bucket = timestamp - timestamp % self.step
+        if self.bucket is not None and bucket < self.bucket:
+            return  # clock went backwards; drop rather than reorder
+        if bucket != self.bucket:
+            self._commit()
+            self.bucket = bucket
+        for metric in self.sums:
+            self.sums[metric] += sample[metric]
+        self.count += 1
+
+    def _commit(self) -> None:
+        if self.bucket is None or not self.count:
+            return
+        self.times[self.head] = self.bucket
+        for metric, values in self.values.items():
+            values[self.head] = self.sums[metric] / self.count
+            self.sums[metric] = 0.0
+        self.count = 0
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def _ordered(self, data: array) -> array:
+        if self.size < self.capacity:
+            return data[: self.size]
+        return data[self.head :] + data[: self.head]
+
+    def series(self, metric: str, since: float) -> tuple[array, array]:
+        times = self._ordered(self.times)
+        start = bisect.bisect_left(times, since)
+        times, values = times[start:], self._ordered(self.values[metric])[start:]
+        if self.count and self.bucket is not None and self.bucket >= since:
+            times.append(self.bucket)
+            values.append(self.sums[metric] / self.count)
+        return times, values
+
+    def committed_copy(self) -> _Ring:
+        """A copy with the open bucket committed, for saving."""
+        ring = _Ring(self.step, self.capacity, tuple(self.values))
+        ring.times = array("d", self.times)
+        ring.values = {metric: array("d", values) for metric, values in self.values.items()}
+        ring.head, ring.size = self.head, self.size
+        ring.bucket, ring.count = self.bucket, self.count
+        ring.sums = dict(self.sums)
+        ring._commit()
+        return ring
+
+    def reopen_last(self) -> None:
+        """Move the newest committed bucket back into the running sums.
+
+        Its saved mean counts as a single sample when later samples merge in.
+        """
+        if not self.size:
+            return
+        self.head = (self.head - 1) % self.capacity
+        self.size -= 1
+        self.bucket = self.times[self.head]
+        for metric, values in self.values.items():
+            self.sums[metric] = values[self.head]
+        self.count = 1
+
+
+class StatsHistory:
+    """Record stats snapshots into downsampled rings and serve them back."""
+
+    def __init__(
+        self,
+        path: Path | None = None,
+        *,
+        resolutions: tuple[tuple[str, int, int], ...] = DEFAULT_RESOLUTIONS,
+        metrics: tuple[str, ...] = METRICS,
+        save_interval: float = 600,
+    ) -> None:
+        self.path = path
+        self.metrics = metrics
+        self.resolutions = resolutions
+        self.save_interval = max(0.0, float(save_interval))
+        self._rings = {name: _Ring(step, capacity, metrics) for name, step, capacity in resolutions}
+        self._lock = threading.Lock()
+        self._last_save = time.monotonic()
+        self.samples = 0
+
+    def record(self, timestamp: float, stats: Mapping[str, object]) -> None:
+        """Add one sample; non-numeric or missing metrics count as 0."""
+        sample = {}
+        for metric in self.metrics:
+            value = stats.get(metric, 0)
+            sample[metric] = float(value) if isinstance(value, (int, float)) else 0.0
+        with self._lock:
+            for ring in self._rings.values():
+                ring.add(timestamp, sample)
+            self.samples += 1
+        if self.path is not None and self.save_interval and (
+            time.monotonic() - self._last_save >= self.save_interval
+        ):
+            self.save()
+
+    def resolution_for(self, range_seconds: float) -> str:
+        """Return the finest resolution whose ring covers ``range_seconds``."""
+        for name, step, capacity in self.resolutions:
+            if step * capacity >= range_seconds:
+                return name
+        return self.resolutions[-1][0]
+
+    def series(
+        self,
+        metric: str,
+        range_seconds: float,
+        now: float | None = None,
+    ) -> tuple[str, int, list[float], list[float]]:
+        """Return ``(resolution, step, timestamps, values)`` for the last ``range_seconds``."""
+        now = time.time() if now is None else now
+        name = self.resolution_for(range_seconds)
+        with self._lock:
+            ring = self._rings[name]
+            times, values = ring.series(metric, now - range_seconds)
+        return name, ring.step, times.tolist(), values.tolist()
+
+    def save(self) -> None:
+        """Write every ring to ``self.path`` atomically."""
+        if self.path is None:
+            return
+        with self._lock:
+            rings = {name: ring.committed_copy() for name, ring in self._rings.items()}
+        header = {
+            "metrics": list(self.metrics),
+            "rings": {
+                name: {"step": ring.step, "capacity": ring.capacity, "head": ring.head, "size": ring.size}
+                for name, ring in rings.items()
+            },
+        }
+        payload = [ring.times.tobytes() for ring in rings.values()]
+        payload += [ring.values[metric].tobytes() for ring in rings.values() for metric in self.metrics]
+        self._last_save = time.monotonic()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        partial = self.path.with_name(f".{self.path.name}.partial")
+        try:
+            with partial.open("wb") as handle:
+                handle.write(_FILE_MAGIC)
+                handle.write(json.dumps(header).encode("utf-8") + b"\n")
+                for chunk in payload:
+                    handle.write(chunk)
+            os.replace(partial, self.path)
+        except OSError:
+            partial.unlink(missing_ok=True)
+            log.warning("Could not save stats history to %s.", self.path, exc_info=True)
+
+    def load(self) -> bool:
+        """Restore rings saved by :meth:`save`; False if missing or incompatible."""
+        if self.path is None or not self.path.is_file():
+            return False
+        try:
+            with self.path.open("rb") as handle:
+                if handle.read(len(_FILE_MAGIC)) != _FILE_MAGIC:
+                    raise ValueError("bad magic")
+                header = json.loads(handle.readline())
+                if header["metrics"] != list(self.metrics):
+                    raise ValueError("metric set changed")
+                for name, ring in self._rings.items():
+                    saved = header["rings"].get(name)
+                    if saved is None or (saved["step"], saved["capacity"]) != (ring.step, ring.capacity):
+                        raise ValueError(f"resolution {name} changed")
+                rings = {name: _Ring(ring.step, ring.capacity, self.metrics) for name, ring in self._rings.items()}
+                for ring in rings.values():
+                    ring.times = array("d")
+                    ring.times.fromfile(handle, ring.capacity)
+                for ring in rings.values():
+                    for metric in self.metrics:
+                        values = array("d")
+                        values.fromfile(handle, ring.capacity)
+                        ring.values[metric] = values
+        except (OSError, EOFError, ValueError, KeyError) as exc:
+            log.warning("Ignoring stats history at %s: %s", self.path, exc)
+            return False
+        for name, ring in rings.items():
+            ring.head = int(header["rings"][name]["head"]) % ring.capacity
+            ring.size = min(int(header["rings"][name]["size"]), ring.capacity)
+            # Resume the newest bucket: later samples in it merge, older ones drop.
+            ring.reopen_last()
+        with self._lock:
+            self._rings = rings
+        return True
+
+    def stats(self) -> dict[str, object]:
+        with self._lock:
+            return {
+                "samples": self.samples,
+                "points": {name: ring.size for name, ring in self._rings.items()},
+            }
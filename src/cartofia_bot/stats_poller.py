@@ -0,0 +1,156 @@
+"""Background polling of Proxmox stats into one shared, immutable snapshot.
+
+A single thread calls Proxmox on a fixed interval and swaps in a new
+:class:`StatsSnapshot` holding each ``/api/stats*`` body already serialized.
+Request handlers only read the current reference, so Proxmox load no longer
+scales with traffic and no request waits on a Proxmox round-trip. Until the
+first poll lands, callers get a placeholder built from the fallback zeros.
+The ``live`` body is the same summary without the fields that move on every
+poll (timestamps, raw uptime), so the SSE stream can tell real changes apart.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Callable, Mapping
+
+try:
+    from cartofia_bot.proxmox_stats import CONTAINERS, NODE, VMS, ProxmoxStats, SectionResult
+except ImportError:  # pragma: no cover - fallback for direct script execution
+    from proxmox_stats import CONTAINERS, NODE, VMS, ProxmoxStats, SectionResult
+
+log = logging.getLogger(__name__)
+
+# Body key for the aggregated /api/stats payload; the other keys are sections.
+ALL = "all"
+# Body key for the SSE ``stats`` topic: ALL minus the per-poll volatile fields.
+LIVE = "live"
+
+_VOLATILE_FIELDS = ("timestamp", "uptime_seconds")
+
+
+def live_view(stats: Mapping[str, Any]) -> dict[str, Any]:
+    """Return ``stats`` without fields that change on every poll."""
+    view = {key: value for key, value in stats.items() if key not in _VOLATILE_FIELDS}
+    view["sections"] = {
+        name: {"fresh": section["fresh"]} for name, section in stats.get("sections", {}).items()
+    }
+    if "nodes" in stats:
+        view["nodes"] = [
+            {key: value for key, value in node.items() if key not in _VOLATILE_FIELDS}
+            for node in stats["nodes"]
+        ]
+    return view
+
+
+@dataclass(frozen=True)
+class StatsSnapshot:
+    stats: Mapping[str, Any]
+    bodies: Mapping[str, tuple[bytes, str]]
+    fetched_at: float
+    fetched_monotonic: float
+    ready: bool
+
+    def age(self, now: float | None = None) -> float:
+        now = time.monotonic() if now is None else now
+        return max(0.0, now - self.fetched_monotonic)
+
+
+class StatsPoller:
+    """Refresh a :class:`StatsSnapshot` from ``source`` every ``interval`` seconds."""
+
+    def __init__(
+        self,
+        source: ProxmoxStats,
+        encode: Callable[[object], tuple[bytes, str]],
+        *,
+        interval: float = 15,
+        on_refresh: Callable[[StatsSnapshot], None] | None = None,
+    ) -> None:
+        self.source = source
+        self.encode = encode
+        self.on_refresh = on_refresh
+        self.interval = max(1.0, float(interval))
+        self._snapshot = self._build(source.fallback_sections(), ready=False)
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self.polls = 0
+        self.failed_polls = 0
+        self.last_duration = 0.0
+
+    def _build(self, sections: Mapping[str, SectionResult], *, ready: bool) -> StatsSnapshot:
+        stats = self.source.summarize(sections)
+        bodies = {ALL: self.encode(stats), LIVE: self.encode(live_view(stats))}
+        for name in (CONTAINERS, VMS, NODE):
+            bodies[name] = self.encode(sections[name].data)
+        return StatsSnapshot(
+            stats=MappingProxyType(stats),
+            bodies=MappingProxyType(bodies),
+            fetched_at=time.time(),
+            fetched_monotonic=time.monotonic(),
+            ready=ready,
+        )
+
+    def snapshot(self) -> StatsSnapshot:
+        self.start()
+        return self._snapshot
+
+    def refresh(self) -> StatsSnapshot:
+        """Poll Proxmox once and publish the result."""
+        started = time.monotonic()
+        snapshot = self._build(self.source.fetch_sections(), ready=True)
+        # Replacing the reference is atomic; readers never see a partial snapshot.
+        self._snapshot = snapshot
+        self.last_duration = time.monotonic() - started
+        self.polls += 1
+        self._ready.set()
+        if self.on_refresh is not None:
+            try:
+                self.on_refresh(snapshot)
+            except Exception:
+                log.warning("Stats refresh hook failed.", exc_info=True)
+        return snapshot
+
+    def wait_ready(self, timeout: float) -> bool:
+        """Block until the first poll finished (startup warm-up only)."""
+        return self._ready.wait(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception:
+                self.failed_polls += 1
+                log.warning("Polling Proxmox stats failed; keeping the previous snapshot.", exc_info=True)
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            thread = threading.Thread(target=self._run, name="stats-poller", daemon=True)
+            thread.start()
+            self._thread = thread
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> dict[str, object]:
+        snapshot = self._snapshot
+        return {
+            "ready": snapshot.ready,
+            "age_seconds": round(snapshot.age(), 1),
+            "interval": self.interval,
+            "polls": self.polls,
+            "failed_polls": self.failed_polls,
+            "last_duration_ms": round(self.last_duration * 1000, 1),
+            "sections": snapshot.stats.get("sections", {}),
+        }
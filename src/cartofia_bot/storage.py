@@ -0,0 +1,101 @@
+"""SQLite connection management for the archive/profile database."""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+log = logging.getLogger(__name__)
+
+
+class SQLitePool:
+    """Reuse tuned SQLite connections across requests.
+
+    Connections are opened in WAL mode with ``synchronous=NORMAL`` so readers
+    never block on an in-progress upload, and each keeps its own prepared
+    statement cache alive between requests. Idle connections are kept in a
+    LIFO stack of at most ``max_idle`` entries; bursts beyond that open extra
+    connections which are closed again on release.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        max_idle: int = 8,
+        cache_size_kib: int = 16384,
+        mmap_size: int = 128 * 1024 * 1024,
+        busy_timeout_ms: int = 5000,
+        statement_cache_size: int = 256,
+    ) -> None:
+        self.path = Path(path)
+        self.max_idle = max(1, int(max_idle))
+        self.cache_size_kib = max(0, int(cache_size_kib))
+        self.mmap_size = max(0, int(mmap_size))
+        self.busy_timeout_ms = max(0, int(busy_timeout_ms))
+        self.statement_cache_size = max(0, int(statement_cache_size))
+        self._idle: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.reused = 0
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            cached_statements=self.statement_cache_size,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA cache_size=-{self.cache_size_kib}")
+        conn.execute(f"PRAGMA mmap_size={self.mmap_size}")
+        conn.execute(f"PRAGMA busy_timeout={self.busy_timeout_ms}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        with self._lock:
+            self.opened += 1
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        with self._lock:
+            if self._idle:
+                self.reused += 1
+                return self._idle.pop()
+        return self._open()
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            log.warning("Discarding SQLite connection that failed to roll back.", exc_info=True)
+            conn.close()
+            return
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close_all(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"idle": len(self._idle), "opened": self.opened, "reused": self.reused}
@@ -0,0 +1,351 @@
+"""Resumable, chunked archive upload sessions.
+
+A session owns a sparse ``session-<id>.part`` file in the staging
+directory; creating one checks that the free space covers it plus what other
+open sessions still have to receive, but does not reserve blocks. Clients PUT
+byte ranges at explicit offsets, can ask how much has been received after a
+dropped connection, and finalize once every byte is in. Progress lives in
+``archive_upload_sessions`` so any worker can serve any chunk. Sessions that
+stop receiving data expire and are garbage-collected with their part files.
+
+Finalizing first claims the session (``state`` goes from ``open`` to
+``completing`` in one UPDATE), so two concurrent completes cannot both
+archive the file, and chunks are refused once a session is no longer open.
+
+The SHA-256 is computed as chunks arrive, so finalizing a multi-gigabyte
+upload does not re-read it. A retried chunk that overlaps hashed bytes only
+re-reads that overlap to confirm it is unchanged. If the running digest is
+lost (restart) or cannot follow (the overlap changed, or a gap), the file is
+hashed in full when the session completes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import secrets
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO
+
+from werkzeug.exceptions import ClientDisconnected
+
+log = logging.getLogger(__name__)
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+OPEN = "open"
+COMPLETING = "completing"
+
+
+class UploadSessionError(Exception):
+    """Client-visible upload session failure with an HTTP status."""
+
+    def __init__(self, message: str, status: int = 400) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class _RunningDigest:
+    """SHA-256 of a session's part file over bytes ``[0, hashed)``."""
+
+    def __init__(self) -> None:
+        self.hasher = hashlib.sha256()
+        self.hashed = 0
+        self.valid = True
+        self.lock = threading.Lock()
+
+    def feed(self, handle: BinaryIO, position: int, chunk: bytes) -> None:
+        """Account for ``chunk`` about to be written at ``position`` in ``handle``."""
+        if not self.valid:
+            return
+        if position > self.hashed:
+            self.valid = False
+            return
+        overlap = min(len(chunk), self.hashed - position)
+        if overlap:
+            # A retried chunk; it only keeps the digest valid if the bytes match.
+            handle.seek(position)
+            if handle.read(overlap) != chunk[:overlap]:
+                self.valid = False
+                return
+            handle.seek(position)
+        if overlap < len(chunk):
+            self.hasher.update(chunk[overlap:])
+            self.hashed = position + len(chunk)
+
+
+_digests: dict[str, _RunningDigest] = {}
+_digests_lock = threading.Lock()
+
+
+def _running_digest(session_id: str, received: int) -> _RunningDigest:
+    with _digests_lock:
+        digest = _digests.get(session_id)
+        if digest is None:
+            digest = _digests[session_id] = _RunningDigest()
+            # Bytes received before this process saw the session are not covered.
+            digest.valid = received == 0
+        return digest
+
+
+def finish_digest(session_id: str, size_bytes: int) -> str | None:
+    """Return the hex digest if it covers all ``size_bytes``; None means hash the file."""
+    with _digests_lock:
+        digest = _digests.pop(session_id, None)
+    if digest is None:
+        return None
+    with digest.lock:
+        if digest.valid and digest.hashed == size_bytes:
+            return digest.hasher.hexdigest()
+    return None
+
+
+def session_path(staging_dir: Path, session_id: str) -> Path:
+    return staging_dir / f"session-{session_id}.part"
+
+
+def _outstanding_bytes(conn: sqlite3.Connection, now: float) -> int:
+    """Bytes that open sessions have declared but not yet received."""
+    row = conn.execute(
+        """
+        SELECT COALESCE(SUM(size_bytes - received_bytes), 0)
+        FROM archive_upload_sessions
+        WHERE state = ? AND expires_at > ?
+        """,
+        (OPEN, now),
+    ).fetchone()
+    return int(row[0])
+
+
+def _allocate(path: Path, size_bytes: int) -> None:
+    """Create the part file sparse; blocks are only used as chunks land."""
+    with path.open("wb") as handle:
+        if size_bytes > 0:
+            handle.truncate(size_bytes)
+
+
+def session_payload(row: sqlite3.Row) -> dict[str, object]:
+    return {
+        "upload_id": row["id"],
+        "name": row["original_name"],
+        "size_bytes": row["size_bytes"],
+        "received_bytes": row["received_bytes"],
+        "complete": row["received_bytes"] >= row["size_bytes"],
+        "expires_at": datetime.fromtimestamp(row["expires_at"], tz=timezone.utc).isoformat(),
+    }
+
+
+def get_session(conn: sqlite3.Connection, session_id: str, username: str) -> sqlite3.Row | None:
+    """Return the user's session while it is open; None once claimed or expired."""
+    return conn.execute(
+        """
+        SELECT id, username, original_name, size_bytes, received_bytes, expires_at
+        FROM archive_upload_sessions
+        WHERE id = ? AND username = ? AND state = ? AND expires_at > ?
+        """,
+        (session_id, username, OPEN, time.time()),
+    ).fetchone()
+
+
+def claim_session(conn: sqlite3.Connection, session_id: str, ttl_seconds: float) -> bool:
+    """Move an open session to ``completing``; False if someone else got there first.
+
+    The claim also pushes the expiry out, so garbage collection cannot remove
+    the part file while a large upload is being finalized.
+    """
+    cursor = conn.execute(
+        """
+        UPDATE archive_upload_sessions
+        SET state = ?, expires_at = ?
+        WHERE id = ? AND state = ?
+        """,
+        (COMPLETING, time.time() + ttl_seconds, session_id, OPEN),
+    )
+    conn.commit()
+    return cursor.rowcount == 1
+
+
+def release_session(conn: sqlite3.Connection, session_id: str) -> None:
+    """Reopen a claimed session whose finalization failed before it was consumed."""
+    conn.execute(
+        "UPDATE archive_upload_sessions SET state = ? WHERE id = ? AND state = ?",
+        (OPEN, session_id, COMPLETING),
+    )
+    conn.commit()
+
+
+def create_session(
+    conn: sqlite3.Connection,
+    staging_dir: Path,
+    username: str,
+    original_name: str,
+    size_bytes: int,
+    ttl_seconds: float,
+    max_sessions_per_user: int,
+) -> sqlite3.Row:
+    now = time.time()
+    row = conn.execute(
+        "SELECT COUNT(*) FROM archive_upload_sessions WHERE username = ? AND expires_at > ?",
+        (username, now),
+    ).fetchone()
+    if int(row[0]) >= max_sessions_per_user:
+        raise UploadSessionError(
+            f"Too many unfinished uploads. Finish or cancel one first (max {max_sessions_per_user}).",
+            409,
+        )
+
+    free_bytes = shutil.disk_usage(staging_dir).free
+    owed_bytes = _outstanding_bytes(conn, now)
+    if free_bytes < size_bytes + owed_bytes:
+        log.warning(
+            "Refusing %s-byte upload session: %s bytes free, %s owed to open sessions.",
+            size_bytes,
+            free_bytes,
+            owed_bytes,
+        )
+        raise UploadSessionError("Not enough storage for this upload.", 507)
+
+    session_id = secrets.token_urlsafe(18)
+    path = session_path(staging_dir, session_id)
+    try:
+        _allocate(path, size_bytes)
+    except OSError as exc:
+        path.unlink(missing_ok=True)
+        log.warning("Could not create the part file for an upload session: %s", exc)
+        raise UploadSessionError("Not enough storage for this upload.", 507) from exc
+
+    try:
+        conn.execute(
+            """
+            INSERT INTO archive_upload_sessions (
+                id, username, original_name, size_bytes, received_bytes, created_at, expires_at
+            )
+            VALUES (?, ?, ?, ?, 0, ?, ?)
+            """,
+            (
+                session_id,
+                username,
+                original_name,
+                size_bytes,
+                datetime.now(timezone.utc).isoformat(),
+                now + ttl_seconds,
+            ),
+        )
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        path.unlink(missing_ok=True)
+        raise
+    return get_session(conn, session_id, username)
+
+
+def write_chunk(
+    conn: sqlite3.Connection,
+    staging_dir: Path,
+    session: sqlite3.Row,
+    offset: int,
+    length: int,
+    stream: BinaryIO,
+    ttl_seconds: float,
+) -> int:
+    """Write ``length`` bytes from ``stream`` at ``offset``; return received_bytes.
+
+    Offsets may overlap what was already received (a retried chunk) but may
+    not leave a gap. If the client disconnects mid-chunk, whatever arrived is
+    still recorded so the next attempt resumes from there. Sessions that are
+    no longer open (being completed, or gone) are refused with 409.
+    """
+    received = int(session["received_bytes"])
+    size_bytes = int(session["size_bytes"])
+    if offset < 0 or offset > received:
+        raise UploadSessionError(f"Chunk must start at or before byte {received}.", 409)
+    if offset + length > size_bytes:
+        raise UploadSessionError("Chunk extends past the declared upload size.", 416)
+
+    written = 0
+    disconnected: BaseException | None = None
+    out_of_space: OSError | None = None
+    digest = _running_digest(session["id"], received)
+    # The digest lock is what a complete in this process waits on after its
+    # claim, so re-check the state under it before touching the file.
+    with digest.lock:
+        if not _is_open(conn, session["id"]):
+            raise UploadSessionError("Upload session is no longer accepting data.", 409)
+        with session_path(staging_dir, session["id"]).open("r+b") as handle:
+            handle.seek(offset)
+            while written < length:
+                try:
+                    chunk = stream.read(min(COPY_CHUNK_SIZE, length - written))
+                except (ClientDisconnected, OSError) as exc:  # client went away mid-body
+                    disconnected = exc
+                    break
+                if not chunk:
+                    break
+                digest.feed(handle, offset + written, chunk)
+                try:
+                    handle.write(chunk)
+                    handle.flush()
+                except OSError as exc:  # the sparse file could not grow
+                    digest.valid = False
+                    out_of_space = exc
+                    break
+                written += len(chunk)
+
+    cursor = conn.execute(
+        """
+        UPDATE archive_upload_sessions
+        SET received_bytes = MAX(received_bytes, ?), expires_at = ?
+        WHERE id = ? AND state = ?
+        """,
+        (offset + written, time.time() + ttl_seconds, session["id"], OPEN),
+    )
+    conn.commit()
+    if cursor.rowcount != 1:
+        raise UploadSessionError("Upload session is no longer accepting data.", 409)
+    if out_of_space is not None:
+        log.warning("Upload session %s ran out of storage: %s", session["id"], out_of_space)
+        raise UploadSessionError(
+            f"Not enough storage; {written} of {length} bytes were kept.", 507
+        )
+    if disconnected is not None or written < length:
+        raise UploadSessionError(
+            f"Chunk ended after {written} of {length} bytes; resume from the reported offset.",
+            400,
+        )
+    return max(received, offset + written)
+
+
+def _is_open(conn: sqlite3.Connection, session_id: str) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM archive_upload_sessions WHERE id = ? AND state = ?",
+        (session_id, OPEN),
+    ).fetchone()
+    return row is not None
+
+
+def delete_session(conn: sqlite3.Connection, staging_dir: Path, session_id: str) -> None:
+    conn.execute("DELETE FROM archive_upload_sessions WHERE id = ?", (session_id,))
+    conn.commit()
+    with _digests_lock:
+        _digests.pop(session_id, None)
+    session_path(staging_dir, session_id).unlink(missing_ok=True)
+
+
+def collect_expired(conn: sqlite3.Connection, staging_dir: Path, now: float | None = None) -> int:
+    """Delete expired sessions and their part files; return how many were removed."""
+    now = time.time() if now is None else now
+    expired = [
+        str(row[0])
+        for row in conn.execute(
+            "SELECT id FROM archive_upload_sessions WHERE expires_at <= ?", (now,)
+        ).fetchall()
+    ]
+    for session_id in expired:
+        delete_session(conn, staging_dir, session_id)
+    return len(expired)